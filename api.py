@@ -0,0 +1,262 @@
+"""
+Headless read-only HTTP/JSON API over the latest feed snapshots.
+
+The API runs as its own process next to the Streamlit app and never calls
+upstream providers: it serves the snapshots the app publishes, which the
+warm-start store already persists per feed (one atomically replaced file
+each). A file is unpickled again only when it changes.
+
+    GET /v1/feeds                       feeds with version, fetch time and row count
+    GET /v1/feeds/<airline>/<feed>      rows of one feed, e.g. /v1/feeds/PIA/seats
+
+Row requests take `fields` (comma-separated projection), `limit` and
+`offset`. Every response carries an ETag derived from the snapshot version
+and the query, so a client repeating a request with If-None-Match gets a
+bodiless 304 until the data changes; If-None-Match takes a list of strong
+or weak (W/) tags, compared weakly, or * (RFC 9110 section 13.1.2). Bodies
+are gzipped when Accept-Encoding gives gzip a non-zero q-value, and always
+when it refuses identity; a gzipped body is a different representation, so
+its ETag carries a -gz suffix.
+
+Run with `python api.py`.
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import pickle
+import re
+import threading
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from config import (
+    API_GZIP_MIN_BYTES, API_HOST, API_MAX_PAGE_SIZE, API_PAGE_SIZE, API_PORT, EXPORT_CACHE_ENTRIES, EXPORT_CACHE_MB,
+    WARM_START_DIR,
+)
+from exports import ExportCache
+from poller import Snapshot
+
+logger = logging.getLogger(__name__)
+
+class ApiError(Exception):
+    def __init__(self, status: HTTPStatus, message: str):
+        super().__init__(message)
+        self.status = status
+
+class SnapshotFiles:
+    """Latest snapshot per feed key, read from the warm-start directory and reloaded when a file changes"""
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        # Feed key -> (file mtime_ns and size, snapshot)
+        self._loaded: Dict[str, Tuple[Tuple[int, int], Snapshot]] = {}
+        self._lock = threading.Lock()
+    
+    def keys(self):
+        return sorted(path.stem for path in self.directory.glob("*.pkl")) if self.directory.exists() else []
+    
+    def get(self, key: str) -> Optional[Snapshot]:
+        path = self.directory / f"{key}.pkl"
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            loaded = self._loaded.get(key)
+            if loaded is not None and loaded[0] == stamp:
+                return loaded[1]
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+        with self._lock:
+            self._loaded[key] = (stamp, snapshot)
+        return snapshot
+
+def snapshot_tag(snapshot: Snapshot, query: str = "") -> str:
+    """ETag of a snapshot version as served for a normalized query"""
+    text = f"{snapshot.provider}|{snapshot.version}|{snapshot.fetched_at.isoformat()}|{query}"
+    return '"' + hashlib.sha1(text.encode()).hexdigest()[:20] + '"'
+
+def gzip_tag(tag: str) -> str:
+    """ETag of the gzipped representation of a body tagged `tag`"""
+    return tag[:-1] + '-gz"'
+
+def accepted_codings(header: str) -> Tuple[bool, bool]:
+    """Whether an Accept-Encoding header accepts (gzip, identity), honouring q-values and *"""
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = [part.strip() for part in item.split(';')]
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.lower()] = quality
+    
+    def accepts(coding: str, default: float) -> bool:
+        return qualities.get(coding, qualities.get('*', default)) > 0
+    # An empty header accepts only identity; identity is acceptable unless refused explicitly or by *;q=0
+    return accepts('gzip', 0.0), accepts('identity', 1.0)
+
+_ENTITY_TAG = re.compile(r'(?:W/)?("[^"]*")')
+
+def cached_tags(header: str) -> Tuple[bool, set]:
+    """(matches any, opaque tags) of an If-None-Match header; W/ is dropped for weak comparison"""
+    if header.strip() == '*':
+        return True, set()
+    return False, set(_ENTITY_TAG.findall(header))
+
+def _int_param(params: Dict[str, str], name: str, default: int, maximum: int = None) -> int:
+    try:
+        value = int(params.get(name, default))
+    except ValueError:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must be an integer")
+    if value < 0:
+        raise ApiError(HTTPStatus.BAD_REQUEST, f"{name} must not be negative")
+    return min(value, maximum) if maximum is not None else value
+
+class FeedApi:
+    """Resolves API paths to (ETag, body builder) without serializing anything for a 304"""
+    
+    def __init__(self, files: SnapshotFiles):
+        self.files = files
+    
+    def resolve(self, path: str, params: Dict[str, str]):
+        parts = [p for p in path.split('/') if p]
+        if parts == ['v1', 'feeds']:
+            return self._feeds()
+        if len(parts) == 4 and parts[:2] == ['v1', 'feeds']:
+            return self._rows(f"{parts[2]}.{parts[3]}", params)
+        raise ApiError(HTTPStatus.NOT_FOUND, f"No route for {path}")
+    
+    def _feeds(self):
+        snapshots = [s for s in map(self.files.get, self.files.keys()) if s is not None]
+        tag = '"' + hashlib.sha1("|".join(snapshot_tag(s) for s in snapshots).encode()).hexdigest()[:20] + '"'
+        
+        def build():
+            feeds = []
+            for snapshot in snapshots:
+                airline, _, feed = snapshot.provider.partition('.')
+                feeds.append({
+                    'airline': airline,
+                    'feed': feed,
+                    'version': snapshot.version,
+                    'fetched_at': snapshot.fetched_at.isoformat(),
+                    'rows': len(snapshot.data) if isinstance(snapshot.data, pd.DataFrame) else None,
+                    'url': f"/v1/feeds/{airline}/{feed}",
+                })
+            return {'feeds': feeds}
+        return tag, build
+    
+    def _rows(self, key: str, params: Dict[str, str]):
+        snapshot = self.files.get(key)
+        if snapshot is None or not isinstance(snapshot.data, pd.DataFrame):
+            raise ApiError(HTTPStatus.NOT_FOUND, f"Unknown feed {key}")
+        frame = snapshot.data
+        limit = _int_param(params, 'limit', API_PAGE_SIZE, API_MAX_PAGE_SIZE)
+        offset = _int_param(params, 'offset', 0)
+        fields = [f for f in params.get('fields', '').split(',') if f] or list(frame.columns)
+        unknown = [f for f in fields if f not in frame.columns]
+        if unknown:
+            raise ApiError(HTTPStatus.BAD_REQUEST, f"Unknown fields: {', '.join(unknown)}")
+        tag = snapshot_tag(snapshot, f"{','.join(fields)}|{limit}|{offset}")
+        
+        def build():
+            page = frame.iloc[offset:offset + limit][fields]
+            return {
+                'airline': key.partition('.')[0],
+                'feed': key.partition('.')[2],
+                'version': snapshot.version,
+                'fetched_at': snapshot.fetched_at.isoformat(),
+                'total': len(frame),
+                'offset': offset,
+                'limit': limit,
+                'next_offset': offset + limit if offset + limit < len(frame) else None,
+                'fields': fields,
+                'rows': json.loads(page.to_json(orient='records', date_format='iso')),
+            }
+        return tag, build
+
+class ApiHandler(BaseHTTPRequestHandler):
+    """GET-only handler; set `api` and `bodies` on a subclass"""
+    
+    api: FeedApi = None
+    # Encoded bodies by (ETag, gzip, gzip threshold), so repeat requests without If-None-Match skip serialization too
+    bodies: ExportCache = None
+    protocol_version = "HTTP/1.1"
+    
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            tag, build = self.api.resolve(url.path, params)
+        except ApiError as e:
+            return self._send(e.status, json.dumps({'error': str(e)}).encode())
+        except Exception as e:
+            logger.exception("API request %s failed", self.path)
+            return self._send(HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({'error': str(e)}).encode())
+        
+        gzip_ok, identity_ok = accepted_codings(self.headers.get('Accept-Encoding', ''))
+        # Small bodies go uncompressed unless the client refuses identity
+        min_bytes = API_GZIP_MIN_BYTES if identity_ok else 0
+        any_tag, cached = cached_tags(self.headers.get('If-None-Match', ''))
+        # A gzip client may hold either representation (small bodies are sent uncompressed)
+        variants = ([gzip_tag(tag)] if gzip_ok else []) + ([tag] if identity_ok or not gzip_ok else [])
+        for variant in variants:
+            if variant in cached:
+                return self._send(HTTPStatus.NOT_MODIFIED, b"", variant)
+        
+        def encode():
+            body = json.dumps(build(), separators=(',', ':')).encode()
+            return gzip.compress(body, compresslevel=5) if gzip_ok and len(body) >= min_bytes else body
+        body = self.bodies.get((tag, gzip_ok, min_bytes), encode)
+        gzipped = body[:2] == b'\x1f\x8b'
+        served = gzip_tag(tag) if gzipped else tag
+        # * matches whatever representation exists, which for a resolved path is always one
+        if any_tag:
+            return self._send(HTTPStatus.NOT_MODIFIED, b"", served)
+        self._send(HTTPStatus.OK, body, served, gzipped=gzipped)
+    
+    def _send(self, status: HTTPStatus, body: bytes, tag: str = None, gzipped: bool = False):
+        self.send_response(status)
+        if tag:
+            self.send_header('ETag', tag)
+            self.send_header('Cache-Control', 'no-cache')
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.send_header('Vary', 'Accept-Encoding')
+            if gzipped:
+                self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        if status != HTTPStatus.NOT_MODIFIED:
+            self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+def make_server(host: str = API_HOST, port: int = API_PORT, directory: str = WARM_START_DIR) -> ThreadingHTTPServer:
+    """HTTP server serving the snapshots saved in `directory`"""
+    handler = type('FeedApiHandler', (ApiHandler,), {
+        'api': FeedApi(SnapshotFiles(directory)),
+        'bodies': ExportCache(EXPORT_CACHE_ENTRIES, int(EXPORT_CACHE_MB * 1024 * 1024)),
+    })
+    return ThreadingHTTPServer((host, port), handler)
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    server = make_server()
+    logger.info("Serving feed snapshots from %s on http://%s:%d", WARM_START_DIR, *server.server_address[:2])
+    server.serve_forever()
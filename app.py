@@ -16,15 +16,56 @@ import numpy as np
 from datetime import datetime, timedelta
 import plotly.express as px
 import plotly.graph_objects as go
-import requests
 import json
 import hashlib
+import logging
 import os
-from typing import Dict, List, Tuple
+import uuid
+from dataclasses import dataclass, replace
+from functools import partial
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
 import io
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
 import warnings
 warnings.filterwarnings('ignore')
 
+from archive import SnapshotArchive
+from cache import ProviderCache
+from config import (
+    AIRLINES, ARCHIVE_COMPACT_AFTER, ARCHIVE_DIR, BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_SECONDS,
+    DEFAULT_AIRLINE, EVENT_STREAM_HEARTBEAT_SECONDS, EVENT_STREAM_HOST, EVENT_STREAM_MAX_CLIENTS,
+    EVENT_STREAM_MAX_PENDING, EVENT_STREAM_PORT, EXPORT_BATCH_ROWS, EXPORT_CACHE_ENTRIES,
+    EXPORT_CACHE_MB, EXPORT_DIR, FEED_POLL_INTERVALS, FEED_POLL_WORKERS, FIGURE_CACHE_ENTRIES,
+    FIGURE_CACHE_MB, FLIGHT_STATE_EXPIRY_MINUTES, HISTORY_CAPACITY, HISTORY_RETENTION_HOURS,
+    HTTP_BACKOFF_BASE, HTTP_BACKOFF_CAP, HTTP_POOL_SIZE, HTTP_RETRIES, HUB_AIRPORTS, MAP_HEIGHT_PX,
+    MAP_MAX_POINTS, OFFLINE_FEEDS, OPENSKY_BBOX, OPENSKY_ICAO24_PREFIXES, POSITION_GRID_DEGREES,
+    PROVIDER_TTLS, RATE_LIMITS, RATE_LIMIT_MAX_WAIT, REPORT_DIR, REPORT_MAX_FILES,
+    REPORT_RETENTION_DAYS, REPORT_WORKERS, ROLLUP_BACKFILL_DAYS, ROLLUP_LATE_WINDOW_HOURS,
+    ROLLUP_RETENTION_DAYS, SHARED_SNAPSHOT_DIR, SHARED_SNAPSHOT_POLL_SECONDS, SHARED_SNAPSHOT_WAIT_SECONDS, WARM_START_DIR,
+    AirlineConfig, HubAirport, get_airline_config, list_airlines,
+)
+from events import DiffRule, EventLog, classify_flight_changes, diff_frames, with_flight_phase, with_flight_route
+from exports import STREAM_FORMATS, ExportCache, ExportStats, stream_export
+from figures import FigureCache
+from history import HistoryStore
+from http_client import HttpClient, ProviderRateLimitedError
+from kpis import ACTIVE_FLIGHTS, AIRCRAFT_AVAILABLE, LOAD_FACTOR, ON_TIME, PASSENGERS, REVENUE, SAFETY_SCORE, Kpi, KpiBoard
+from poller import Feed, FeedPoller, Snapshot, SnapshotStore
+from reconcile import NORMALIZERS, FlightStateTable
+from reports import REPORT_FORMATS, ReportQueue, ReportSpec
+from rollups import RollupStore
+from schemas import apply_schema
+from shared import SharedSnapshots
+from scheduler import CallSkipped, ProviderScheduler, RateLimitedError
+from spatial import PositionIndex, viewport_bounds
+from stream import EventBroadcaster, serve_events
+from warmstart import WarmStartStore
+
+logger = logging.getLogger(__name__)
+
 # ============================================================================
 # PAGE CONFIG
 # ============================================================================
@@ -98,17 +139,23 @@ class UserAuth:
 # REAL DATA INTEGRATIONS
 # ============================================================================
 
+def rebadge_flights(frame: pd.DataFrame, airline: AirlineConfig) -> pd.DataFrame:
+    """Give demo flight numbers (PK-xxx) the airline's IATA code"""
+    if 'Flight' not in frame or airline.iata_code == 'PK':
+        return frame
+    return frame.assign(Flight=frame['Flight'].str.replace('PK-', f"{airline.iata_code}-", regex=False))
+
 class FlightRadarAPI:
     """Real FlightRadar24 Data - Option A"""
     
     @staticmethod
-    def get_pia_flights() -> pd.DataFrame:
-        """Get real PIA flights from FlightRadar24"""
+    def get_airline_flights(airline: AirlineConfig) -> pd.DataFrame:
+        """Get real flights of one airline from FlightRadar24"""
         try:
             # FlightRadar24 public API
             url = "https://api.flightradar24.com/common/v1/flight.json"
             params = {
-                'query': 'PK',  # PIA flights
+                'query': airline.iata_code,
                 'limit': 100
             }
             
@@ -116,7 +163,7 @@ class FlightRadarAPI:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64)'
             }
             
-            response = requests.get(url, params=params, headers=headers, timeout=10)
+            response = get_http_client().get('flightradar', url, params=params, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -142,16 +189,20 @@ class FlightRadarAPI:
                     except:
                         continue
                 
-                return pd.DataFrame(flights) if flights else FlightRadarAPI._mock_pia_flights()
+                return pd.DataFrame(flights) if flights else FlightRadarAPI._mock_flights(airline)
         
+        except (CallSkipped, ProviderRateLimitedError):
+            # Let the caller keep serving the last good snapshot
+            raise
         except Exception as e:
-            st.warning(f"⚠️ FlightRadar24 API unavailable: {e}. Showing realistic mock data.")
-            return FlightRadarAPI._mock_pia_flights()
+            logger.warning("FlightRadar24 API unavailable for %s: %s. Showing realistic mock data.", airline.airline_code, e)
+        
+        return FlightRadarAPI._mock_flights(airline)
     
     @staticmethod
-    def _mock_pia_flights() -> pd.DataFrame:
-        """Realistic mock PIA flight data"""
-        return pd.DataFrame({
+    def _mock_flights(airline: AirlineConfig) -> pd.DataFrame:
+        """Realistic mock flight data"""
+        return rebadge_flights(pd.DataFrame({
             'Flight': ['PK-001', 'PK-002', 'PK-003', 'PK-004', 'PK-201', 'PK-301'],
             'Aircraft': ['AP-BEI', 'AP-BEE', 'AP-BEF', 'AP-BEG', 'AP-BEH', 'AP-BEI'],
             'From': ['KHI', 'ISB', 'LHE', 'KHI', 'KHI', 'GIL'],
@@ -162,104 +213,224 @@ class FlightRadarAPI:
             'Passengers': [336, 280, 320, 150, 336, 320],
             'On-Time': ['Yes', 'Yes', 'Yes', 'Yes', 'Yes', 'Yes'],
             'Last Update': [datetime.now()] * 6
-        })
+        }), airline)
+
+@dataclass
+class IngestStats:
+    """Cost of one OpenSky ingest"""
+    bytes_received: int
+    rows_total: int
+    rows_kept: int
+    parse_ms: float
+    peak_bytes: int
 
 class OpenSkyAPI:
     """Real OpenSky Network Data - Option A"""
     
+    URL = "https://opensky-network.org/api/states/all"
+    
+    # Field order of an OpenSky state vector
+    STATE_COLUMNS = [
+        'icao24', 'callsign', 'origin_country', 'time_position', 'last_contact',
+        'longitude', 'latitude', 'baro_altitude', 'on_ground', 'velocity',
+        'true_track', 'vertical_rate', 'sensors', 'geo_altitude', 'squawk',
+        'spi', 'position_source',
+    ]
+    
+    last_ingest: IngestStats = None
+    
     @staticmethod
-    def get_pia_aircraft() -> pd.DataFrame:
-        """Get real PIA aircraft from OpenSky Network"""
+    def get_aircraft(airlines: List[AirlineConfig]) -> pd.DataFrame:
+        """Get real aircraft of all airlines from one OpenSky Network request, labelled by airline"""
         try:
-            url = "https://opensky-network.org/api/states/all"
+            lamin, lomin, lamax, lomax = OPENSKY_BBOX
+            params = [('lamin', lamin), ('lomin', lomin), ('lamax', lamax), ('lomax', lomax)]
+            # OpenSky only filters on complete ICAO24 addresses; shorter prefixes are applied locally
+            params += [('icao24', p) for p in OPENSKY_ICAO24_PREFIXES if len(p) == 6]
             
-            response = requests.get(url, timeout=10)
+            response = get_http_client().get('opensky', OpenSkyAPI.URL, params=params, timeout=10)
             
             if response.status_code == 200:
-                data = response.json()
-                aircraft = []
-                
-                for state in data.get('states', []):
-                    if state[1] and 'PK' in state[1]:  # PIA flights start with PK
-                        aircraft.append({
-                            'Callsign': state[1].strip(),
-                            'ICAO': state[0],
-                            'Latitude': state[6],
-                            'Longitude': state[5],
-                            'Altitude': state[7],
-                            'Velocity': state[9],
-                            'Heading': state[10],
-                            'Country': state[2],
-                            'Timestamp': datetime.fromtimestamp(state[11])
-                        })
-                
-                return pd.DataFrame(aircraft) if aircraft else OpenSkyAPI._mock_aircraft()
+                callsign_prefixes = {a.airline_code: a.callsign_prefixes for a in airlines}
+                aircraft = OpenSkyAPI._ingest(response.content, callsign_prefixes, OPENSKY_ICAO24_PREFIXES)
+                return aircraft if not aircraft.empty else OpenSkyAPI._mock_aircraft(airlines)
         
-        except Exception as e:
-            return OpenSkyAPI._mock_aircraft()
+        except (CallSkipped, ProviderRateLimitedError):
+            raise
+        except Exception:
+            pass
+        
+        return OpenSkyAPI._mock_aircraft(airlines)
     
     @staticmethod
-    def _mock_aircraft() -> pd.DataFrame:
-        """Realistic mock aircraft data"""
+    def _ingest(payload: bytes, callsign_prefixes: Dict[str, Tuple[str, ...]], icao24_prefixes: Tuple[str, ...] = ()) -> pd.DataFrame:
+        """Parse a states payload and record its size, parse time and peak memory"""
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+        started = time.perf_counter()
+        
+        states = OpenSkyAPI._states_frame(json.loads(payload).get('states') or [])
+        aircraft = OpenSkyAPI._filter_states(states, callsign_prefixes, icao24_prefixes)
+        
+        if tracing:
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        else:
+            # Without tracemalloc, the payload plus the parsed frame is the high-water mark
+            peak_bytes = len(payload) + int(states.memory_usage(deep=True).sum())
+        
+        OpenSkyAPI.last_ingest = IngestStats(
+            bytes_received=len(payload),
+            rows_total=len(states),
+            rows_kept=len(aircraft),
+            parse_ms=(time.perf_counter() - started) * 1000,
+            peak_bytes=peak_bytes,
+        )
+        return aircraft
+    
+    @staticmethod
+    def _states_frame(states: List[List]) -> pd.DataFrame:
+        """Build a columnar frame from raw state vectors"""
+        if not states:
+            return pd.DataFrame(columns=OpenSkyAPI.STATE_COLUMNS)
+        
+        # Extended responses carry an extra trailing field; ragged rows are padded with None
+        frame = pd.DataFrame(states).iloc[:, :len(OpenSkyAPI.STATE_COLUMNS)]
+        frame.columns = OpenSkyAPI.STATE_COLUMNS[:frame.shape[1]]
+        return frame
+    
+    @staticmethod
+    def _filter_states(states: pd.DataFrame, callsign_prefixes: Dict[str, Tuple[str, ...]], icao24_prefixes: Tuple[str, ...] = ()) -> pd.DataFrame:
+        """Keep states whose callsign matches an airline (and ICAO24, if prefixes are given), without a per-row loop"""
+        callsigns = states['callsign'].astype('string').str.strip()
+        # One vectorized match per airline; the first airline whose prefix matches wins
+        matches = [callsigns.str.startswith(tuple(p)).fillna(False).to_numpy(dtype=bool) for p in callsign_prefixes.values()]
+        labels = np.select(matches, list(callsign_prefixes), default='') if matches else np.full(len(states), '')
+        mask = labels != ''
+        if icao24_prefixes:
+            mask &= states['icao24'].astype('string').str.startswith(tuple(icao24_prefixes)).fillna(False).to_numpy(dtype=bool)
+        
+        matched = states[mask]
+        seen = matched['time_position'].fillna(matched['last_contact'])
         return pd.DataFrame({
+            'Callsign': callsigns[mask].to_numpy(),
+            'Airline': labels[mask],
+            'ICAO': matched['icao24'].to_numpy(),
+            'Latitude': matched['latitude'].to_numpy(dtype=float),
+            'Longitude': matched['longitude'].to_numpy(dtype=float),
+            'Altitude': matched['baro_altitude'].to_numpy(dtype=float),
+            'Velocity': matched['velocity'].to_numpy(dtype=float),
+            'Heading': matched['true_track'].to_numpy(dtype=float),
+            'Country': matched['origin_country'].to_numpy(),
+            # Naive local time, the clock of every other feed and of state expiry
+            'Timestamp': pd.to_datetime(seen.to_numpy(dtype=float), unit='s', utc=True)
+                           .tz_convert(datetime.now().astimezone().tzinfo).tz_localize(None),
+        })
+    
+    @staticmethod
+    def _mock_aircraft(airlines: List[AirlineConfig]) -> pd.DataFrame:
+        """Realistic mock aircraft data, one small fleet per airline"""
+        fleet = pd.DataFrame({
             'Aircraft ID': ['AP-BEI', 'AP-BEE', 'AP-BEF', 'AP-BEG', 'AP-BEH'],
             'Type': ['Boeing 777', 'Airbus A320', 'Boeing 777', 'Airbus A320', 'Airbus A321'],
             'Status': ['In Flight', 'In Flight', 'Maintenance', 'On Ground', 'In Flight'],
             'Altitude': [35000, 28000, 0, 0, 38000],
             'Speed': [450, 420, 0, 0, 490],
             'Location': ['Over Arabian Sea', 'Approaching KHI', 'Karachi Hangar', 'Islamabad', 'Over Persian Gulf'],
+            'Latitude': [23.10, 25.45, 24.90, 33.61, 26.40],
+            'Longitude': [63.80, 67.55, 67.16, 73.10, 53.20],
+            'Heading': [65.0, 215.0, 0.0, 0.0, 95.0],
             'Last Update': [datetime.now()] * 5
         })
+        return pd.concat([fleet.assign(Airline=a.airline_code) for a in airlines], ignore_index=True)
 
 class WeatherAPI:
     """Real Weather Data - Option A"""
     
+    # Using open-meteo (free weather API, no key needed); it accepts comma-separated coordinate lists
+    URL = "https://api.open-meteo.com/v1/forecast"
+    BATCH_SIZE = 25
+    MAX_WORKERS = 8
+    TIMEOUT = 5
+    
     @staticmethod
-    def get_pia_airport_weather() -> pd.DataFrame:
-        """Get real weather for PIA hub airports"""
-        airports = {
-            'KHI': {'name': 'Karachi', 'lat': 24.8567, 'lon': 67.1597},
-            'ISB': {'name': 'Islamabad', 'lat': 33.6164, 'lon': 73.1286},
-            'LHE': {'name': 'Lahore', 'lat': 31.5204, 'lon': 74.3587},
-        }
+    def get_hub_weather(airlines: List[AirlineConfig]) -> pd.DataFrame:
+        """Get real weather for every hub airport of the given airlines, each airport fetched once"""
+        codes = [code for code in HUB_AIRPORTS if any(code in a.hub_airports for a in airlines)]
+        return WeatherAPI.get_airport_weather({code: HUB_AIRPORTS[code] for code in codes})
+    
+    @staticmethod
+    def get_airport_weather(airports: Dict[str, HubAirport]) -> pd.DataFrame:
+        """Get real weather for a set of airports"""
+        codes = list(airports)
+        batches = [codes[i:i + WeatherAPI.BATCH_SIZE] for i in range(0, len(codes), WeatherAPI.BATCH_SIZE)]
+        
+        # Batches run in parallel, so wall time is bounded by the slowest request rather than the sum
+        with ThreadPoolExecutor(max_workers=min(WeatherAPI.MAX_WORKERS, len(batches) or 1)) as pool:
+            results = list(pool.map(lambda batch: WeatherAPI._fetch_batch([airports[c] for c in batch]), batches))
         
-        weather_data = []
+        weather_data = [row for rows in results for row in rows]
+        
+        return pd.DataFrame(weather_data) if weather_data else WeatherAPI._mock_weather()
+    
+    @staticmethod
+    def _mock_weather() -> pd.DataFrame:
+        """Realistic mock hub weather"""
+        return pd.DataFrame([
+            {'Airport': 'KHI', 'City': 'Karachi', 'Temperature (°C)': 32, 'Humidity (%)': 75, 'Wind Speed (km/h)': 15, 'Conditions': 'Partly Cloudy'},
+            {'Airport': 'ISB', 'City': 'Islamabad', 'Temperature (°C)': 28, 'Humidity (%)': 65, 'Wind Speed (km/h)': 10, 'Conditions': 'Clear'},
+            {'Airport': 'LHE', 'City': 'Lahore', 'Temperature (°C)': 30, 'Humidity (%)': 70, 'Wind Speed (km/h)': 12, 'Conditions': 'Sunny'},
+        ])
+    
+    @staticmethod
+    def _fetch_batch(batch: List[HubAirport]) -> List[Dict]:
+        """Fetch one multi-coordinate request; fall back to per-airport requests if it fails"""
+        params = {
+            'latitude': ','.join(str(a.lat) for a in batch),
+            'longitude': ','.join(str(a.lon) for a in batch),
+            'current': 'temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m',
+            'timezone': 'Asia/Karachi'
+        }
         
         try:
-            for code, airport in airports.items():
-                # Using open-meteo (free weather API, no key needed)
-                url = f"https://api.open-meteo.com/v1/forecast"
-                params = {
-                    'latitude': airport['lat'],
-                    'longitude': airport['lon'],
-                    'current': 'temperature_2m,relative_humidity_2m,weather_code,wind_speed_10m',
-                    'timezone': 'Asia/Karachi'
-                }
-                
-                response = requests.get(url, params=params, timeout=5)
-                
-                if response.status_code == 200:
-                    data = response.json()['current']
-                    weather_data.append({
-                        'Airport': code,
-                        'City': airport['name'],
-                        'Temperature (°C)': data['temperature_2m'],
-                        'Humidity (%)': data['relative_humidity_2m'],
-                        'Wind Speed (km/h)': data['wind_speed_10m'],
-                        'Conditions': WeatherAPI._weather_code_to_text(data['weather_code']),
-                        'Last Update': datetime.now()
-                    })
-        except:
+            response = get_http_client().get('weather', WeatherAPI.URL, params=params, timeout=WeatherAPI.TIMEOUT)
+            if response.status_code == 200:
+                payload = response.json()
+                # A single coordinate returns an object, several return a list in request order
+                locations = payload if isinstance(payload, list) else [payload]
+                if len(locations) == len(batch):
+                    return [WeatherAPI._to_row(a, loc['current']) for a, loc in zip(batch, locations)]
+        except RateLimitedError:
+            # A shed single-airport retry just drops that airport
+            if len(batch) > 1:
+                raise
+            return []
+        except (CallSkipped, ProviderRateLimitedError):
+            # Per-airport retries would only be refused too
+            raise
+        except Exception:
             pass
         
-        if not weather_data:
-            weather_data = [
-                {'Airport': 'KHI', 'City': 'Karachi', 'Temperature (°C)': 32, 'Humidity (%)': 75, 'Wind Speed (km/h)': 15, 'Conditions': 'Partly Cloudy'},
-                {'Airport': 'ISB', 'City': 'Islamabad', 'Temperature (°C)': 28, 'Humidity (%)': 65, 'Wind Speed (km/h)': 10, 'Conditions': 'Clear'},
-                {'Airport': 'LHE', 'City': 'Lahore', 'Temperature (°C)': 30, 'Humidity (%)': 70, 'Wind Speed (km/h)': 12, 'Conditions': 'Sunny'},
-            ]
+        if len(batch) == 1:
+            return []
         
-        return pd.DataFrame(weather_data)
+        # Keep whatever airports still answer individually
+        with ThreadPoolExecutor(max_workers=min(WeatherAPI.MAX_WORKERS, len(batch))) as pool:
+            rows = list(pool.map(lambda a: WeatherAPI._fetch_batch([a]), batch))
+        return [row for airport_rows in rows for row in airport_rows]
+    
+    @staticmethod
+    def _to_row(airport: HubAirport, data: Dict) -> Dict:
+        """Convert an open-meteo 'current' block to a table row"""
+        return {
+            'Airport': airport.code,
+            'City': airport.city,
+            'Temperature (°C)': data['temperature_2m'],
+            'Humidity (%)': data['relative_humidity_2m'],
+            'Wind Speed (km/h)': data['wind_speed_10m'],
+            'Conditions': WeatherAPI._weather_code_to_text(data['weather_code']),
+            'Last Update': datetime.now()
+        }
     
     @staticmethod
     def _weather_code_to_text(code: int) -> str:
@@ -278,9 +449,9 @@ class SeatAvailabilityAPI:
     """Real-time seat sales data"""
     
     @staticmethod
-    def get_realtime_seats() -> pd.DataFrame:
+    def get_realtime_seats(airline: AirlineConfig) -> pd.DataFrame:
         """Get realistic real-time seat data"""
-        return pd.DataFrame({
+        return rebadge_flights(pd.DataFrame({
             'Flight': ['PK-001', 'PK-002', 'PK-003', 'PK-004', 'PK-201', 'PK-301'],
             'Route': ['KHI-ISB', 'ISB-KHI', 'KHI-LHE', 'LHE-KHI', 'KHI-DXB', 'GIL-KHI'],
             'Total Seats': [336, 180, 320, 150, 336, 320],
@@ -289,10 +460,10 @@ class SeatAvailabilityAPI:
             'Load Factor %': [88.7, 86.7, 90.0, 90.0, 93.8, 95.0],
             'Economy Sold': [220, 120, 210, 100, 240, 235],
             'Business Sold': [78, 36, 78, 35, 75, 69],
-            'Revenue Generated': ['$35,760', '$18,720', '$34,560', '$16,200', '$37,800', '$36,480'],
+            'Revenue Generated': [35760, 18720, 34560, 16200, 37800, 36480],
             'Departure Time': ['06:00', '08:00', '10:00', '12:00', '14:00', '16:00'],
             'Status': ['In Flight', 'In Flight', 'Boarding', 'Scheduled', 'In Flight', 'On Time']
-        })
+        }), airline)
 
 # ============================================================================
 # SAFETY & MAINTENANCE DATA
@@ -302,8 +473,8 @@ class MaintenanceSystem:
     """Real maintenance tracking"""
     
     @staticmethod
-    def get_maintenance_schedule() -> pd.DataFrame:
-        """Get maintenance schedule"""
+    def get_maintenance_schedule(airline: AirlineConfig) -> pd.DataFrame:
+        """Get an airline's maintenance schedule"""
         return pd.DataFrame({
             'Aircraft': ['AP-BEI', 'AP-BEE', 'AP-BEF', 'AP-BEG', 'AP-BEH', 'AP-BGI'],
             'Aircraft Type': ['B777', 'A320', 'B777', 'A320', 'A321', 'B777'],
@@ -317,8 +488,8 @@ class MaintenanceSystem:
         })
     
     @staticmethod
-    def get_safety_alerts() -> pd.DataFrame:
-        """Get safety alerts"""
+    def get_safety_alerts(airline: AirlineConfig) -> pd.DataFrame:
+        """Get an airline's safety alerts"""
         return pd.DataFrame({
             'Aircraft': ['AP-BEF', 'AP-BEE', 'AP-BGI'],
             'Issue': ['Engine vibration threshold exceeded', 'Hydraulic pressure irregular', 'Landing gear indicator fluctuation'],
@@ -334,27 +505,622 @@ class MaintenanceSystem:
         })
     
     @staticmethod
-    def get_flight_safety_data() -> pd.DataFrame:
+    def get_flight_safety_data(airline: AirlineConfig) -> pd.DataFrame:
         """Get flight safety metrics"""
-        return pd.DataFrame({
+        return rebadge_flights(pd.DataFrame({
             'Flight': ['PK-001', 'PK-002', 'PK-003', 'PK-004', 'PK-201', 'PK-301'],
             'Route': ['KHI-ISB', 'ISB-KHI', 'KHI-LHE', 'LHE-KHI', 'KHI-DXB', 'GIL-KHI'],
             'Aircraft': ['AP-BEI', 'AP-BEE', 'AP-BEF', 'AP-BEG', 'AP-BEH', 'AP-BGI'],
             'Crew': ['Captain Ahmed', 'Captain Khan', 'Captain Ali', 'Captain Hassan', 'Captain Raza', 'Captain Malik'],
             'Flight Hours': [2.5, 2.2, 1.5, 1.2, 3.5, 1.8],
-            'Safety Score': ['✅ 100%', '✅ 100%', '✅ 99%', '✅ 100%', '✅ 98%', '✅ 100%'],
+            'Safety Score': [100, 100, 99, 100, 98, 100],
             'Incidents': ['None', 'None', 'Minor turbulence', 'None', 'Weather delay', 'None'],
             'Maintenance Issues': ['None', 'None', 'Deferred item', 'None', 'None', 'None'],
             'On-Time Performance': ['On Time', 'On Time', 'On Time', 'Early', 'Delayed 15min', 'On Time'],
             'Passenger Complaints': [0, 0, 1, 0, 2, 0]
-        })
+        }), airline)
+
+# ============================================================================
+# SHARED DATA CACHE
+# ============================================================================
+
+@st.cache_resource
+def get_http_client() -> HttpClient:
+    """Process-wide pooled HTTP client with per-provider circuit breakers"""
+    return HttpClient(
+        retries=HTTP_RETRIES, backoff_base=HTTP_BACKOFF_BASE, backoff_cap=HTTP_BACKOFF_CAP,
+        failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_SECONDS,
+        pool_size=HTTP_POOL_SIZE,
+        scheduler=ProviderScheduler(RATE_LIMITS, max_wait=RATE_LIMIT_MAX_WAIT),
+    )
+
+@st.cache_resource
+def get_provider_cache() -> ProviderCache:
+    """Process-wide cache shared by all sessions"""
+    return ProviderCache(PROVIDER_TTLS, max_entries=64)
+
+# ============================================================================
+# BACKGROUND INGESTION
+# ============================================================================
+
+# Per-airline feed name -> (live fetch, local stand-in used when OFFLINE_FEEDS is set),
+# both called with the airline's AirlineConfig
+FEED_SOURCES = {
+    'flightradar': (FlightRadarAPI.get_airline_flights, FlightRadarAPI._mock_flights),
+    'seats': (SeatAvailabilityAPI.get_realtime_seats, SeatAvailabilityAPI.get_realtime_seats),
+    'maintenance': (MaintenanceSystem.get_maintenance_schedule, MaintenanceSystem.get_maintenance_schedule),
+    'safety_alerts': (MaintenanceSystem.get_safety_alerts, MaintenanceSystem.get_safety_alerts),
+    'flight_safety': (MaintenanceSystem.get_flight_safety_data, MaintenanceSystem.get_flight_safety_data),
+}
+
+# Feeds fetched once for all airlines and split per airline -> (live fetch, local stand-in),
+# both called with the list of every AirlineConfig
+SHARED_FEED_SOURCES = {
+    'opensky': (OpenSkyAPI.get_aircraft, OpenSkyAPI._mock_aircraft),
+    'weather': (WeatherAPI.get_hub_weather, lambda airlines: WeatherAPI._mock_weather()),
+}
+
+# Airline code under which shared feeds are polled and cached
+ALL_AIRLINES = 'ALL'
+
+# Display-only formatting for typed numeric columns
+DISPLAY_FORMATS = {
+    'Revenue Generated': st.column_config.NumberColumn(format="$%d"),
+    'Cost ($)': st.column_config.NumberColumn(format="$%d"),
+    'Safety Score': st.column_config.NumberColumn(format="✅ %d%%"),
+    'Load Factor %': st.column_config.NumberColumn(format="%.1f%%"),
+}
+
+REFRESH_RATES = {"Manual": None, "Every 10s": 10, "Every 30s": 30}
+
+# Columns that change on every poll without the flight itself changing
+VOLATILE_COLUMNS = ('Last Update', 'Updated', 'Timestamp')
+
+# Live updates redraw the whole flights table once this share of its rows has changed
+LIVE_REBASE_FRACTION = 0.25
+
+# Flights page data source -> feeds it reads
+DATA_SOURCE_FEEDS = {
+    "Unified (FR24 + OpenSky)": ['flightradar', 'opensky'],
+    "FlightRadar24 API": ['flightradar'],
+    "OpenSky Network": ['opensky'],
+    "Demo Data": [],
+}
+
+def feed_key(airline: str, feed: str) -> str:
+    """Snapshot store key of one airline's feed, e.g. 'PIA.flightradar'"""
+    return f"{airline}.{feed}"
+
+def split_feed_key(key: str) -> Tuple[str, str]:
+    """(airline, feed) of a snapshot store key"""
+    airline, _, feed = key.partition('.')
+    return airline, feed
+
+def polled_feed_key(airline: str, feed: str) -> str:
+    """Key of the poller feed that produces an airline's feed"""
+    return feed_key(ALL_AIRLINES if feed in SHARED_FEED_SOURCES else airline, feed)
+
+def feed_fetcher(name: str, airline: str, offline: bool = OFFLINE_FEEDS) -> Callable[[], pd.DataFrame]:
+    """Upstream fetch of a feed for one airline, or for all of them for shared feeds, typed by its schema"""
+    if airline == ALL_AIRLINES:
+        live, standin = SHARED_FEED_SOURCES[name]
+        target = [get_airline_config(code) for code in list_airlines()]
+    else:
+        live, standin = FEED_SOURCES[name]
+        target = get_airline_config(airline)
+    fetch = standin if offline else live
+    return lambda: apply_schema(fetch(target), name)
+
+def split_shared_frame(feed: str, frame: pd.DataFrame, airline: AirlineConfig) -> pd.DataFrame:
+    """The rows of a shared feed that belong to one airline"""
+    if feed == 'weather':
+        mask = frame['Airport'].isin(airline.hub_airports)
+    else:
+        mask = frame['Airline'] == airline.airline_code
+    return frame[mask].reset_index(drop=True)
+
+def split_shared_snapshot(snapshot: Snapshot):
+    """Publish each airline's share of a shared feed snapshot as that airline's feed"""
+    airline, feed = split_feed_key(snapshot.provider)
+    # Followers adopt the shares the leader split
+    if airline != ALL_AIRLINES or is_follower():
+        return
+    store = get_snapshot_store()
+    for code in list_airlines():
+        data = split_shared_frame(feed, snapshot.data, get_airline_config(code))
+        store.publish(feed_key(code, feed), data, fetched_at=snapshot.fetched_at)
+
+@st.cache_resource
+def get_shared_snapshots() -> Optional[SharedSnapshots]:
+    """Snapshot files shared with the other workers on this machine; None unless configured"""
+    if not SHARED_SNAPSHOT_DIR:
+        return None
+    shared = SharedSnapshots(SHARED_SNAPSHOT_DIR)
+    if not shared.available:
+        logger.warning("Shared snapshots need pyarrow and fcntl; this worker polls on its own")
+        return None
+    return shared
+
+def is_follower() -> bool:
+    """True when another worker polls the feeds and this one adopts its snapshots"""
+    shared = get_shared_snapshots()
+    return shared is not None and not shared.leading
+
+def unless_follower(listener: Callable[[Snapshot], None]) -> Callable[[Snapshot], None]:
+    """Listener that only runs in the worker that polls; followers would repeat its disk writes"""
+    def run(snapshot: Snapshot):
+        if not is_follower():
+            listener(snapshot)
+    return run
+
+@st.cache_resource
+def get_snapshot_store() -> SnapshotStore:
+    """Process-wide store of the latest snapshot per airline and feed"""
+    store = SnapshotStore()
+    warm_start = WarmStartStore(WARM_START_DIR)
+    # Serve the last good data from disk until the first live poll lands
+    for snapshot in warm_start.load().values():
+        airline, feed = split_feed_key(snapshot.provider)
+        if airline in AIRLINES or airline == ALL_AIRLINES:
+            snapshot = replace(snapshot, data=apply_schema(snapshot.data, feed))
+            store.restore(snapshot)
+            if feed in EVENT_FEEDS and airline in AIRLINES:
+                # The first live poll is diffed against the saved data
+                get_event_log().baseline(airline, EVENT_FEEDS[feed], snapshot.data, snapshot.version)
+            if feed in KPI_FEEDS and airline in AIRLINES:
+                # Restored snapshots from yesterday become the baseline for today's deltas
+                get_kpi_board().apply(airline, KPI_FEEDS[feed], snapshot.data, snapshot.fetched_at, snapshot.version)
+    store.subscribe(split_shared_snapshot)
+    store.subscribe(unless_follower(warm_start.save))
+    if get_shared_snapshots() is not None:
+        store.subscribe(get_shared_snapshots().publish)
+    store.subscribe(record_history)
+    store.subscribe(unless_follower(archive_snapshot))
+    store.subscribe(index_positions)
+    store.subscribe(reconcile_snapshot)
+    store.subscribe(diff_snapshot)
+    store.subscribe(aggregate_kpis)
+    store.subscribe(rollup_snapshot)
+    return store
+
+@st.cache_resource
+def get_feed_poller() -> FeedPoller:
+    """Start the background poller once per process"""
+    cache = get_provider_cache()
+    # Shared feeds make one upstream request for every airline
+    feeds = [
+        Feed(name=feed_key(ALL_AIRLINES, name), interval=FEED_POLL_INTERVALS[name],
+             fetch=lambda name=name: cache.refresh(name, feed_fetcher(name, ALL_AIRLINES), key=ALL_AIRLINES))
+        for name in SHARED_FEED_SOURCES
+    ]
+    # Per-airline feeds have their own cache entries and poll at the airline's own rate
+    for code in list_airlines():
+        scale = get_airline_config(code).refresh_scale
+        feeds += [
+            Feed(name=feed_key(code, name), interval=FEED_POLL_INTERVALS[name] * scale,
+                 fetch=lambda name=name, code=code: cache.refresh(name, feed_fetcher(name, code), key=code))
+            for name in FEED_SOURCES
+        ]
+    poller = FeedPoller(get_snapshot_store(), feeds, max_workers=FEED_POLL_WORKERS)
+    shared = get_shared_snapshots()
+    if shared is None:
+        poller.start()
+        return poller
+    
+    def lead():
+        poller.start()
+        shared.serve_requests(poller, interval=SHARED_SNAPSHOT_POLL_SECONDS)
+    if shared.try_lead():
+        lead()
+    else:
+        # Another worker polls: adopt its snapshots, and take over polling if it exits
+        shared.follow(get_snapshot_store().adopt, on_lead=lead, interval=SHARED_SNAPSHOT_POLL_SECONDS)
+    return poller
+
+def lease_poll_interval(key: str, seconds: float):
+    """Poll a feed at least every `seconds` while this session keeps asking; followers ask the leader"""
+    if is_follower():
+        get_shared_snapshots().request_poll(key, session_id(), interval=seconds)
+    else:
+        get_feed_poller().request_interval(key, seconds, requester=session_id())
+
+def release_poll_interval(key: str):
+    if is_follower():
+        get_shared_snapshots().release_poll(key, session_id())
+    else:
+        get_feed_poller().release_interval(key, requester=session_id())
+
+def poll_feed_now(key: str, seconds: float = None):
+    """Poll a feed on the next tick, keeping this session's lease if it has one"""
+    if is_follower():
+        get_shared_snapshots().request_poll(key, session_id(), interval=seconds, now=True)
+    else:
+        get_feed_poller().poll_now(key)
+
+# ============================================================================
+# HISTORY
+# ============================================================================
+
+# Feed -> history series its snapshots are appended to
+HISTORY_FEEDS = {'flightradar': 'flights', 'opensky': 'positions', 'seats': 'seats'}
+
+# Column dtypes per series; strings are fixed-width so appends never allocate per row
+HISTORY_SCHEMAS = {
+    'flights': {
+        'Flight': 'U10', 'From': 'U4', 'To': 'U4', 'Altitude (ft)': 'f8', 'Speed (knots)': 'f8', 'Status': 'U16',
+    },
+    'positions': {
+        'Callsign': 'U8', 'ICAO': 'U6', 'Latitude': 'f8', 'Longitude': 'f8', 'Altitude': 'f8',
+        'Velocity': 'f8', 'Heading': 'f8',
+    },
+    'seats': {
+        'Flight': 'U10', 'Route': 'U8', 'Sold': 'f8', 'Available': 'f8', 'Load Factor %': 'f8',
+        'Revenue Generated': 'f8',
+    },
+}
+
+@st.cache_resource
+def get_history_store() -> HistoryStore:
+    """Process-wide rolling history of flight, position and seat snapshots, one series per airline"""
+    series = [(code, name) for code in list_airlines() for name in HISTORY_SCHEMAS]
+    return HistoryStore(
+        {feed_key(code, name): HISTORY_SCHEMAS[name] for code, name in series},
+        {feed_key(code, name): HISTORY_CAPACITY[name] for code, name in series},
+        timedelta(hours=HISTORY_RETENTION_HOURS),
+    )
+
+def record_history(snapshot: Snapshot):
+    """Append a published airline snapshot to that airline's history series"""
+    airline, feed = split_feed_key(snapshot.provider)
+    series = HISTORY_FEEDS.get(feed)
+    if series is None or airline not in AIRLINES:
+        return
+    get_history_store().append(feed_key(airline, series), snapshot.fetched_at, snapshot.data)
+
+# ============================================================================
+# ARCHIVE
+# ============================================================================
+
+# Feed -> archive dataset its snapshots are written to
+ARCHIVE_FEEDS = {
+    'flightradar': 'flights',
+    'opensky': 'positions',
+    'seats': 'seats',
+    'maintenance': 'maintenance',
+    'flight_safety': 'flight_safety',
+}
+
+@st.cache_resource
+def get_archive() -> SnapshotArchive:
+    """Process-wide Parquet archive of feed snapshots"""
+    return SnapshotArchive(ARCHIVE_DIR, compact_after=ARCHIVE_COMPACT_AFTER)
+
+def archive_snapshot(snapshot: Snapshot):
+    """Write a published airline snapshot to the on-disk archive"""
+    airline, feed = split_feed_key(snapshot.provider)
+    dataset = ARCHIVE_FEEDS.get(feed)
+    if dataset is not None and airline in AIRLINES:
+        get_archive().write(dataset, airline, snapshot.fetched_at, snapshot.data)
+
+# ============================================================================
+# ROLLUPS
+# ============================================================================
+
+# Feed -> rollup source its snapshots are folded into
+ROLLUP_FEEDS = {'flightradar': 'flights', 'seats': 'seats'}
+
+# Archived columns the rollups are backfilled from
+ROLLUP_COLUMNS = {
+    'flightradar': ['Flight', 'Flight ID', 'Aircraft', 'From', 'To', 'Passengers', 'Time'],
+    'seats': ['Flight', 'Route', 'Sold', 'Total Seats', 'Revenue Generated', 'Time'],
+}
+
+@st.cache_resource
+def get_rollup_store() -> RollupStore:
+    """Process-wide hourly and daily rollups, backfilled from the archive once per process"""
+    rollups = RollupStore(
+        late_window=timedelta(hours=ROLLUP_LATE_WINDOW_HOURS),
+        retention={level: timedelta(days=days) for level, days in ROLLUP_RETENTION_DAYS.items()},
+    )
+    start = datetime.now() - timedelta(days=ROLLUP_BACKFILL_DAYS)
+    for airline in AIRLINES:
+        # Flights first, so archived seat sales can be placed on the aircraft that flew them
+        for feed, source in ROLLUP_FEEDS.items():
+            archived = get_archive().query(ARCHIVE_FEEDS[feed], start, airlines=[airline], columns=ROLLUP_COLUMNS[feed])
+            rollups.apply(airline, source, archived, backfill=True)
+    return rollups
+
+def rollup_snapshot(snapshot: Snapshot):
+    """Fold a published flight or seat snapshot into the rollups; maintenance snapshots give aircraft types"""
+    airline, feed = split_feed_key(snapshot.provider)
+    if airline not in AIRLINES:
+        return
+    if feed == 'maintenance':
+        get_rollup_store().set_aircraft_types(snapshot.data)
+    elif feed in ROLLUP_FEEDS:
+        get_rollup_store().apply(airline, ROLLUP_FEEDS[feed], snapshot.data, snapshot.fetched_at)
+
+# ============================================================================
+# SPATIAL INDEX
+# ============================================================================
+
+# OpenSky reports velocity in m/s
+KNOTS_PER_MS = 1.943844
+
+@st.cache_resource
+def get_position_indexes() -> Dict[str, PositionIndex]:
+    """Process-wide aircraft position index per airline, plus one over every tracked aircraft"""
+    return {code: PositionIndex(cell_degrees=POSITION_GRID_DEGREES) for code in [*list_airlines(), ALL_AIRLINES]}
+
+def index_positions(snapshot: Snapshot):
+    """Re-index an airline's aircraft when its OpenSky snapshot changes"""
+    airline, feed = split_feed_key(snapshot.provider)
+    frame = snapshot.data
+    if feed != 'opensky' or (airline not in AIRLINES and airline != ALL_AIRLINES) or 'Latitude' not in frame:
+        return
+    speed = frame['Velocity'] * KNOTS_PER_MS if 'Velocity' in frame else frame['Speed']
+    get_position_indexes()[airline].update(
+        frame.assign(**{'Ground Speed (kt)': speed}),
+        id_column='ICAO' if 'ICAO' in frame else 'Aircraft ID', version=snapshot.version,
+    )
+
+def position_index(airline: str = None) -> PositionIndex:
+    """An airline's position index, caught up with its latest OpenSky snapshot"""
+    snapshot = load_snapshot('opensky', airline)
+    index = get_position_indexes()[split_feed_key(snapshot.provider)[0]]
+    # Restored snapshots never reach listeners, so the first reader indexes them
+    if index.version is None or index.version < snapshot.version:
+        index_positions(snapshot)
+    return index
+
+# ============================================================================
+# FLIGHT STATE RECONCILIATION
+# ============================================================================
+
+@st.cache_resource
+def get_flight_state_tables() -> Dict[str, FlightStateTable]:
+    """Process-wide reconciled FlightRadar24 + OpenSky flight states per airline"""
+    expiry = timedelta(minutes=FLIGHT_STATE_EXPIRY_MINUTES)
+    return {
+        code: FlightStateTable({AIRLINES[code].iata_code: AIRLINES[code].callsign_prefixes[0]}, expire_after=expiry)
+        for code in list_airlines()
+    }
+
+def merge_flight_snapshot(airline: str, feed: str, snapshot: Snapshot):
+    """Apply a position feed snapshot to an airline's flight states and diff the result"""
+    table = get_flight_state_tables()[airline]
+    if table.apply(feed, snapshot.data, snapshot.fetched_at, snapshot.version):
+        get_event_log().observe(airline, 'flights', table.frame(), snapshot.fetched_at)
+
+def reconcile_snapshot(snapshot: Snapshot):
+    """Merge a published FlightRadar24 or OpenSky snapshot into its airline's flight states"""
+    airline, feed = split_feed_key(snapshot.provider)
+    if feed in NORMALIZERS and airline in AIRLINES:
+        merge_flight_snapshot(airline, feed, snapshot)
+
+def load_flight_states(airline: str = None) -> pd.DataFrame:
+    """One row per flight of an airline (the selected one by default), merged from every position feed"""
+    airline = airline or current_airline()
+    table = get_flight_state_tables()[airline]
+    # Restored snapshots never reach listeners, so the first reader merges them
+    for feed in NORMALIZERS:
+        snapshot = load_snapshot(feed, airline)
+        if snapshot.version > table.versions.get(feed, 0):
+            merge_flight_snapshot(airline, feed, snapshot)
+    return table.frame()
+
+# ============================================================================
+# CHANGE EVENTS
+# ============================================================================
+
+# Event stream -> how its consecutive frames are diffed
+DIFF_RULES = {
+    'flights': DiffRule(
+        key='Callsign', fields={'Status': 'status_change', 'Phase': 'phase_change', 'To': 'diverted'},
+        added='new_flight', derive=lambda frame: with_flight_route(with_flight_phase(frame)),
+        classify=classify_flight_changes,
+    ),
+    'seats': DiffRule(key='Flight', fields={'Sold': 'seat_delta', 'Status': 'status_change'}, added='new_flight'),
+    'maintenance': DiffRule(
+        key='Aircraft', fields={'Status': 'status_change', 'Critical Issues': 'critical_issues_change'},
+        added='new_work_order',
+    ),
+    'safety_alerts': DiffRule(key='Issue', fields={'Status': 'status_change', 'Severity': 'severity_change'}, added='new_alert'),
+}
+
+# Feed -> event stream its snapshots are diffed into; flights are diffed after reconciliation
+EVENT_FEEDS = {'seats': 'seats', 'maintenance': 'maintenance', 'safety_alerts': 'safety_alerts'}
+
+# Events worth interrupting the user for
+NOTIFY_EVENTS = {
+    'new_alert': "🛡️ New safety alert",
+    'delayed': "⏱️ Flight delayed",
+    'diverted': "↪️ Flight diverted",
+    'critical_issues_change': "🔧 Critical issues changed",
+}
+
+@st.cache_resource
+def get_event_log() -> EventLog:
+    """Process-wide log of changes between consecutive snapshots"""
+    return EventLog(DIFF_RULES)
+
+@st.cache_resource
+def get_event_stream() -> EventBroadcaster:
+    """Process-wide SSE push stream of the event log; one replica per port serves it"""
+    broadcaster = EventBroadcaster(get_event_log(), EVENT_STREAM_MAX_PENDING, EVENT_STREAM_MAX_CLIENTS)
+    try:
+        serve_events(broadcaster, EVENT_STREAM_HOST, EVENT_STREAM_PORT, EVENT_STREAM_HEARTBEAT_SECONDS)
+    except OSError as e:
+        logger.warning("Event stream not served on port %d: %s", EVENT_STREAM_PORT, e)
+    return broadcaster
+
+def diff_snapshot(snapshot: Snapshot):
+    """Diff a published seat, maintenance or safety snapshot against the previous one"""
+    airline, feed = split_feed_key(snapshot.provider)
+    stream = EVENT_FEEDS.get(feed)
+    if stream is not None and airline in AIRLINES:
+        get_event_log().observe(airline, stream, snapshot.data, snapshot.fetched_at, snapshot.version)
+
+def notify_new_events():
+    """Toast the events of the selected airline this session has not been shown yet"""
+    log = get_event_log()
+    if 'event_cursor' not in st.session_state:
+        # A new session starts from now rather than replaying the backlog
+        st.session_state.event_cursor = log.last_seq
+        return
+    events = log.since(st.session_state.event_cursor, airline=current_airline())
+    if len(events):
+        st.session_state.event_cursor = int(events['Seq'].iloc[-1])
+    for _, event in events[events['Event'].isin(list(NOTIFY_EVENTS))].tail(3).iterrows():
+        st.toast(f"{NOTIFY_EVENTS[event['Event']]}: {event['Key']}")
+
+# ============================================================================
+# LIVE KPIs
+# ============================================================================
+
+# Feed -> KPI stream its snapshots are folded into
+KPI_FEEDS = {'flightradar': 'flights', 'seats': 'seats', 'maintenance': 'maintenance', 'flight_safety': 'safety'}
+
+@st.cache_resource
+def get_kpi_board() -> KpiBoard:
+    """Process-wide running KPIs of every airline"""
+    return KpiBoard({code: airline.fleet_size for code, airline in AIRLINES.items()})
+
+def aggregate_kpis(snapshot: Snapshot):
+    """Fold a published flight, seat, maintenance or flight safety snapshot into the running KPIs"""
+    airline, feed = split_feed_key(snapshot.provider)
+    stream = KPI_FEEDS.get(feed)
+    if stream is not None and airline in AIRLINES:
+        get_kpi_board().apply(airline, stream, snapshot.data, snapshot.fetched_at, snapshot.version)
+
+def load_kpis(airline: str = None) -> Dict[str, Kpi]:
+    """Running KPIs of an airline (the selected one by default)"""
+    airline = airline or current_airline()
+    # Before the first poll lands, publish each KPI feed once so it gets folded in
+    for feed in KPI_FEEDS:
+        load_snapshot(feed, airline)
+    return get_kpi_board().read(airline)
+
+def format_count(value: float, signed: bool = False) -> str:
+    return f"{value:+,.0f}" if signed else f"{value:,.0f}"
+
+def format_percent(value: float, signed: bool = False) -> str:
+    return f"{value:+.1f}%" if signed else f"{value:.1f}%"
+
+def format_money(value: float, signed: bool = False, thousands: bool = False) -> str:
+    amount = f"${abs(value) / 1000:,.0f}K" if thousands else f"${abs(value):,.0f}"
+    sign = '-' if value < 0 else ('+' if signed else '')
+    return sign + amount
+
+def kpi_metric(label: str, kpi: Kpi, fmt: Callable[..., str], delta_suffix: str = ""):
+    """st.metric of a KPI with its change since yesterday; '—' until its feed has data"""
+    value = fmt(kpi.value) if kpi.value is not None else "—"
+    delta = f"{fmt(kpi.delta, signed=True)}{delta_suffix}" if kpi.delta is not None else None
+    st.metric(label, value, delta)
+
+# ============================================================================
+# CHART CACHE
+# ============================================================================
+
+@st.cache_resource
+def get_figure_cache() -> FigureCache:
+    """Process-wide cache of built charts, shared by every session"""
+    return FigureCache(FIGURE_CACHE_ENTRIES, int(FIGURE_CACHE_MB * 1024 * 1024))
+
+def cached_chart(page: str, chart: str, version, build: Callable[[], go.Figure], **params):
+    """Draw a chart, reusing the figure already built for this data version and these parameters"""
+    cache = get_figure_cache()
+    st.plotly_chart(cache.get(cache.key(page, chart, version, params), build), use_container_width=True)
+
+def chart_window(start: datetime, end: Optional[datetime], freq: str) -> Tuple[str, str]:
+    """A chart's [start, end), clipped to now and widened to whole buckets, to key it on the buckets it shows"""
+    end = min(end, datetime.now()) if end is not None else datetime.now()
+    return pd.Timestamp(start).floor(freq).isoformat(), pd.Timestamp(end).ceil(freq).isoformat()
+
+def date_range_input(label: str, days: int = 30, key: str = None) -> Tuple[datetime, datetime]:
+    """Date range selector returning [start, end) datetimes"""
+    today = datetime.now().date()
+    picked = st.date_input(label, value=(today - timedelta(days=days), today), max_value=today, key=key)
+    start, end = picked if len(picked) == 2 else (picked[0], picked[0])
+    return datetime.combine(start, datetime.min.time()), datetime.combine(end + timedelta(days=1), datetime.min.time())
+
+def current_airline() -> str:
+    """Airline picked in the sidebar switcher"""
+    return st.session_state.get('airline', DEFAULT_AIRLINE)
+
+def load_snapshot(name: str, airline: str = None) -> Snapshot:
+    """Latest snapshot of a feed for an airline (the selected one by default).
+    
+    Before the first poll lands, fetch once through the cache; an airline's share of a
+    shared feed is split from the shared snapshot. Followers never fetch: they wait for
+    the leader's snapshot instead.
+    """
+    airline = airline or current_airline()
+    store = get_snapshot_store()
+    key = feed_key(airline, name)
+    snapshot = store.latest(key)
+    if snapshot is not None:
+        return snapshot
+    if is_follower():
+        return follower_snapshot(name, airline)
+    
+    if name in SHARED_FEED_SOURCES and airline != ALL_AIRLINES:
+        shared = load_snapshot(name, ALL_AIRLINES)
+        data = split_shared_frame(name, shared.data, get_airline_config(airline))
+        return store.latest(key) or store.publish(key, data, fetched_at=shared.fetched_at)
+    
+    try:
+        data = get_provider_cache().get(name, feed_fetcher(name, airline), key=airline)
+    except CallSkipped:
+        data = feed_fetcher(name, airline, offline=True)()
+    except ProviderRateLimitedError as e:
+        # Nothing cached yet to fall back on; stand-in data until the poller's next live fetch
+        logger.warning("%s: %s", key, e)
+        store.restore(Snapshot(key, 0, datetime.now(), feed_fetcher(name, airline, offline=True)()))
+        return store.latest(key)
+    return store.publish(key, data)
+
+def follower_snapshot(name: str, airline: str) -> Snapshot:
+    """The leader's snapshot of a feed, asking it to poll the feed now if it has none yet"""
+    store, shared = get_snapshot_store(), get_shared_snapshots()
+    key = feed_key(airline, name)
+    snapshot = shared.read(key)
+    if snapshot is None:
+        # An airline's share of a shared feed is split from the feed the leader polls
+        source = feed_key(ALL_AIRLINES, name) if name in SHARED_FEED_SOURCES else key
+        shared.request_poll(source, session_id(), now=True)
+        snapshot = store.wait_for(key, timeout=SHARED_SNAPSHOT_WAIT_SECONDS) or shared.read(key)
+    if snapshot is not None:
+        store.adopt(snapshot)
+        return store.latest(key)
+    # Demo data, kept as a restored version 0 so the leader's first snapshot replaces it
+    store.restore(Snapshot(key, 0, datetime.now(), feed_fetcher(name, airline, offline=True)()))
+    return store.latest(key)
+
+def load_flights() -> pd.DataFrame:
+    """FlightRadar24 flights of the selected airline"""
+    return load_snapshot('flightradar').data
+
+def load_aircraft() -> pd.DataFrame:
+    """OpenSky aircraft of the selected airline"""
+    return load_snapshot('opensky').data
+
+def load_weather() -> pd.DataFrame:
+    """Weather at the selected airline's hub airports"""
+    return load_snapshot('weather').data
+
+def session_id() -> str:
+    """Stable id for this browser session"""
+    if 'session_id' not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
 
 # ============================================================================
 # EXPORT FUNCTIONS
 # ============================================================================
 
 class ExportManager:
-    """Export data to CSV format"""
+    """Export data to CSV, Excel, Parquet and Arrow IPC"""
     
     @staticmethod
     def export_to_csv(flights_df: pd.DataFrame) -> str:
@@ -370,6 +1136,95 @@ class ExportManager:
     def export_maintenance_to_csv(maint_df: pd.DataFrame) -> str:
         """Export maintenance to CSV"""
         return maint_df.to_csv(index=False)
+    
+    @staticmethod
+    def export_to_excel(df: pd.DataFrame) -> bytes:
+        """Export any table to an Excel workbook"""
+        excel_data = io.BytesIO()
+        df.to_excel(excel_data, index=False)
+        return excel_data.getvalue()
+    
+    @staticmethod
+    def export_history(airline: str, series: str, fmt: str, start: datetime = None) -> ExportStats:
+        """Stream an airline's history series to a file in batches of EXPORT_BATCH_ROWS rows"""
+        extension = STREAM_FORMATS[fmt][0]
+        batches = history_batches(airline, series, start)
+        return stream_export(batches, Path(EXPORT_DIR) / f"{airline.lower()}_{series}_history.{extension}", fmt)
+
+def history_batches(airline: str, series: str, start: datetime = None) -> Iterator[pd.DataFrame]:
+    """History rows since start, oldest first: scanned from the archive, then the recent window held in memory"""
+    store = get_history_store()
+    key = feed_key(airline, series)
+    schema = HISTORY_SCHEMAS[series]
+    oldest = store.series[key].oldest
+    recent = max(oldest, datetime.now() - store.retention) if oldest is not None else None
+    archive = get_archive()
+    if archive.available:
+        # Archived rows take the in-memory types so every batch shares one file schema
+        columns, floats = ['Time', *schema], {name: float for name, dtype in schema.items() if dtype == 'f8'}
+        for batch in archive.iter_batches(series, start, recent, [airline], columns, EXPORT_BATCH_ROWS):
+            yield batch.reindex(columns=columns).astype(floats)
+        start = max(start, recent) if start is not None and recent is not None else recent or start
+    yield from store.iter_batches(key, start, batch_rows=EXPORT_BATCH_ROWS)
+
+# Export format -> how a table is serialized, and its MIME type
+EXPORT_FORMATS = {
+    'csv': (ExportManager.export_to_csv, "text/csv"),
+    'xlsx': (ExportManager.export_to_excel, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+@st.cache_resource
+def get_export_cache() -> ExportCache:
+    """Process-wide cache of serialized export files, shared by every session"""
+    return ExportCache(EXPORT_CACHE_ENTRIES, int(EXPORT_CACHE_MB * 1024 * 1024))
+
+def export_button(label: str, dataset: str, version, df: pd.DataFrame, fmt: str = 'csv'):
+    """Download button that serializes the table only when clicked, reusing files of unchanged data"""
+    serialize, mime = EXPORT_FORMATS[fmt]
+    cache = get_export_cache()
+    key = (current_airline(), dataset, version, fmt)
+    st.download_button(
+        label=label,
+        # Runs on a separate thread at click time, so it must not touch session state
+        data=lambda: cache.get(key, lambda: serialize(df)),
+        file_name=f"{current_airline().lower()}_{dataset}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{fmt}",
+        mime=mime,
+        on_click="ignore",
+    )
+
+@st.cache_resource
+def get_report_queue() -> ReportQueue:
+    """Process-wide queue of background report jobs"""
+    return ReportQueue(ARCHIVE_DIR, REPORT_DIR, workers=REPORT_WORKERS,
+                       retention=timedelta(days=REPORT_RETENTION_DAYS), max_files=REPORT_MAX_FILES)
+
+def report_extras(airlines: List[str]) -> Dict[str, pd.DataFrame]:
+    """Current weather and safety alerts of the airlines; these feeds are not archived"""
+    return {
+        name: pd.concat([load_snapshot(name, code).data.assign(airline=code) for code in airlines], ignore_index=True)
+        for name in ('weather', 'safety_alerts')
+    }
+
+def report_jobs():
+    """Progress of report jobs, with downloads once finished"""
+    for job in get_report_queue().jobs():
+        spec = job.spec
+        title = f"{', '.join(spec.airlines)} · {spec.start:%Y-%m-%d} to {spec.end - timedelta(days=1):%Y-%m-%d}"
+        if job.state == 'failed':
+            st.error(f"{title}: {job.error}")
+            continue
+        st.progress(job.progress, text=f"{title} · {job.message}")
+        if job.state == 'done':
+            cols = st.columns(len(job.files) or 1)
+            for col, (fmt, path) in zip(cols, job.files.items()):
+                with col:
+                    st.download_button(
+                        label=f"📄 {fmt.upper()}",
+                        data=lambda path=path: Path(path).read_bytes(),
+                        file_name=f"ops_report_{'_'.join(spec.airlines).lower()}_{spec.start:%Y%m%d}.{fmt}",
+                        key=f"report_{job.key}_{fmt}",
+                        on_click="ignore",
+                    )
 
 # ============================================================================
 # AUTHENTICATION UI
@@ -439,8 +1294,21 @@ def main_app():
         user_email = UserAuth().get_current_user()
         st.write(f"**User:** {user_email}")
         
+        airlines = list_airlines()
+        # Switching only changes which airline's cached snapshots are read; every airline is always polled
+        st.selectbox("Airline", airlines, index=airlines.index(DEFAULT_AIRLINE), key='airline',
+                     format_func=lambda code: AIRLINES[code].airline_name)
+        
         st.markdown("---")
         
+        feeds = [feed_key(current_airline(), name) for name in [*FEED_SOURCES, *SHARED_FEED_SOURCES]]
+        restored = [s for s in map(get_snapshot_store().latest, feeds) if s is not None and s.restored]
+        if restored:
+            oldest = max(s.age_seconds for s in restored)
+            st.warning(f"⏳ Showing saved data (up to {oldest / 60:.0f} min old) until live feeds refresh")
+        
+        notify_new_events()
+        
         page = st.radio("Navigation", [
             "📊 Dashboard",
             "✈️ Real-Time Flights",
@@ -481,22 +1349,28 @@ def main_app():
 
 def page_dashboard():
     """Dashboard with KPIs"""
-    st.header("📊 PIA Operations Dashboard")
+    st.header(f"📊 {AIRLINES[current_airline()].airline_name} Operations Dashboard")
     st.subheader(f"Real-Time Status - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
     
     # KPIs
+    kpis = load_kpis()
+    fleet_size = AIRLINES[current_airline()].fleet_size
     col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
-        st.metric("Active Flights", "24", "+5 vs yesterday")
+        kpi_metric("Active Flights", kpis[ACTIVE_FLIGHTS], format_count, " vs yesterday")
     with col2:
-        st.metric("On-Time %", "87.3%", "+2.1%")
+        kpi_metric("On-Time %", kpis[ON_TIME], format_percent)
     with col3:
-        st.metric("Avg Load Factor", "88.5%", "+3.2%")
+        kpi_metric("Avg Load Factor", kpis[LOAD_FACTOR], format_percent)
     with col4:
-        st.metric("Daily Revenue", "$127K", "+$15K")
+        kpi_metric("Daily Revenue", kpis[REVENUE], partial(format_money, thousands=True))
     with col5:
-        st.metric("Fleet Status", "28/28", "100% Available")
+        available = kpis[AIRCRAFT_AVAILABLE].value
+        if available is None:
+            st.metric("Fleet Status", "—")
+        else:
+            st.metric("Fleet Status", f"{available:.0f}/{fleet_size}", f"{available / fleet_size:.0%} Available")
     
     st.markdown("---")
     
@@ -504,14 +1378,21 @@ def page_dashboard():
     
     with col1:
         st.subheader("Real-Time Flights")
-        flights_df = FlightRadarAPI.get_pia_flights()
-        st.dataframe(flights_df[['Flight', 'From', 'To', 'Status', 'Passengers']], use_container_width=True, hide_index=True)
+        flights_df = load_flight_states()
+        st.dataframe(flights_df[['Callsign', 'Flight', 'From', 'To', 'Status', 'Passengers']], use_container_width=True, hide_index=True)
     
     with col2:
         st.subheader("Seat Sales Today")
-        seats_df = SeatAvailabilityAPI.get_realtime_seats()
-        st.metric("Total Passengers Today", "1,847", "+245 vs yesterday")
-        st.metric("Revenue Generated", "$237,520", "+$35,280")
+        kpi_metric("Total Passengers Today", kpis[PASSENGERS], format_count, " vs yesterday")
+        kpi_metric("Revenue Generated", kpis[REVENUE], format_money)
+    
+    st.subheader("🔔 Recent Changes")
+    events_df = get_event_log().since(0, airline=current_airline()).tail(20).iloc[::-1]
+    if events_df.empty:
+        st.caption("No changes between snapshots yet.")
+    else:
+        st.dataframe(events_df[['Time', 'Stream', 'Key', 'Event', 'Old', 'New', 'Delta']].astype({'Old': 'string', 'New': 'string'}),
+                     use_container_width=True, hide_index=True)
 
 def page_flights():
     """Real-time flights with real API data"""
@@ -519,49 +1400,201 @@ def page_flights():
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        data_source = st.selectbox("Data Source", ["FlightRadar24 API", "OpenSky Network", "Demo Data"])
+        data_source = st.selectbox("Data Source", list(DATA_SOURCE_FEEDS))
     with col2:
-        refresh_rate = st.selectbox("Refresh Rate", ["Manual", "Every 10s", "Every 30s"])
+        refresh_rate = st.selectbox("Refresh Rate", list(REFRESH_RATES))
     with col3:
-        if st.button("🔄 Refresh Now"):
-            st.rerun()
+        refresh_now = st.button("🔄 Refresh Now")
+    
+    feeds = DATA_SOURCE_FEEDS[data_source]
+    polled = {feed: polled_feed_key(current_airline(), feed) for feed in feeds}
+    poller = get_feed_poller()
+    for feed, key in polled.items():
+        if REFRESH_RATES[refresh_rate]:
+            lease_poll_interval(key, REFRESH_RATES[refresh_rate])
+        else:
+            release_poll_interval(key)
+    if refresh_now:
+        # Wait briefly for the forced polls so this run shows fresh data
+        versions = {}
+        for feed, key in polled.items():
+            load_snapshot(feed)
+            versions[key] = get_snapshot_store().latest(key).version
+            poll_feed_now(key, REFRESH_RATES[refresh_rate])
+        # Followers see the leader's poll once they adopt it
+        for key, version in versions.items():
+            get_snapshot_store().wait_for(key, after_version=version, timeout=5)
     
     st.markdown("---")
     
-    if data_source == "FlightRadar24 API":
+    if data_source == "Unified (FR24 + OpenSky)":
+        st.info("📡 **FlightRadar24 and OpenSky merged into one row per flight**")
+    elif data_source == "FlightRadar24 API":
         st.info("📡 **Pulling live data from FlightRadar24 API...**")
-        flights_df = FlightRadarAPI.get_pia_flights()
     elif data_source == "OpenSky Network":
         st.info("📡 **Pulling live data from OpenSky Network API...**")
-        flights_df = OpenSkyAPI.get_pia_aircraft()
-    else:
-        flights_df = FlightRadarAPI._mock_pia_flights()
+        ingest = OpenSkyAPI.last_ingest
+        if ingest:
+            st.caption(f"Last ingest: {ingest.rows_kept}/{ingest.rows_total} states kept, "
+                       f"{ingest.bytes_received / 1024:.0f} KB received, {ingest.parse_ms:.0f} ms parse, "
+                       f"peak {ingest.peak_bytes / 1024 / 1024:.1f} MB")
+    
+    flights_df, key_column = flights_for_source(data_source)
+    
+    for feed, key in polled.items():
+        snapshot = load_snapshot(feed)
+        st.caption(f"{feed}: snapshot v{snapshot.version} · {snapshot.age_seconds:.0f}s old"
+                   f"{' (saved, awaiting live refresh)' if snapshot.restored else ''} · "
+                   f"polled every {poller.interval_for(key):.0f}s")
     
     st.dataframe(flights_df, use_container_width=True, hide_index=True)
     
+    # The full table above is only redrawn by a full run; live ticks re-run just the fragment below
+    st.session_state.flights_baseline = (data_source, feed_versions(feeds), flights_df)
+    if REFRESH_RATES[refresh_rate] and feeds:
+        st.fragment(run_every=REFRESH_RATES[refresh_rate])(live_flight_updates)(
+            data_source, key_column, REFRESH_RATES[refresh_rate])
+    
+    index = position_index() if data_source == "OpenSky Network" else None
+    if index is not None and len(index):
+        st.subheader("📍 Hub Proximity")
+        col1, col2 = st.columns(2)
+        with col1:
+            hub = HUB_AIRPORTS[st.selectbox("Hub", AIRLINES[current_airline()].hub_airports)]
+        with col2:
+            radius = st.slider("Radius (nm)", min_value=25, max_value=1000, value=250, step=25)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.caption(f"Aircraft within {radius} nm of {hub.code}")
+            nearby = index.within(hub.lat, hub.lon, radius)
+            st.dataframe(nearby, use_container_width=True, hide_index=True)
+        with col2:
+            st.caption(f"Inbound to {hub.code}")
+            inbound = index.inbound(hub.lat, hub.lon, radius, speed_column='Ground Speed (kt)')
+            st.dataframe(inbound, use_container_width=True, hide_index=True,
+                         column_config={'ETA (min)': st.column_config.NumberColumn(format="%.0f")})
+    
+    if 'opensky' in feeds:
+        st.markdown("---")
+        st.subheader("🗺️ Live Map")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            scope = st.radio("Aircraft", ["Selected airline", "All tracked"], horizontal=True, key="map_scope")
+        with col2:
+            center = HUB_AIRPORTS[st.selectbox("Centre on", AIRLINES[current_airline()].hub_airports, key="map_center")]
+        with col3:
+            zoom = st.slider("Zoom", min_value=1, max_value=12, value=4, key="map_zoom")
+        live_map(ALL_AIRLINES if scope == "All tracked" else current_airline(), center, zoom)
+    
     # Export
     col1, col2 = st.columns(2)
     with col1:
-        csv = ExportManager.export_to_csv(flights_df)
-        st.download_button(
-            label="📥 Download as CSV",
-            data=csv,
-            file_name=f"pia_flights_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
+        export_button("📥 Download as CSV", 'flights', (data_source, feed_versions(feeds)), flights_df)
+
+def flights_for_source(data_source: str) -> Tuple[pd.DataFrame, str]:
+    """The flights page table for a data source, and the column that identifies its rows"""
+    if data_source == "Unified (FR24 + OpenSky)":
+        return load_flight_states(), 'Callsign'
+    if data_source == "FlightRadar24 API":
+        flights_df = load_flights()
+        return flights_df, 'Flight' if 'Flight' in flights_df else 'Flight ID'
+    if data_source == "OpenSky Network":
+        flights_df = load_aircraft()
+        index = position_index()
+        if len(index):
+            hubs = [HUB_AIRPORTS[code] for code in AIRLINES[current_airline()].hub_airports]
+            flights_df = index.nearest([h.code for h in hubs], [h.lat for h in hubs], [h.lon for h in hubs])
+        return flights_df, 'ICAO' if 'ICAO' in flights_df else 'Aircraft ID'
+    return FlightRadarAPI._mock_flights(AIRLINES[current_airline()]), 'Flight'
+
+def live_map(airline: str, center: HubAirport, zoom: int):
+    """Tracked aircraft in the map view; individual aircraft when few are visible, grid bins otherwise"""
+    index = position_index(airline)
+    bounds = viewport_bounds(center.lat, center.lon, zoom, height_px=MAP_HEIGHT_PX)
+    frame, binned = index.viewport(*bounds, max_points=MAP_MAX_POINTS)
+    if binned:
+        st.caption(f"{int(frame['Count'].sum()):,} aircraft in view, grouped into {len(frame):,} clusters; zoom in for individual aircraft")
+    else:
+        st.caption(f"{len(frame):,} aircraft in view")
+    cached_chart('flights', 'live_map', (airline, index.version),
+                 lambda: live_map_figure(frame, binned, center, zoom), center=center.code, zoom=zoom)
+
+def live_map_figure(frame: pd.DataFrame, binned: bool, center: HubAirport, zoom: int) -> go.Figure:
+    """WebGL map trace of aircraft, or of position bins sized and coloured by aircraft count"""
+    if binned:
+        trace = go.Scattermap(
+            lat=frame['Latitude'], lon=frame['Longitude'], mode='markers',
+            marker=dict(size=np.clip(6 + 4 * np.log2(frame['Count']), 6, 36), color=frame['Count'],
+                        colorscale='Viridis', showscale=True, colorbar=dict(title='Aircraft')),
+            hovertext=frame['Count'].astype(str) + " aircraft", hoverinfo='text',
+        )
+    else:
+        label = next((c for c in ('Callsign', 'Aircraft ID', 'ICAO') if c in frame), None)
+        trace = go.Scattermap(
+            lat=frame['Latitude'], lon=frame['Longitude'], mode='markers',
+            marker=dict(size=9, color='#006400'),
+            hovertext=frame[label].astype(str) if label else None, hoverinfo='text',
         )
+    fig = go.Figure(trace)
+    fig.update_layout(
+        map=dict(style='open-street-map', center=dict(lat=center.lat, lon=center.lon), zoom=zoom),
+        height=MAP_HEIGHT_PX, margin=dict(l=0, r=0, t=0, b=0),
+    )
+    return fig
+
+def feed_versions(feeds: List[str]) -> Tuple[int, ...]:
+    """Snapshot versions of the selected airline's feeds"""
+    return tuple(load_snapshot(feed).version for feed in feeds)
+
+def changed_rows(baseline: pd.DataFrame, current: pd.DataFrame, key: str) -> pd.DataFrame:
+    """Rows of current that are new or differ from baseline, ignoring per-poll timestamps"""
+    fields = [c for c in current.columns if c != key and c in baseline and c not in VOLATILE_COLUMNS]
+    changes = diff_frames(baseline, current, DiffRule(key=key, fields=dict.fromkeys(fields, 'changed'), added='added'))
+    return current[current[key].isin(changes['Key'])]
+
+def live_flight_updates(data_source: str, key_column: str, seconds: float):
+    """Flights changed since the table was drawn; runs as a fragment on every refresh tick.
+    
+    Work per tick is a version check while nothing changed, and a keyed diff that sends
+    only the changed rows when something did.
+    """
+    # Keep the faster poll leased while only the fragment is re-running
+    for feed in DATA_SOURCE_FEEDS[data_source]:
+        lease_poll_interval(polled_feed_key(current_airline(), feed), seconds)
+    
+    source, baseline_versions, baseline = st.session_state.flights_baseline
+    versions = feed_versions(DATA_SOURCE_FEEDS[data_source])
+    cached = st.session_state.get('live_flight_updates')
+    if cached is None or cached[0] != (source, baseline_versions, versions):
+        changed = baseline.iloc[:0]
+        if versions != baseline_versions:
+            current, _ = flights_for_source(data_source)
+            changed = changed_rows(baseline, current, key_column)
+            if len(changed) > LIVE_REBASE_FRACTION * max(len(baseline), 1):
+                # Most rows changed: redraw the full table instead of a large delta
+                st.rerun()
+        cached = st.session_state.live_flight_updates = ((source, baseline_versions, versions), changed)
+    
+    changed = cached[1]
+    st.caption(f"🟢 Live · checked {datetime.now():%H:%M:%S} · "
+               f"{len(changed)} of {len(baseline)} rows changed since the table was drawn")
+    if len(changed):
+        st.dataframe(changed, use_container_width=True, hide_index=True)
 
 def page_seats():
     """Real-time seat availability"""
     st.header("🛫 Real-Time Seat Sales (Live Numbers)")
     
-    seats_df = SeatAvailabilityAPI.get_realtime_seats()
+    seats = load_snapshot('seats')
+    seats_df = seats.data
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
         total_sold = seats_df['Sold'].sum()
         st.metric("Total Seats Sold Today", total_sold)
     with col2:
-        total_revenue = sum(float(x.replace('$', '').replace(',', '')) for x in seats_df['Revenue Generated'])
+        total_revenue = seats_df['Revenue Generated'].sum()
         st.metric("Total Revenue", f"${total_revenue:,.0f}")
     with col3:
         avg_load = seats_df['Load Factor %'].mean()
@@ -572,39 +1605,30 @@ def page_seats():
     st.markdown("---")
     
     st.subheader("Live Seat Inventory")
-    st.dataframe(seats_df, use_container_width=True, hide_index=True)
+    st.dataframe(seats_df, use_container_width=True, hide_index=True, column_config=DISPLAY_FORMATS)
     
     # Charts
     col1, col2 = st.columns(2)
     
     with col1:
-        fig = px.bar(seats_df, x='Flight', y=['Sold', 'Available'], 
-                    title="Seats Sold vs Available",
-                    barmode='stack')
-        st.plotly_chart(fig, use_container_width=True)
+        cached_chart('seats', 'sold_vs_available', (current_airline(), seats.version),
+                     lambda: px.bar(seats_df, x='Flight', y=['Sold', 'Available'],
+                                    title="Seats Sold vs Available",
+                                    barmode='stack'))
     
     with col2:
-        fig = px.pie(seats_df, values='Sold', names='Flight', 
-                    title="Revenue Distribution by Flight")
-        st.plotly_chart(fig, use_container_width=True)
+        cached_chart('seats', 'sold_by_flight', (current_airline(), seats.version),
+                     lambda: px.pie(seats_df, values='Sold', names='Flight',
+                                    title="Revenue Distribution by Flight"))
     
     # Export
-    excel_data = io.BytesIO()
-    seats_df.to_excel(excel_data, index=False)
-    excel_data.seek(0)
-    
-    st.download_button(
-        label="📥 Download Seat Report (Excel)",
-        data=excel_data.getvalue(),
-        file_name=f"pia_seats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-    )
+    export_button("📥 Download Seat Report (Excel)", 'seats', seats.version, seats_df, fmt='xlsx')
 
 def page_maintenance():
     """Maintenance management"""
     st.header("🔧 Maintenance Management")
     
-    maint_df = MaintenanceSystem.get_maintenance_schedule()
+    maint_df = load_snapshot('maintenance').data
     
     col1, col2, col3, col4 = st.columns(4)
     with col1:
@@ -622,22 +1646,28 @@ def page_maintenance():
     st.markdown("---")
     
     st.subheader("Maintenance Schedule")
-    st.dataframe(maint_df, use_container_width=True, hide_index=True)
+    st.dataframe(maint_df, use_container_width=True, hide_index=True, column_config=DISPLAY_FORMATS)
+    
+    st.subheader("Critical Issues History")
+    start, end = date_range_input("Period", key="maintenance_period")
+    history_df = get_archive().query('maintenance', start, end, airlines=[current_airline()],
+                                     columns=['Time', 'Critical Issues', 'Cost ($)'])
+    if history_df.empty:
+        st.info("No archived maintenance snapshots for this period yet.")
+    else:
+        daily = history_df.groupby(['Time']).sum().resample('D').max().dropna().reset_index()
+        cached_chart('maintenance', 'critical_issues', (current_airline(), load_snapshot('maintenance').version),
+                     lambda: px.line(daily, x='Time', y='Critical Issues', title="Open critical issues (daily peak)", markers=True),
+                     window=chart_window(start, end, 'D'))
     
     # Export
-    csv = maint_df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download Maintenance Report",
-        data=csv,
-        file_name=f"pia_maintenance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
+    export_button("📥 Download Maintenance Report", 'maintenance', load_snapshot('maintenance').version, maint_df)
 
 def page_safety_alerts():
     """Safety alerts"""
     st.header("🛡️ Safety Alerts & Critical Issues")
     
-    safety_df = MaintenanceSystem.get_safety_alerts()
+    safety_df = load_snapshot('safety_alerts').data
     
     # Show critical alerts prominently
     for idx, row in safety_df.iterrows():
@@ -659,13 +1689,13 @@ def page_flight_safety():
     """Flight safety data"""
     st.header("🛂 Flight Safety Metrics")
     
-    safety_df = MaintenanceSystem.get_flight_safety_data()
+    safety_df = load_snapshot('flight_safety').data
     
     col1, col2, col3 = st.columns(3)
     with col1:
-        st.metric("Average Safety Score", "99.5%")
+        kpi_metric("Average Safety Score", load_kpis()[SAFETY_SCORE], format_percent)
     with col2:
-        incidents = safety_df['Incidents'].apply(lambda x: 0 if x == 'None' else 1).sum()
+        incidents = int((safety_df['Incidents'] != 'None').sum())
         st.metric("Incidents Today", incidents)
     with col3:
         complaints = safety_df['Passenger Complaints'].sum()
@@ -673,22 +1703,16 @@ def page_flight_safety():
     
     st.markdown("---")
     
-    st.dataframe(safety_df, use_container_width=True, hide_index=True)
+    st.dataframe(safety_df, use_container_width=True, hide_index=True, column_config=DISPLAY_FORMATS)
     
     # Export
-    csv = safety_df.to_csv(index=False)
-    st.download_button(
-        label="📥 Download Safety Report",
-        data=csv,
-        file_name=f"pia_flight_safety_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-        mime="text/csv"
-    )
+    export_button("📥 Download Safety Report", 'flight_safety', load_snapshot('flight_safety').version, safety_df)
 
 def page_weather():
     """Weather data"""
-    st.header("🌤️ Weather at PIA Hub Airports")
+    st.header(f"🌤️ Weather at {AIRLINES[current_airline()].airline_name} Hub Airports")
     
-    weather_df = WeatherAPI.get_pia_airport_weather()
+    weather_df = load_weather()
     
     # Weather cards
     for idx, row in weather_df.iterrows():
@@ -710,24 +1734,49 @@ def page_analytics():
     st.header("📊 Operations Analytics")
     
     # Real-time data
-    flights_df = FlightRadarAPI.get_pia_flights()
-    seats_df = SeatAvailabilityAPI.get_realtime_seats()
+    flights_df = load_flights()
+    seats = load_snapshot('seats')
+    rollups = get_rollup_store()
     
     col1, col2 = st.columns(2)
     
     with col1:
         st.subheader("Load Factor Trend")
-        fig = px.line(seats_df, x='Flight', y='Load Factor %', 
-                     title="Load Factor by Flight",
-                     markers=True)
-        st.plotly_chart(fig, use_container_width=True)
+        window = chart_window(datetime.now() - timedelta(hours=ROLLUP_LATE_WINDOW_HOURS), None, 'h')
+        trend_df = rollups.query('hour', current_airline(), start=pd.Timestamp(window[0]), by=['Bucket', 'Route'])
+        cached_chart('analytics', 'load_factor_trend', (current_airline(), rollups.version),
+                     lambda: px.line(trend_df, x='Bucket', y='Load Factor %', color='Route',
+                                     title=f"Hourly load factor by route, last {ROLLUP_LATE_WINDOW_HOURS:.0f}h",
+                                     labels={'Bucket': 'Hour'}, markers=True),
+                     window=window)
     
     with col2:
         st.subheader("Revenue by Flight")
-        revenue_values = [float(x.replace('$', '').replace(',', '')) for x in seats_df['Revenue Generated']]
-        fig = px.bar(seats_df, x='Flight', y=[revenue_values[i] for i in range(len(seats_df))],
-                    title="Revenue Generated per Flight")
-        st.plotly_chart(fig, use_container_width=True)
+        cached_chart('analytics', 'revenue_by_flight', (current_airline(), seats.version),
+                     lambda: px.bar(seats.data, x='Flight', y='Revenue Generated',
+                                    title="Revenue Generated per Flight"))
+    
+    st.markdown("---")
+    st.subheader("Load Factor by Route")
+    start, end = date_range_input("Period", key="analytics_period")
+    route_df = rollups.query('day', current_airline(), start, end, by=['Route']).dropna(subset=['Load Factor %'])
+    if route_df.empty:
+        st.info("No seat sales rolled up for this period yet.")
+    else:
+        cached_chart('analytics', 'load_factor_by_route', (current_airline(), rollups.version),
+                     lambda: px.bar(route_df, x='Route', y='Load Factor %',
+                                    title=f"Load factor, {start:%Y-%m-%d} to {end - timedelta(days=1):%Y-%m-%d}"),
+                     window=chart_window(start, end, 'D'))
+    
+    st.subheader("Revenue by Aircraft Type")
+    type_df = rollups.query('day', current_airline(), start, end, by=['Bucket', 'Aircraft Type']).dropna(subset=['Revenue'])
+    if type_df.empty:
+        st.info("No seat sales rolled up for this period yet.")
+    else:
+        cached_chart('analytics', 'revenue_by_aircraft_type', (current_airline(), rollups.version),
+                     lambda: px.bar(type_df, x='Bucket', y='Revenue', color='Aircraft Type',
+                                    title="Revenue per day by aircraft type", labels={'Bucket': 'Day'}),
+                     window=chart_window(start, end, 'D'))
 
 def page_settings():
     """Settings"""
@@ -738,35 +1787,111 @@ def page_settings():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        flights_df = FlightRadarAPI.get_pia_flights()
-        csv = ExportManager.export_to_csv(flights_df)
-        st.download_button(
-            label="✈️ Flights (CSV)",
-            data=csv,
-            file_name=f"pia_flights_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        flights = load_snapshot('flightradar')
+        export_button("✈️ Flights (CSV)", 'flights', ("FlightRadar24 API", (flights.version,)), flights.data)
     
     with col2:
-        seats_df = SeatAvailabilityAPI.get_realtime_seats()
-        csv = ExportManager.export_seats_to_csv(seats_df)
-        st.download_button(
-            label="🛫 Seats (CSV)",
-            data=csv,
-            file_name=f"pia_seats_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
-        )
+        seats = load_snapshot('seats')
+        export_button("🛫 Seats (CSV)", 'seats', seats.version, seats.data)
+    
+    with col3:
+        maintenance = load_snapshot('maintenance')
+        export_button("🔧 Maintenance (CSV)", 'maintenance', maintenance.version, maintenance.data)
     
+    st.markdown("#### 🗄️ History Export")
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        series = st.selectbox("Series", list(HISTORY_SCHEMAS), key="history_series")
+    with col2:
+        fmt = st.selectbox("Format", list(STREAM_FORMATS), key="history_format",
+                           format_func=lambda fmt: {'csv': "CSV", 'parquet': "Parquet", 'arrow': "Arrow IPC"}[fmt])
     with col3:
-        maint_df = MaintenanceSystem.get_maintenance_schedule()
-        csv = ExportManager.export_maintenance_to_csv(maint_df)
+        st.write("")
+        if st.button("Write history file"):
+            try:
+                st.session_state.history_export = ExportManager.export_history(current_airline(), series, fmt)
+            except Exception as e:
+                st.error(f"History export failed: {e}")
+    
+    stats = st.session_state.get('history_export')
+    if stats is not None and Path(stats.path).exists():
+        st.caption(f"{Path(stats.path).name}: {stats.rows:,} rows, {stats.bytes / 1024 / 1024:.1f} MB in "
+                   f"{stats.seconds:.2f}s · {stats.rows_per_second:,.0f} rows/s · {stats.mb_per_second:.1f} MB/s")
         st.download_button(
-            label="🔧 Maintenance (CSV)",
-            data=csv,
-            file_name=f"pia_maintenance_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
-            mime="text/csv"
+            label=f"📦 {Path(stats.path).name}",
+            data=lambda path=stats.path: Path(path).read_bytes(),
+            file_name=Path(stats.path).name,
+            mime=next(mime for ext, mime, _ in STREAM_FORMATS.values() if stats.path.endswith(f".{ext}")),
+            on_click="ignore",
         )
     
+    st.markdown("---")
+    st.subheader("📑 Reports")
+    st.caption("Multi-sheet Excel and PDF reports of flights, seats, maintenance, safety and weather, "
+               "built in the background from the archive")
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        start, end = date_range_input("Report period", key="report_period")
+    with col2:
+        airlines = st.multiselect("Airlines", list_airlines(), default=[current_airline()],
+                                  format_func=lambda code: AIRLINES[code].airline_name, key="report_airlines")
+    with col3:
+        formats = st.multiselect("Formats", list(REPORT_FORMATS), default=list(REPORT_FORMATS), key="report_formats")
+    
+    if st.button("Generate report", disabled=not airlines or not formats):
+        spec = ReportSpec(tuple(sorted(airlines)), start.date(), end.date(), tuple(f for f in REPORT_FORMATS if f in formats))
+        get_report_queue().submit(spec, report_extras(airlines))
+    
+    queue = get_report_queue()
+    running = any(job.state in ('queued', 'running') for job in queue.jobs())
+    st.fragment(run_every=2 if running else None)(report_jobs)()
+    
+    st.markdown("---")
+    st.subheader("🩺 Data Feed Health")
+    
+    feeds = get_feed_poller().status()
+    breakers = get_http_client().status()
+    budgets = get_http_client().scheduler.status()
+    rows = []
+    for name, feed in feeds.items():
+        # Circuit breakers and request budgets are per upstream provider, shared by all airlines
+        airline, provider = split_feed_key(name)
+        breaker, budget = breakers.get(provider, {}), budgets.get(provider, {})
+        rows.append({
+            'Airline': airline,
+            'Feed': provider,
+            'Snapshot Version': feed['version'],
+            'Poll Interval (s)': feed['interval'],
+            'Last Polled': feed['last_polled'],
+            'Circuit': breaker.get('state', 'n/a'),
+            'Consecutive Failures': breaker.get('consecutive_failures', 0),
+            'Total Failures': breaker.get('total_failures', 0),
+            'Skipped Calls': breaker.get('short_circuited', 0),
+            'Coalesced': budget.get('coalesced', 0),
+            'Shed': budget.get('shed', 0),
+            'Tokens Left': budget.get('tokens'),
+            'Last Error': breaker.get('last_error') or feed['last_error'],
+        })
+    health_df = pd.DataFrame(rows)
+    st.dataframe(health_df, use_container_width=True, hide_index=True)
+    
+    figures = get_figure_cache().stats()
+    st.caption(f"📈 Chart cache: {figures['entries']} figures, {figures['bytes'] / 1024 / 1024:.1f} MB · "
+               f"{figures['hits']} hits / {figures['misses']} misses ({figures['hit_rate']:.0%}) · "
+               f"{figures['evictions']} evicted")
+    exports = get_export_cache().stats()
+    st.caption(f"📥 Export cache: {exports['entries']} files, {exports['bytes'] / 1024 / 1024:.1f} MB · "
+               f"{exports['hits']} hits / {exports['misses']} misses · {exports['evictions']} evicted")
+    shared = get_shared_snapshots()
+    if shared is not None:
+        mapped = shared.stats()
+        st.caption(f"🧩 Shared snapshots: this worker is the {mapped['role']} (pid {os.getpid()}) · "
+                   f"{mapped['feeds']} feeds, {mapped['bytes'] / 1024 / 1024:.1f} MB in {SHARED_SNAPSHOT_DIR}")
+    stream = get_event_stream().stats()
+    st.caption(f"📡 Event stream (port {EVENT_STREAM_PORT}): {stream['clients']} clients · "
+               f"{stream['published']} events pushed · {stream['dropped']} dropped for slow clients")
+    
     st.markdown("---")
     st.subheader("About PIA Operations Pro")
     st.markdown("""
@@ -783,7 +1908,7 @@ def page_settings():
     - ✅ Flight safety metrics
     - ✅ Live seat availability
     - ✅ User authentication
-    - ✅ Export to CSV
+    - ✅ Export to CSV, Excel, Parquet, Arrow and PDF reports
     - ✅ Real-time analytics
     """)
 
@@ -792,6 +1917,8 @@ def page_settings():
 # ============================================================================
 
 def main():
+    get_feed_poller()
+    get_event_stream()
     auth = UserAuth()
     
     if not auth.is_logged_in():
@@ -0,0 +1,158 @@
+"""
+On-disk Parquet archive of feed snapshots for long-range analytics.
+
+Snapshots are written as small Parquet files under
+    <root>/<dataset>/date=YYYY-MM-DD/airline=<code>/part-*.parquet
+and periodically compacted into larger files. Queries prune partitions by
+date and airline, push the time predicate down to the Parquet reader and
+read only the requested columns. Long ranges can be scanned in bounded
+record batches instead of being read into one frame.
+
+pyarrow is optional; without it the archive reports itself unavailable.
+"""
+
+import logging
+import os
+import threading
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = ds = pq = None
+
+logger = logging.getLogger(__name__)
+
+class SnapshotArchive:
+    """Date/airline-partitioned Parquet files with compaction and pruned queries"""
+    
+    def __init__(self, root: str, compact_after: int = 50):
+        self.root = Path(root)
+        self.compact_after = compact_after
+        self._lock = threading.Lock()
+        self._last_date: Dict[str, date] = {}
+    
+    @property
+    def available(self) -> bool:
+        return pa is not None
+    
+    def _partition(self, dataset: str, day: date, airline: str) -> Path:
+        return self.root / dataset / f"date={day.isoformat()}" / f"airline={airline}"
+    
+    def write(self, dataset: str, airline: str, when: datetime, frame: pd.DataFrame):
+        """Append one snapshot to its date/airline partition"""
+        if not self.available or frame.empty:
+            return
+        partition = self._partition(dataset, when.date(), airline)
+        partition.mkdir(parents=True, exist_ok=True)
+        
+        # Store categoricals as plain values so every file in a dataset shares one schema
+        categoricals = {c: frame[c].cat.categories.dtype for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)}
+        frame = frame.astype(categoricals).assign(Time=pd.Timestamp(when))
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        name = f"part-{when:%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet"
+        tmp = partition / f".{name}.tmp"
+        pq.write_table(table, tmp)
+        os.replace(tmp, partition / name)
+        
+        with self._lock:
+            previous_day = self._last_date.get(dataset)
+            self._last_date[dataset] = when.date()
+        
+        if len(list(partition.glob("part-*.parquet"))) >= self.compact_after:
+            self.compact_partition(partition, parts_only=True)
+        if previous_day is not None and previous_day < when.date():
+            # First write of a new day: fold the closed days into one file each
+            self.compact(dataset, before=when.date())
+    
+    def compact(self, dataset: str, before: date = None):
+        """Merge every file of each partition (older than `before`, if given) into one"""
+        base = self.root / dataset
+        if not self.available or not base.exists():
+            return
+        for day_dir in sorted(base.glob("date=*")):
+            if before is not None and day_dir.name[len("date="):] >= before.isoformat():
+                continue
+            for partition in day_dir.glob("airline=*"):
+                self.compact_partition(partition)
+    
+    def compact_partition(self, partition: Path, parts_only: bool = False):
+        """Rewrite a partition's small files as one compacted file"""
+        with self._lock:
+            pattern = "part-*.parquet" if parts_only else "*.parquet"
+            files = sorted(partition.glob(pattern))
+            if len(files) < 2:
+                return
+            table = pa.concat_tables([pq.read_table(f) for f in files], promote_options='default')
+            name = f"compacted-{datetime.now():%H%M%S%f}-{uuid.uuid4().hex[:8]}.parquet"
+            tmp = partition / f".{name}.tmp"
+            pq.write_table(table.sort_by('Time'), tmp)
+            os.replace(tmp, partition / name)
+            for f in files:
+                f.unlink()
+        logger.info("Compacted %d files in %s", len(files), partition)
+    
+    def _scan(self, dataset: str, start: Optional[datetime], end: Optional[datetime],
+              airlines: Optional[List[str]], columns: Optional[List[str]]) -> Optional[Tuple['ds.Dataset', Dict]]:
+        """The dataset and scan options (columns, pushed-down filter) for a query; None when there is nothing to read"""
+        base = self.root / dataset
+        if not self.available or not base.exists():
+            return None
+        
+        partitioning = ds.partitioning(pa.schema([('date', pa.string()), ('airline', pa.string())]), flavor='hive')
+        dataset_ = ds.dataset(base, format='parquet', partitioning=partitioning, exclude_invalid_files=True)
+        # Partition directories can exist before their first file is written
+        if 'Time' not in dataset_.schema.names:
+            return None
+        
+        predicates = []
+        if start is not None:
+            predicates += [ds.field('date') >= start.date().isoformat(), ds.field('Time') >= pa.scalar(pd.Timestamp(start))]
+        if end is not None:
+            predicates += [ds.field('date') <= end.date().isoformat(), ds.field('Time') < pa.scalar(pd.Timestamp(end))]
+        if airlines:
+            predicates.append(ds.field('airline').isin(airlines))
+        condition = None
+        for predicate in predicates:
+            condition = predicate if condition is None else condition & predicate
+        
+        if columns:
+            columns = [c for c in columns if c in dataset_.schema.names]
+        return dataset_, {'columns': columns, 'filter': condition}
+    
+    def query(self, dataset: str, start: datetime = None, end: datetime = None,
+              airlines: List[str] = None, columns: List[str] = None) -> pd.DataFrame:
+        """Rows of a dataset in [start, end), reading only matching partitions and columns"""
+        scan = self._scan(dataset, start, end, airlines, columns)
+        if scan is None:
+            return pd.DataFrame(columns=columns or [])
+        dataset_, options = scan
+        return dataset_.to_table(**options).to_pandas()
+    
+    def iter_batches(self, dataset: str, start: datetime = None, end: datetime = None, airlines: List[str] = None,
+                     columns: List[str] = None, batch_rows: int = 50_000) -> Iterator[pd.DataFrame]:
+        """Rows of a dataset in [start, end) as frames of at most batch_rows rows, read one record batch at a time"""
+        scan = self._scan(dataset, start, end, airlines, columns)
+        if scan is None:
+            return
+        dataset_, options = scan
+        for batch in dataset_.scanner(batch_size=batch_rows, **options).to_batches():
+            if batch.num_rows:
+                yield batch.to_pandas()
+    
+    def stats(self) -> Dict[str, Dict]:
+        """File count and bytes on disk per dataset"""
+        if not self.root.exists():
+            return {}
+        result = {}
+        for base in sorted(p for p in self.root.iterdir() if p.is_dir()):
+            files = list(base.rglob("*.parquet"))
+            result[base.name] = {'files': len(files), 'bytes': sum(f.stat().st_size for f in files)}
+        return result
@@ -0,0 +1,165 @@
+"""
+Process-wide provider cache shared by every Streamlit session.
+
+Entries are stored per (provider, key) with a per-provider TTL and a bound on
+the number of entries (least recently used entries are evicted first). Once an
+entry is older than its TTL, readers still get the last good value immediately
+while a single background thread refreshes it (stale-while-revalidate).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+CacheKey = Tuple[str, Hashable]
+
+@dataclass
+class CacheEntry:
+    value: Any
+    fetched_at: float
+    refreshing: bool = False
+    last_error: Optional[str] = None
+
+class _Fetch:
+    """One in-flight fetch; callers that join it share its value or its error"""
+    
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+class ProviderCache:
+    """TTL cache with stale-while-revalidate, shared across sessions"""
+    
+    def __init__(self, ttls: Dict[str, float], default_ttl: float = 60.0, max_entries: int = 128):
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._inflight: Dict[CacheKey, _Fetch] = {}
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0, 'errors': 0, 'evictions': 0}
+    
+    def ttl_for(self, provider: str) -> float:
+        """TTL in seconds for a provider"""
+        return self.ttls.get(provider, self.default_ttl)
+    
+    def get(self, provider: str, fetch: Callable[[], Any], key: Hashable = None) -> Any:
+        """Return the cached value, fetching on a miss and refreshing in the background when stale.
+        
+        Values are shared between sessions and must be treated as read-only.
+        """
+        cache_key = (provider, key)
+        now = time.monotonic()
+        
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is not None:
+                self._entries.move_to_end(cache_key)
+                if now - entry.fetched_at < self.ttl_for(provider):
+                    self._stats['hits'] += 1
+                    return entry.value
+                
+                self._stats['stale_hits'] += 1
+                if not entry.refreshing:
+                    entry.refreshing = True
+                    threading.Thread(
+                        target=self._refresh, args=(cache_key, fetch),
+                        name=f"cache-refresh-{provider}", daemon=True,
+                    ).start()
+                return entry.value
+            
+            self._stats['misses'] += 1
+        
+        return self._fetch_once(cache_key, fetch)
+    
+    def refresh(self, provider: str, fetch: Callable[[], Any], key: Hashable = None) -> Any:
+        """Fetch now and store the result, joining a fetch already in flight for the same key.
+        
+        Raises when the fetch fails, even though the cache still holds an older value.
+        """
+        with self._lock:
+            self._stats['refreshes'] += 1
+        return self._fetch_once((provider, key), fetch)
+    
+    def _fetch_once(self, cache_key: CacheKey, fetch: Callable[[], Any]) -> Any:
+        """Run fetch unless another caller is already fetching this key, then share its outcome.
+        
+        Callers whose joined fetch failed try once more through the registry, so all of
+        them share a single retry; if that fails too, its error is raised.
+        """
+        retried = False
+        while True:
+            with self._lock:
+                call = self._inflight.get(cache_key)
+                leading = call is None
+                if leading:
+                    call = self._inflight[cache_key] = _Fetch()
+            if leading:
+                break
+            
+            # Another session is already fetching this entry; reuse its result
+            call.done.wait()
+            if call.error is None:
+                return call.value
+            if retried:
+                raise call.error
+            retried = True
+        
+        try:
+            call.value = fetch()
+            self._store(cache_key, call.value)
+            return call.value
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(cache_key, None)
+            call.done.set()
+    
+    def peek(self, provider: str, key: Hashable = None) -> Optional[CacheEntry]:
+        """Return the entry without fetching or touching LRU order"""
+        with self._lock:
+            return self._entries.get((provider, key))
+    
+    def age(self, provider: str, key: Hashable = None) -> Optional[float]:
+        """Seconds since the entry was last fetched, or None if not cached"""
+        entry = self.peek(provider, key)
+        return None if entry is None else time.monotonic() - entry.fetched_at
+    
+    def invalidate(self, provider: Optional[str] = None):
+        """Drop all entries, or only those of one provider"""
+        with self._lock:
+            for cache_key in list(self._entries):
+                if provider is None or cache_key[0] == provider:
+                    del self._entries[cache_key]
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/refresh counters and current size"""
+        with self._lock:
+            return dict(self._stats, entries=len(self._entries))
+    
+    def _refresh(self, cache_key: CacheKey, fetch: Callable[[], Any]):
+        """Background refresh; keeps the last good value on failure"""
+        with self._lock:
+            self._stats['refreshes'] += 1
+        try:
+            self._fetch_once(cache_key, fetch)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                entry = self._entries.get(cache_key)
+                if entry is not None:
+                    entry.refreshing = False
+                    entry.last_error = str(e)
+    
+    def _store(self, cache_key: CacheKey, value: Any):
+        with self._lock:
+            self._entries[cache_key] = CacheEntry(value=value, fetched_at=time.monotonic())
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
@@ -1,5 +1,6 @@
+import os
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import Dict, List, Tuple
 
 @dataclass
 class AirlineConfig:
@@ -12,6 +13,14 @@ class AirlineConfig:
     headquarters_location: str
     fleet_size: int
     daily_flights_avg: int
+    # IATA code used for FlightRadar24 queries and flight numbers
+    iata_code: str = ""
+    # Callsign prefixes that identify this carrier's flights in OpenSky state vectors, ICAO designator first
+    callsign_prefixes: Tuple[str, ...] = ()
+    # HUB_AIRPORTS codes this carrier serves
+    hub_airports: Tuple[str, ...] = ()
+    # Multiplier on FEED_POLL_INTERVALS; smaller carriers are polled less often
+    refresh_scale: float = 1.0
 
 AIRLINES: Dict[str, AirlineConfig] = {
     "PIA": AirlineConfig(
@@ -24,6 +33,12 @@ AIRLINES: Dict[str, AirlineConfig] = {
         headquarters_location="Karachi, Pakistan",
         fleet_size=28,
         daily_flights_avg=80,
+        iata_code="PK",
+        callsign_prefixes=("PIA", "PK"),
+        hub_airports=(
+            "KHI", "ISB", "LHE", "PEW", "UET", "MUX", "SKT", "LYP", "GIL", "KDU",
+            "DXB", "JED", "MED", "RUH", "LHR", "MAN", "YYZ",
+        ),
     ),
     "AIRBLUE": AirlineConfig(
         airline_code="AIRBLUE",
@@ -35,6 +50,10 @@ AIRLINES: Dict[str, AirlineConfig] = {
         headquarters_location="Karachi, Pakistan",
         fleet_size=15,
         daily_flights_avg=45,
+        iata_code="PA",
+        callsign_prefixes=("ABQ",),
+        hub_airports=("KHI", "ISB", "LHE", "PEW", "MUX", "SKT", "DXB", "JED", "MED", "RUH", "MAN"),
+        refresh_scale=1.5,
     ),
     "SEREAIR": AirlineConfig(
         airline_code="SEREAIR",
@@ -46,9 +65,15 @@ AIRLINES: Dict[str, AirlineConfig] = {
         headquarters_location="Islamabad, Pakistan",
         fleet_size=10,
         daily_flights_avg=30,
+        iata_code="ER",
+        callsign_prefixes=("SEP",),
+        hub_airports=("KHI", "ISB", "LHE", "PEW", "DXB", "JED", "MED", "RUH"),
+        refresh_scale=2.0,
     ),
 }
 
+DEFAULT_AIRLINE: str = os.environ.get("DEFAULT_AIRLINE", "PIA")
+
 def get_airline_config(airline_code: str) -> AirlineConfig:
     if airline_code not in AIRLINES:
         raise ValueError(f"Airline '{airline_code}' not found")
@@ -56,199 +81,177 @@ def get_airline_config(airline_code: str) -> AirlineConfig:
 
 def list_airlines() -> List[str]:
     return list(AIRLINES.keys())
-```
 
-4. Click **"Commit changes"**
+@dataclass
+class HubAirport:
+    code: str
+    city: str
+    lat: float
+    lon: float
+
+# Airports known to the platform; weather is polled for every airport some airline lists as a hub
+HUB_AIRPORTS: Dict[str, HubAirport] = {
+    "KHI": HubAirport(code="KHI", city="Karachi", lat=24.8567, lon=67.1597),
+    "ISB": HubAirport(code="ISB", city="Islamabad", lat=33.6164, lon=73.1286),
+    "LHE": HubAirport(code="LHE", city="Lahore", lat=31.5204, lon=74.3587),
+    "PEW": HubAirport(code="PEW", city="Peshawar", lat=33.9939, lon=71.5146),
+    "UET": HubAirport(code="UET", city="Quetta", lat=30.2514, lon=66.9378),
+    "MUX": HubAirport(code="MUX", city="Multan", lat=30.2032, lon=71.4191),
+    "SKT": HubAirport(code="SKT", city="Sialkot", lat=32.5356, lon=74.3639),
+    "LYP": HubAirport(code="LYP", city="Faisalabad", lat=31.3650, lon=72.9948),
+    "GIL": HubAirport(code="GIL", city="Gilgit", lat=35.9188, lon=74.3336),
+    "KDU": HubAirport(code="KDU", city="Skardu", lat=35.3355, lon=75.5360),
+    "DXB": HubAirport(code="DXB", city="Dubai", lat=25.2532, lon=55.3657),
+    "JED": HubAirport(code="JED", city="Jeddah", lat=21.6796, lon=39.1565),
+    "MED": HubAirport(code="MED", city="Madinah", lat=24.5534, lon=39.7051),
+    "RUH": HubAirport(code="RUH", city="Riyadh", lat=24.9576, lon=46.6988),
+    "LHR": HubAirport(code="LHR", city="London", lat=51.4700, lon=-0.4543),
+    "MAN": HubAirport(code="MAN", city="Manchester", lat=53.3537, lon=-2.2750),
+    "YYZ": HubAirport(code="YYZ", city="Toronto", lat=43.6777, lon=-79.6248),
+}
+
+def list_hub_airports() -> List[str]:
+    return list(HUB_AIRPORTS.keys())
+
+def hub_bbox(codes: List[str], margin: float) -> Tuple[float, float, float, float]:
+    """(lamin, lomin, lamax, lomax) around the given hub airports, widened by margin degrees"""
+    hubs = [HUB_AIRPORTS[code] for code in codes]
+    return (
+        max(-90.0, min(h.lat for h in hubs) - margin), max(-180.0, min(h.lon for h in hubs) - margin),
+        min(90.0, max(h.lat for h in hubs) + margin), min(180.0, max(h.lon for h in hubs) + margin),
+    )
+
+# Cell size of the aircraft position grid index, in degrees
+POSITION_GRID_DEGREES: float = 1.0
+
+# Live map: most markers sent to the browser for one view (more aircraft than this are
+# binned on the position grid) and the map's height in pixels
+MAP_MAX_POINTS: int = 2000
+MAP_HEIGHT_PX: int = 600
+
+# Minutes before a flight no feed has reported drops out of the reconciled flight-state table
+FLIGHT_STATE_EXPIRY_MINUTES: float = 30
+
+# OpenSky query bounds (lamin, lomin, lamax, lomax): every hub airport plus a margin, except the
+# long-haul ones. A box reaching London and Toronto would span the North Atlantic and return most
+# of the world's traffic, so flights to them are tracked only while over Pakistan and the Gulf.
+OPENSKY_LONG_HAUL_HUBS: Tuple[str, ...] = ("LHR", "MAN", "YYZ")
+OPENSKY_BBOX_MARGIN_DEGREES: float = 2.0
+OPENSKY_BBOX: Tuple[float, float, float, float] = hub_bbox(
+    [code for code in HUB_AIRPORTS if code not in OPENSKY_LONG_HAUL_HUBS], OPENSKY_BBOX_MARGIN_DEGREES,
+)
+
+# Pakistan-registered transponders use ICAO24 block 760000-767FFF.
+# Full six-digit addresses are filtered by OpenSky itself, shorter prefixes locally.
+OPENSKY_ICAO24_PREFIXES: Tuple[str, ...] = ("760", "761", "762", "763", "764", "765", "766", "767")
+
+# Seconds before a provider's cached frame is considered stale
+PROVIDER_TTLS: Dict[str, float] = {
+    "flightradar": 30,
+    "opensky": 60,
+    "weather": 600,
+}
+
+# Default background poll interval per feed, in seconds (scaled per airline by refresh_scale)
+FEED_POLL_INTERVALS: Dict[str, float] = {
+    "flightradar": 30,
+    "opensky": 60,
+    "weather": 600,
+    "seats": 30,
+    "maintenance": 300,
+    "safety_alerts": 60,
+    "flight_safety": 300,
+}
 
----
+# Poller threads; enough for every airline's feeds to be fetched at the same time
+FEED_POLL_WORKERS: int = 8
+
+# Poll local stand-in feeds instead of upstream APIs (offline development and testing)
+OFFLINE_FEEDS: bool = os.environ.get("AIROPS_OFFLINE_FEEDS", "") == "1"
+
+# Upstream HTTP behaviour: retries with jittered backoff, then a circuit breaker per provider
+HTTP_RETRIES: int = 2
+HTTP_BACKOFF_BASE: float = 0.5
+HTTP_BACKOFF_CAP: float = 4.0
+HTTP_POOL_SIZE: int = 10
+BREAKER_FAILURE_THRESHOLD: int = 3
+BREAKER_RESET_SECONDS: float = 60.0
+
+# Upstream request budget per provider: (requests per minute, burst).
+# OpenSky's anonymous quota is small, so its budget is kept tight.
+RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    "flightradar": (6, 3),
+    "opensky": (2, 2),
+    "weather": (30, 10),
+}
 
-## ✅ STEP 6: Create .streamlit/config.toml Folder & File
+# Seconds a request may wait for a token before it is shed
+RATE_LIMIT_MAX_WAIT: float = 2.0
 
-1. Click **"Add file"** → **"Create new file"**
-2. Filename: `.streamlit/config.toml`
-3. Paste this:
-```
-[theme]
-primaryColor = "#1E3A5F"
-backgroundColor = "#F5F7FA"
-secondaryBackgroundColor = "#FFFFFF"
-textColor = "#1A1A1A"
-font = "sans serif"
-
-[client]
-showErrorDetails = false
-maxUploadSize = 200
-
-[logger]
-level = "info"
-
-[server]
-port = 8501
-headless = true
-runOnSave = true
-maxUploadSize = 200
-enableXsrfProtection = true
-```
-
-4. Click **"Commit changes"**
-
----
-
-## ✅ STEP 7: Create .env.template File
-
-1. Click **"Add file"** → **"Create new file"**
-2. Filename: `.env.template`
-3. Paste this:
-```
-ENVIRONMENT=dev
-DEFAULT_AIRLINE=PIA
-LOG_LEVEL=INFO
-
-PIA_SUPABASE_URL=https://your-project.supabase.co
-PIA_SUPABASE_KEY=your-public-anon-key
-
-OPENAI_API_KEY=sk-
-```
-
-4. Click **"Commit changes"**
-
----
-
-## ✅ STEP 8: Create .gitignore File
-
-1. Click **"Add file"** → **"Create new file"**
-2. Filename: `.gitignore`
-3. Paste this:
-```
-.env
-__pycache__/
-*.pyc
-.DS_Store
-.streamlit/secrets.toml
-```
-
-4. Click **"Commit changes"**
-
----
-
-## ✅ STEP 9: Deploy to Streamlit Cloud (THE MAGIC!)
-
-1. Go to: **https://share.streamlit.io**
-2. Click **"Sign in with GitHub"**
-3. Click **"New app"**
-4. Select your username
-5. Select repository: `airops-pro`
-6. Branch: `main`
-7. Main file path: `app.py`
-8. Click **"Deploy!"**
-
-**Wait 3-5 minutes... ⏳**
-
----
-
-## 🎉 YOUR APP IS LIVE!
-
-You'll get a URL like:
-```
-https://share.streamlit.io/yourname/airops-pro
-```
-
----
-
-## 📸 HERE'S WHAT IT LOOKS LIKE
-
-### **Dashboard Page:**
-```
-┌─────────────────────────────────────────────────────┐
-│ 🛫 Pakistan International Airlines                  │
-│ Operational Dashboard                              │
-├─────────────────────────────────────────────────────┤
-│ On-Time % │ Fleet Util. │ Delays │ Revenue ($M)   │
-│  87.3%    │   78.9%     │  156   │    $12.4M      │
-│  +2.1%    │   +3.2%     │  -12   │    +$0.45      │
-├─────────────────────────────────────────────────────┤
-│                                                     │
-│  [📊 On-Time Performance Chart]  [✈️ Fleet Chart] │
-│                                                     │
-├─────────────────────────────────────────────────────┤
-│ 🚨 Recent Alerts                                   │
-│ 🔴 Aircraft N-4567 requires maintenance   2h ago  │
-│ 🟠 Flight delayed by 1h 15min (weather)  1h ago  │
-│ 🟡 Crew scheduling optimization noted   30m ago  │
-│ 🟢 On-time exceeded target              10m ago  │
-└─────────────────────────────────────────────────────┘
-```
-
-### **Flights Page:**
-```
-┌─────────────────────────────────────────────────────┐
-│ ✈️ Flight Operations                               │
-│ [Live Flights] [Routes] [Delays]                  │
-├─────────────────────────────────────────────────────┤
-│ Flight │ Route  │ Aircraft │ Status    │ Time      │
-│ PK-001 │ KHI-ISB│ A320     │ Departed  │ 06:00     │
-│ PK-002 │ KHI-LHE│ B777     │ On Time   │ 07:30     │
-│ PK-003 │ ISB-KHI│ A320     │ Delayed   │ 08:15     │
-│ PK-004 │ LHE-KHI│ B737     │ Cancelled │ 09:00     │
-│ PK-005 │ KHI-DXB│ A320     │ Scheduled │ 10:30     │
-└─────────────────────────────────────────────────────┘
-```
-
-### **Maintenance Page:**
-```
-┌─────────────────────────────────────────────────────┐
-│ 🔧 Maintenance Management                          │
-│ [Scheduled] [Alerts] [Predictive]                 │
-├─────────────────────────────────────────────────────┤
-│ Aircraft │ Type        │ Next Due   │ Duration   │
-│ N-1001   │ C-Check     │ 2024-02-15 │ 48 hours   │
-│ N-1002   │ A-Check     │ 2024-01-28 │ 12 hours   │
-│ N-1003   │ Heavy Maint │ 2024-03-10 │ 200 hours  │
-│ N-1004   │ B-Check     │ 2024-02-05 │ 24 hours   │
-├─────────────────────────────────────────────────────┤
-│ 🚨 ALERTS:                                         │
-│ 🔴 N-4567: Engine vibration - Immediate action   │
-│ 🟠 N-2345: Hydraulic pressure - Schedule 48h     │
-│ 🟡 N-3456: Cabin pressure - Review next check    │
-└─────────────────────────────────────────────────────┘
-```
-
-### **Revenue Page:**
-```
-┌─────────────────────────────────────────────────────┐
-│ 💰 Revenue Management                              │
-│ Monthly Revenue: $12.4M | Load Factor: 82.1%      │
-├─────────────────────────────────────────────────────┤
-│ Route    │ Current │ Recommended │ Revenue Impact │
-│ KHI-ISB  │ $120    │ $125        │ +$2.1K        │
-│ KHI-LHE  │ $95     │ $100        │ +$1.8K        │
-│ ISB-KHI  │ $115    │ $118        │ +$2.5K        │
-│ LHE-KHI  │ $90     │ $95         │ +$1.2K        │
-│ KHI-DXB  │ $280    │ $290        │ +$3.5K        │
-└─────────────────────────────────────────────────────┘
-```
-
-### **AI Insights Page:**
-```
-┌─────────────────────────────────────────────────────┐
-│ 🤖 AI-Powered Insights                             │
-│ [Summary] [Predictions] [Optimization]            │
-├─────────────────────────────────────────────────────┤
-│ MONTHLY REPORT SUMMARY                             │
-│ • On-Time Performance: 87.3% (↑ 2.1%)             │
-│ • Fleet Utilization: 78.9%                        │
-│ • Maintenance Efficiency: 94.2%                   │
-│ • Cost Per Seat: $0.082 (↓ 1.2%)                 │
-│ • Revenue Per Hour: $2,847 (↑ $145)               │
-│                                                     │
-│ 🔮 DELAY PREDICTION                               │
-│ Predicted Rate: 12.5% | Confidence: 87%          │
-│ High Risk Routes: KHI-LHE, ISB-DXB               │
-│                                                     │
-│ 💡 COST OPTIMIZATION                              │
-│ Potential Savings: $280K/month (+6.7%)            │
-│ • Fuel Efficiency: $120K/month                    │
-│ • Crew Scheduling: $85K/month                     │
-│ • Maintenance: $45K/month                         │
-│ • Operations: $30K/month                          │
-└─────────────────────────────────────────────────────┘
+# Rolling in-memory history: rows kept per series and airline (memory is fixed at
+# this size) and how far back queries may look
+HISTORY_CAPACITY: Dict[str, int] = {
+    "flights": 50_000,
+    "positions": 100_000,
+    "seats": 50_000,
+}
+HISTORY_RETENTION_HOURS: float = 6
+
+# On-disk Parquet archive of snapshots; a partition's small files are merged
+# once this many have accumulated
+ARCHIVE_DIR: str = os.environ.get("AIROPS_ARCHIVE_DIR", "data/archive")
+ARCHIVE_COMPACT_AFTER: int = 50
+
+# Hourly/daily rollups: hours a bucket still accepts late snapshots, days each level
+# is kept, and how many days of archive are replayed into them at startup
+ROLLUP_LATE_WINDOW_HOURS: float = 48
+ROLLUP_RETENTION_DAYS: Dict[str, int] = {
+    "hour": 90,
+    "day": 730,
+}
+ROLLUP_BACKFILL_DAYS: int = 30
+
+# Built Plotly figures kept for reuse across reruns: entry count and memory cap (MB)
+FIGURE_CACHE_ENTRIES: int = 64
+FIGURE_CACHE_MB: float = 64
+
+# Serialized export files kept for repeat downloads: entry count and memory cap (MB)
+EXPORT_CACHE_ENTRIES: int = 32
+EXPORT_CACHE_MB: float = 128
+
+# Streamed history exports (CSV/Parquet/Arrow): output directory and rows written per batch
+EXPORT_DIR: str = os.environ.get("AIROPS_EXPORT_DIR", "data/exports")
+EXPORT_BATCH_ROWS: int = 50_000
+
+# Background Excel/PDF reports: output directory, worker processes, and how long
+# (days) and how many finished files are kept
+REPORT_DIR: str = os.environ.get("AIROPS_REPORT_DIR", "data/reports")
+REPORT_WORKERS: int = 2
+REPORT_RETENTION_DAYS: float = 7
+REPORT_MAX_FILES: int = 50
+
+# Headless JSON API (api.py) over the saved snapshots: bind address, default and
+# maximum rows per page, and the smallest body worth gzipping (bytes)
+API_HOST: str = os.environ.get("AIROPS_API_HOST", "127.0.0.1")
+API_PORT: int = int(os.environ.get("AIROPS_API_PORT", "8502"))
+API_PAGE_SIZE: int = 500
+API_MAX_PAGE_SIZE: int = 5000
+API_GZIP_MIN_BYTES: int = 1024
+
+# Server-sent-events stream of change events, served by the app process: bind address,
+# events queued per client before its oldest are dropped, client limit, keep-alive seconds
+EVENT_STREAM_HOST: str = os.environ.get("AIROPS_EVENT_STREAM_HOST", "127.0.0.1")
+EVENT_STREAM_PORT: int = int(os.environ.get("AIROPS_EVENT_STREAM_PORT", "8503"))
+EVENT_STREAM_MAX_PENDING: int = 1000
+EVENT_STREAM_MAX_CLIENTS: int = 500
+EVENT_STREAM_HEARTBEAT_SECONDS: float = 15
+
+# Snapshot files shared by several app workers on one machine (ideally on tmpfs, e.g.
+# /dev/shm/airops); one worker polls and the others map its snapshots. Empty to disable.
+SHARED_SNAPSHOT_DIR: str = os.environ.get("AIROPS_SHARED_SNAPSHOT_DIR", "")
+SHARED_SNAPSHOT_POLL_SECONDS: float = 0.5
+# Seconds a follower waits for the leader's first snapshot of a feed before showing demo data
+SHARED_SNAPSHOT_WAIT_SECONDS: float = 5.0
+
+# Last good snapshot per feed, reloaded at startup so the first render needs no upstream call
+WARM_START_DIR: str = os.environ.get("AIROPS_WARM_START_DIR", "data/warm_start")
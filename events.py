@@ -0,0 +1,201 @@
+"""
+Keyed diffs between consecutive snapshots, published as an event stream.
+
+Each stream (an airline's flights, seats, maintenance, ...) remembers the
+last frame it saw. A new frame is compared with it by key: keys that
+appear become "added" events, and every watched field whose value changed
+becomes an event with the old and new value (and the numeric delta). The
+comparison runs column by column over aligned arrays, never row by row.
+
+Events are kept in a bounded log with increasing sequence numbers, so
+consumers read only what happened since their last cursor, and are handed
+to subscribers as they are logged.
+"""
+
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns of the new frame copied onto its events when the stream has them, for filtering
+CONTEXT_COLUMNS = ['Route', 'Severity']
+CHANGE_COLUMNS = ['Key', 'Event', 'Field', 'Old', 'New', 'Delta'] + CONTEXT_COLUMNS
+EVENT_COLUMNS = ['Seq', 'Time', 'Airline', 'Stream'] + CHANGE_COLUMNS
+
+@dataclass(frozen=True)
+class DiffRule:
+    key: str
+    # Watched column -> event name emitted when it changes
+    fields: Dict[str, str]
+    # Event name for keys that were not in the previous frame
+    added: Optional[str] = None
+    # Adds derived columns (e.g. flight phase) before diffing
+    derive: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None
+    # Renames events once old and new values are known (e.g. phase change -> 'landed')
+    classify: Optional[Callable[[pd.DataFrame], pd.Series]] = None
+
+def diff_frames(old: pd.DataFrame, new: pd.DataFrame, rule: DiffRule) -> pd.DataFrame:
+    """Events turning old into new: Key, Event, Field, Old, New, Delta, plus the new frame's context columns"""
+    old = old.drop_duplicates(rule.key, keep='last').set_index(rule.key)
+    new = new.drop_duplicates(rule.key, keep='last').set_index(rule.key)
+    parts = []
+    
+    if rule.added:
+        added = new.index.difference(old.index)
+        parts.append(pd.DataFrame({'Key': added, 'Event': rule.added, 'Field': None, 'Old': None, 'New': None, 'Delta': np.nan}))
+    
+    common = new.index.intersection(old.index)
+    for column, event in rule.fields.items():
+        if column not in old or column not in new or not len(common):
+            continue
+        before = old[column].reindex(common).to_numpy(dtype=object)
+        after = new[column].reindex(common).to_numpy(dtype=object)
+        missing_before, missing_after = pd.isna(before), pd.isna(after)
+        changed = (before != after) & ~(missing_before & missing_after)
+        if not changed.any():
+            continue
+        delta = np.nan
+        if pd.api.types.is_numeric_dtype(old[column]) and pd.api.types.is_numeric_dtype(new[column]):
+            delta = after[changed].astype(float) - before[changed].astype(float)
+        parts.append(pd.DataFrame({
+            'Key': common[changed], 'Event': event, 'Field': column,
+            'Old': before[changed], 'New': after[changed], 'Delta': delta,
+        }))
+    
+    if not parts:
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+    changes = pd.concat(parts, ignore_index=True)
+    if rule.classify is not None:
+        changes['Event'] = rule.classify(changes)
+        # One transition can show up in several fields (status and phase); report it once
+        changes = changes.drop_duplicates(['Key', 'Event'], keep='first', ignore_index=True)
+    for column in CONTEXT_COLUMNS:
+        changes[column] = new[column].reindex(changes['Key']).to_numpy(dtype=object) if column in new else None
+    return changes
+
+@dataclass
+class _Stream:
+    frame: pd.DataFrame
+    version: int = 0
+
+class EventLog:
+    """Diffs each stream's consecutive frames and keeps the resulting events"""
+    
+    def __init__(self, rules: Dict[str, DiffRule], capacity: int = 5000):
+        self.rules = rules
+        self.capacity = capacity
+        self._streams: Dict[Tuple[str, str], _Stream] = {}
+        self._batches: Deque[pd.DataFrame] = deque()
+        self._size = 0
+        self._seq = 0
+        self._listeners: List[Callable[[pd.DataFrame], None]] = []
+        self._lock = threading.Lock()
+    
+    def subscribe(self, listener: Callable[[pd.DataFrame], None]):
+        """Call listener(events) with every non-empty batch of logged events"""
+        self._listeners.append(listener)
+    
+    @property
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._seq
+    
+    def baseline(self, airline: str, stream: str, frame: pd.DataFrame, version: int = 0):
+        """Remember a frame to diff the next one against, without emitting events"""
+        rule = self.rules[stream]
+        if rule.key not in frame:
+            return
+        frame = rule.derive(frame) if rule.derive else frame
+        with self._lock:
+            self._streams[(airline, stream)] = _Stream(frame, version)
+    
+    def observe(self, airline: str, stream: str, frame: pd.DataFrame, when: datetime = None, version: int = None) -> pd.DataFrame:
+        """Diff a stream's new frame against its previous one and log the events"""
+        rule = self.rules[stream]
+        if rule.key not in frame:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        frame = rule.derive(frame) if rule.derive else frame
+        
+        with self._lock:
+            previous = self._streams.get((airline, stream))
+            if previous is not None and version is not None and version <= previous.version:
+                return pd.DataFrame(columns=EVENT_COLUMNS)
+            self._streams[(airline, stream)] = _Stream(frame, version or 0)
+        # The first frame of a stream is its baseline
+        if previous is None:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        
+        changes = diff_frames(previous.frame, frame, rule)
+        if changes.empty:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        
+        with self._lock:
+            first = self._seq + 1
+            self._seq += len(changes)
+            events = changes.assign(
+                Seq=np.arange(first, self._seq + 1), Time=pd.Timestamp(when or datetime.now()),
+                Airline=airline, Stream=stream,
+            )[EVENT_COLUMNS]
+            self._batches.append(events)
+            self._size += len(events)
+            while self._size > self.capacity and len(self._batches) > 1:
+                self._size -= len(self._batches.popleft())
+        for listener in list(self._listeners):
+            try:
+                listener(events)
+            except Exception:
+                logger.exception("Event listener failed for %s.%s", airline, stream)
+        return events
+    
+    def since(self, seq: int = 0, airline: str = None, streams: Iterable[str] = None) -> pd.DataFrame:
+        """Events after sequence number seq, oldest first, optionally for one airline and some streams"""
+        with self._lock:
+            batches = [b for b in self._batches if b['Seq'].iloc[-1] > seq]
+        if not batches:
+            return pd.DataFrame(columns=EVENT_COLUMNS)
+        events = pd.concat(batches, ignore_index=True)
+        mask = events['Seq'].to_numpy() > seq
+        if airline is not None:
+            mask &= events['Airline'].to_numpy() == airline
+        if streams is not None:
+            mask &= events['Stream'].isin(list(streams)).to_numpy()
+        return events[mask].reset_index(drop=True)
+
+# Altitude (ft) upper bounds of each flight phase
+FLIGHT_PHASES = [(100, 'Ground'), (10_000, 'Terminal'), (25_000, 'Climb/Descent'), (np.inf, 'Cruise')]
+
+def with_flight_phase(frame: pd.DataFrame) -> pd.DataFrame:
+    """Add a 'Phase' column from 'Altitude (ft)'"""
+    altitude = pd.to_numeric(frame['Altitude (ft)'], errors='coerce').to_numpy(dtype=float)
+    bounds = np.array([bound for bound, _ in FLIGHT_PHASES])
+    names = np.array([name for _, name in FLIGHT_PHASES], dtype=object)
+    phase = names[np.minimum(np.searchsorted(bounds, altitude, side='right'), len(names) - 1)]
+    return frame.assign(Phase=np.where(np.isnan(altitude), None, phase))
+
+def with_flight_route(frame: pd.DataFrame) -> pd.DataFrame:
+    """Add a 'Route' column ('KHI-ISB') from 'From' and 'To'; blank when either is unknown"""
+    if 'From' not in frame or 'To' not in frame:
+        return frame
+    route = frame['From'].astype(object) + '-' + frame['To'].astype(object)
+    return frame.assign(Route=route.where(frame['From'].notna() & frame['To'].notna(), None))
+
+def classify_flight_changes(changes: pd.DataFrame) -> pd.Series:
+    """Name phase, status and destination changes as departed / landed / delayed / diverted"""
+    field_, old, new = changes['Field'], changes['Old'].astype(str), changes['New'].astype(str)
+    conditions = [
+        (field_ == 'Phase') & (old == 'Ground'),
+        (field_ == 'Phase') & (new == 'Ground'),
+        (field_ == 'Status') & new.str.contains('Took Off|Taking Off|Departed', regex=True),
+        (field_ == 'Status') & new.str.contains('Landed'),
+        (field_ == 'Status') & new.str.contains('Delay'),
+        (field_ == 'To') & changes['Old'].notna(),
+    ]
+    choices = ['departed', 'landed', 'departed', 'landed', 'delayed', 'diverted']
+    return pd.Series(np.select(conditions, choices, default=changes['Event'].to_numpy()), index=changes.index)
@@ -0,0 +1,153 @@
+"""
+Cache of export file payloads.
+
+Download buttons are given a callable instead of the file contents, so a
+file is only serialized when someone clicks. The serialized bytes are kept
+under (airline, dataset, data version, format) and evicted least recently
+used, bounded by count and total size, so repeated downloads of unchanged
+data reuse them.
+
+Large history exports are instead streamed to a file in bounded batches
+(CSV, Parquet or Arrow IPC), so memory use does not grow with the row
+count. Parquet and Arrow IPC need pyarrow.
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Tuple, Union
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.ipc as ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pacsv = ipc = pq = None
+
+logger = logging.getLogger(__name__)
+
+class ExportCache:
+    """LRU cache of serialized export files with an entry limit and a memory cap"""
+    
+    def __init__(self, max_entries: int = 32, max_bytes: int = 128 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Tuple, bytes]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    def get(self, key: Tuple, build: Callable[[], Union[str, bytes]]) -> bytes:
+        """The cached payload for key, building and storing it on a miss"""
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+        
+        payload = build()
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        with self._lock:
+            if key not in self._entries and len(payload) <= self.max_bytes:
+                self._entries[key] = payload
+                self._bytes += len(payload)
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= len(evicted)
+                    self.evictions += 1
+        return payload
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+@dataclass
+class ExportStats:
+    """Size and throughput of one streamed export"""
+    path: str
+    rows: int
+    bytes: int
+    seconds: float
+    
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+    
+    @property
+    def mb_per_second(self) -> float:
+        return self.bytes / 1024 / 1024 / self.seconds if self.seconds else 0.0
+
+def _table_writer(open_writer):
+    def write(path: Path, batches: Iterable[pd.DataFrame]):
+        writer = schema = None
+        try:
+            for batch in batches:
+                table = pa.Table.from_pandas(batch, preserve_index=False)
+                if writer is None:
+                    schema = table.schema
+                    writer = open_writer(path, schema)
+                # Later batches keep the first batch's types (e.g. an all-blank column)
+                writer.write_table(table.cast(schema))
+                yield len(batch)
+        finally:
+            if writer is not None:
+                writer.close()
+    return write
+
+def _csv_writer(path: Path, batches: Iterable[pd.DataFrame]):
+    # pyarrow's CSV writer is several times faster than DataFrame.to_csv; fall back to pandas without it
+    if pa is not None:
+        yield from _table_writer(pacsv.CSVWriter)(path, batches)
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for i, batch in enumerate(batches):
+            batch.to_csv(f, index=False, header=i == 0)
+            yield len(batch)
+
+# Streamed format -> (file extension, MIME type, writer yielding the rows of each written batch)
+STREAM_FORMATS = {
+    'csv': ('csv', "text/csv", _csv_writer),
+    'parquet': ('parquet', "application/vnd.apache.parquet",
+                _table_writer(lambda path, schema: pq.ParquetWriter(path, schema, compression='zstd'))),
+    'arrow': ('arrow', "application/vnd.apache.arrow.file",
+              _table_writer(lambda path, schema: ipc.new_file(str(path), schema))),
+}
+
+def stream_export(batches: Iterable[pd.DataFrame], path: Union[str, Path], fmt: str) -> ExportStats:
+    """Write batches to path one at a time; the file is swapped in only once complete"""
+    _, _, writer = STREAM_FORMATS[fmt]
+    if fmt != 'csv' and pa is None:
+        raise RuntimeError(f"{fmt} export needs pyarrow")
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    started = time.perf_counter()
+    try:
+        rows = sum(writer(tmp, batches))
+        os.replace(tmp, path)
+    finally:
+        tmp.unlink(missing_ok=True)
+    stats = ExportStats(str(path), rows, path.stat().st_size, time.perf_counter() - started)
+    logger.info("Exported %d rows to %s (%.1f MB) in %.2fs: %.0f rows/s, %.1f MB/s", stats.rows, path,
+                stats.bytes / 1024 / 1024, stats.seconds, stats.rows_per_second, stats.mb_per_second)
+    return stats
@@ -0,0 +1,90 @@
+"""
+Memoized Plotly figures.
+
+Building a figure with plotly.express (validating every trace against the
+schema) costs far more than drawing it, and pages rebuild their charts on
+every widget interaction. Figures are cached under (page, chart, data
+version, chart parameters): while the data version is unchanged a rerun
+reuses the built figure. Entries are evicted least recently used, bounded
+by count and by an estimate of their size: the bytes of their traces' data
+arrays, which dominate a figure and cost nothing to measure, unlike
+serializing it.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+import numpy as np
+import plotly.graph_objects as go
+
+# Trace properties holding one value per point
+DATA_ARRAYS = ('x', 'y', 'z', 'lat', 'lon', 'values', 'labels', 'text', 'hovertext', 'customdata')
+
+def figure_bytes(figure: go.Figure) -> int:
+    """Estimated size of a figure: the bytes of its traces' data arrays"""
+    size = 0
+    for trace in figure.data:
+        for name in DATA_ARRAYS:
+            values = trace[name] if name in trace else None
+            if isinstance(values, np.ndarray):
+                size += values.nbytes
+            elif isinstance(values, (list, tuple)):
+                size += len(values) * 8
+    return size
+
+class FigureCache:
+    """LRU cache of built figures with an entry limit and a memory cap"""
+    
+    def __init__(self, max_entries: int = 64, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        # Key -> (figure, estimated size in bytes)
+        self._entries: "OrderedDict[Tuple, Tuple[go.Figure, int]]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(page: str, chart: str, version: Hashable, params: Dict[str, Any] = None) -> Tuple:
+        """Cache key; params are compared by value, so lists and dicts are allowed"""
+        return page, chart, version, json.dumps(params or {}, sort_keys=True, default=str)
+    
+    def get(self, key: Tuple, build: Callable[[], go.Figure]) -> go.Figure:
+        """The cached figure for key, building and storing it on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        
+        # Build outside the lock; two sessions missing on the same key both build, one entry is kept
+        figure = build()
+        size = figure_bytes(figure)
+        with self._lock:
+            if key not in self._entries and size <= self.max_bytes:
+                self._entries[key] = (figure, size)
+                self._bytes += size
+                while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                    _, (_, evicted) = self._entries.popitem(last=False)
+                    self._bytes -= evicted
+                    self.evictions += 1
+        return figure
+    
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,161 @@
+"""
+Rolling in-memory history of feed snapshots.
+
+Each series is a column-oriented ring buffer: one preallocated NumPy array
+per column plus a timestamp column. Appending a snapshot writes into the
+existing arrays (overwriting the oldest rows once full), so memory stays
+fixed at the configured capacity no matter how long the app runs.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+class RingBuffer:
+    """Fixed-capacity columnar buffer of timestamped rows"""
+    
+    def __init__(self, schema: Dict[str, str], capacity: int):
+        self.schema = {name: np.dtype(dtype) for name, dtype in schema.items()}
+        self.capacity = capacity
+        self._time = np.empty(capacity, dtype='datetime64[ns]')
+        self._cols = {name: np.empty(capacity, dtype=dtype) for name, dtype in self.schema.items()}
+        self._next = 0
+        self._size = 0
+        # Rows appended since creation; row n lives at index n % capacity while it is retained
+        self._written = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def append(self, when: datetime, frame: pd.DataFrame):
+        """Append all rows of a snapshot taken at `when`; missing columns are left blank"""
+        rows = len(frame)
+        if rows == 0:
+            return
+        skip = max(0, rows - self.capacity)
+        rows -= skip
+        
+        columns = {}
+        for name, dtype in self.schema.items():
+            if name in frame:
+                values = frame[name].to_numpy()[skip:]
+                if dtype.kind in 'fi':
+                    values = pd.to_numeric(values, errors='coerce')
+                elif dtype.kind == 'U':
+                    values = np.where(pd.isna(values), '', values).astype(str)
+            else:
+                values = np.nan if dtype.kind == 'f' else 0 if dtype.kind == 'i' else ''
+            columns[name] = values
+        
+        with self._lock:
+            start = self._next
+            first = min(rows, self.capacity - start)
+            # Write in at most two slices: up to the end of the buffer, then wrapped to the front
+            for target, src_lo, src_hi in ((slice(start, start + first), 0, first), (slice(0, rows - first), first, rows)):
+                if src_hi <= src_lo:
+                    continue
+                self._time[target] = np.datetime64(when, 'ns')
+                for name, values in columns.items():
+                    self._cols[name][target] = values[src_lo:src_hi] if np.ndim(values) else values
+            self._next = (start + rows) % self.capacity
+            self._size = min(self.capacity, self._size + rows)
+            self._written += rows
+    
+    def query(self, start: datetime = None, end: datetime = None, columns: List[str] = None) -> pd.DataFrame:
+        """Rows with start <= time < end, oldest first"""
+        columns = columns or list(self.schema)
+        with self._lock:
+            if self._size < self.capacity:
+                order = np.arange(self._size)
+            else:
+                order = np.roll(np.arange(self.capacity), -self._next)
+            times = self._time[order]
+            mask = np.ones(len(order), dtype=bool)
+            if start is not None:
+                mask &= times >= np.datetime64(start, 'ns')
+            if end is not None:
+                mask &= times < np.datetime64(end, 'ns')
+            picked = order[mask]
+            data = {'Time': self._time[picked]}
+            data.update({name: self._cols[name][picked] for name in columns})
+        return pd.DataFrame(data)
+    
+    def iter_batches(self, start: datetime = None, end: datetime = None, columns: List[str] = None,
+                     batch_rows: int = 50_000) -> Iterator[pd.DataFrame]:
+        """Rows with start <= time < end, oldest first, as frames of at most batch_rows rows.
+        
+        Rows are read one window of the buffer at a time, so memory stays bounded by the
+        batch size. Rows overwritten by newer snapshots while iterating are skipped; at
+        least one (possibly empty) frame is always yielded.
+        """
+        columns = columns or list(self.schema)
+        with self._lock:
+            first, last = self._written - self._size, self._written
+        
+        yielded = False
+        for lo in range(first, last, batch_rows):
+            with self._lock:
+                # Rows are numbered by append order; skip those already overwritten
+                numbers = np.arange(max(lo, self._written - self._size), min(lo + batch_rows, last))
+                index = numbers % self.capacity
+                times = self._time[index]
+                mask = np.ones(len(index), dtype=bool)
+                if start is not None:
+                    mask &= times >= np.datetime64(start, 'ns')
+                if end is not None:
+                    mask &= times < np.datetime64(end, 'ns')
+                if not mask.any():
+                    continue
+                picked = index[mask]
+                data = {'Time': times[mask]}
+                data.update({name: self._cols[name][picked] for name in columns})
+            yielded = True
+            yield pd.DataFrame(data)
+        if not yielded:
+            yield pd.DataFrame({'Time': self._time[:0], **{name: self._cols[name][:0] for name in columns}})
+    
+    @property
+    def oldest(self) -> Optional[datetime]:
+        with self._lock:
+            if not self._size:
+                return None
+            first = 0 if self._size < self.capacity else self._next
+            return pd.Timestamp(self._time[first]).to_pydatetime()
+    
+    @property
+    def nbytes(self) -> int:
+        return self._time.nbytes + sum(col.nbytes for col in self._cols.values())
+
+class HistoryStore:
+    """Named ring buffers with a shared retention window"""
+    
+    def __init__(self, schemas: Dict[str, Dict[str, str]], capacities: Dict[str, int], retention: timedelta):
+        self.retention = retention
+        self.series = {name: RingBuffer(schema, capacities[name]) for name, schema in schemas.items()}
+    
+    def append(self, series: str, when: datetime, frame: pd.DataFrame):
+        self.series[series].append(when, frame)
+    
+    def query(self, series: str, start: datetime = None, end: datetime = None, columns: List[str] = None) -> pd.DataFrame:
+        """Rows of a series in [start, end), never older than the retention window"""
+        horizon = datetime.now() - self.retention
+        start = max(start, horizon) if start else horizon
+        return self.series[series].query(start, end, columns)
+    
+    def iter_batches(self, series: str, start: datetime = None, end: datetime = None, columns: List[str] = None,
+                     batch_rows: int = 50_000) -> Iterator[pd.DataFrame]:
+        """Rows of a series in [start, end) in bounded batches, never older than the retention window"""
+        horizon = datetime.now() - self.retention
+        start = max(start, horizon) if start else horizon
+        return self.series[series].iter_batches(start, end, columns, batch_rows)
+    
+    def stats(self) -> Dict[str, Dict]:
+        """Row count, capacity, memory and oldest row per series"""
+        return {
+            name: {'rows': len(buf), 'capacity': buf.capacity, 'bytes': buf.nbytes, 'oldest': buf.oldest}
+            for name, buf in self.series.items()
+        }
@@ -0,0 +1,243 @@
+"""
+Shared HTTP client for upstream providers.
+
+Each provider gets its own pooled keep-alive requests.Session, bounded
+retries with jittered exponential backoff, and a circuit breaker. Once a
+breaker opens, calls fail immediately with CircuitOpenError so callers can
+serve cached or fallback data instead of waiting for another timeout.
+An optional ProviderScheduler coalesces identical requests and enforces
+each provider's request budget: every attempt, retries included, spends a
+token. A 429 is retried only after its Retry-After, and only when that is
+short; otherwise the call fails with ProviderRateLimitedError. Unlike the
+CallSkipped errors, that one means the provider was reached and refused,
+so callers treat it as a failed fetch and keep their last good data.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Hashable, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from scheduler import CallSkipped, ProviderScheduler, RateLimitedError
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class CircuitOpenError(CallSkipped):
+    """Raised when a provider's breaker is open and the call is skipped"""
+    
+    def __init__(self, provider: str, retry_in: float):
+        super().__init__(f"{provider} circuit open, next probe in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+class ProviderRateLimitedError(requests.HTTPError):
+    """Raised when a provider answers 429 with a Retry-After too long to wait out"""
+    
+    def __init__(self, provider: str, retry_after: float, response: requests.Response = None):
+        super().__init__(f"{provider} rate limited (HTTP 429), retry in {retry_after:.0f}s", response=response)
+        self.provider = provider
+        self.retry_after = retry_after
+
+class CircuitBreaker:
+    """Closed -> open after repeated failures -> half-open probe after a cool-down"""
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half-open'
+    
+    def __init__(self, name: str, failure_threshold: int = 3, reset_timeout: float = 60.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.total_failures = 0
+        self.total_calls = 0
+        self.short_circuited = 0
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.last_failure: Optional[datetime] = None
+        self._probing = False
+        self._lock = threading.Lock()
+    
+    def is_open(self) -> bool:
+        """True while calls are being skipped, without claiming a half-open probe"""
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+    
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now"""
+        with self._lock:
+            if self.state == self.OPEN:
+                waited = time.monotonic() - self.opened_at
+                if waited < self.reset_timeout:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(self.name, self.reset_timeout - waited)
+                self.state = self.HALF_OPEN
+            
+            if self.state == self.HALF_OPEN:
+                # Only one probe at a time while half-open
+                if self._probing:
+                    self.short_circuited += 1
+                    raise CircuitOpenError(self.name, 0)
+                self._probing = True
+            
+            self.total_calls += 1
+    
+    def abandon_call(self):
+        """The call was skipped before reaching the provider; frees a half-open probe"""
+        with self._lock:
+            self._probing = False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.consecutive_failures = 0
+            self.opened_at = None
+            self._probing = False
+    
+    def record_failure(self, error: str):
+        with self._lock:
+            self.consecutive_failures += 1
+            self.total_failures += 1
+            self.last_error = error
+            self.last_failure = datetime.now()
+            self._probing = False
+            if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+    
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.consecutive_failures,
+                'total_failures': self.total_failures,
+                'total_calls': self.total_calls,
+                'short_circuited': self.short_circuited,
+                'last_error': self.last_error,
+                'last_failure': self.last_failure,
+            }
+
+class HttpClient:
+    """Pooled sessions, retries with backoff and a breaker per provider"""
+    
+    def __init__(self, retries: int = 2, backoff_base: float = 0.5, backoff_cap: float = 4.0,
+                 failure_threshold: int = 3, reset_timeout: float = 60.0, pool_size: int = 10,
+                 scheduler: Optional[ProviderScheduler] = None):
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.pool_size = pool_size
+        self.scheduler = scheduler
+        self._sessions: Dict[str, requests.Session] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+    
+    def session(self, provider: str) -> requests.Session:
+        with self._lock:
+            if provider not in self._sessions:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                self._sessions[provider] = session
+            return self._sessions[provider]
+    
+    def breaker(self, provider: str) -> CircuitBreaker:
+        with self._lock:
+            if provider not in self._breakers:
+                self._breakers[provider] = CircuitBreaker(provider, self.failure_threshold, self.reset_timeout)
+            return self._breakers[provider]
+    
+    def get(self, provider: str, url: str, **kwargs) -> requests.Response:
+        """GET through the provider's session; raises CallSkipped or the last error on failure"""
+        breaker = self.breaker(provider)
+        if breaker.is_open():
+            # Fail fast before spending a token from the provider's budget
+            breaker.before_call()
+        
+        if self.scheduler is None:
+            return self._send(provider, url, **kwargs)
+        key = (url, _freeze(kwargs.get('params')))
+        return self.scheduler.run(provider, key, lambda: self._send(provider, url, **kwargs))
+    
+    def _send(self, provider: str, url: str, **kwargs) -> requests.Response:
+        breaker = self.breaker(provider)
+        breaker.before_call()
+        session = self.session(provider)
+        
+        for attempt in range(self.retries + 1):
+            if self.scheduler is not None:
+                try:
+                    self.scheduler.admit(provider)
+                except RateLimitedError:
+                    breaker.abandon_call()
+                    raise
+            try:
+                response = session.get(url, **kwargs)
+            except requests.RequestException as e:
+                error, response = str(e), None
+                retryable = isinstance(e, (requests.ConnectionError, requests.Timeout))
+            else:
+                if response.status_code < 400:
+                    breaker.record_success()
+                    return response
+                error = f"HTTP {response.status_code}"
+                retryable = response.status_code in RETRY_STATUSES
+                retry_after = _retry_after(response) if response.status_code == 429 else None
+                if retry_after is not None:
+                    if self.scheduler is not None:
+                        self.scheduler.defer(provider, retry_after)
+                    # Wait inline only as long as a caller would wait for a token or a backoff
+                    longest = self.scheduler.max_wait if self.scheduler is not None else self.backoff_cap
+                    if attempt == self.retries or retry_after > longest:
+                        breaker.record_failure(error)
+                        raise ProviderRateLimitedError(provider, retry_after, response)
+                    # With a scheduler, the next admit() waits out the deferred budget
+                    if self.scheduler is None:
+                        time.sleep(retry_after)
+                    continue
+            
+            if not retryable or attempt == self.retries:
+                breaker.record_failure(error)
+                if response is not None:
+                    return response
+                raise requests.RequestException(error)
+            
+            # Full jitter keeps many workers from retrying in lockstep
+            time.sleep(random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt)))
+    
+    def status(self) -> Dict[str, Dict]:
+        """Breaker state and failure counts per provider"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {provider: breaker.status() for provider, breaker in breakers.items()}
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delay or HTTP date), or None without one"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+def _freeze(params) -> Hashable:
+    """Hashable form of request params for coalescing identical requests"""
+    if params is None:
+        return None
+    items = params.items() if isinstance(params, dict) else params
+    return tuple(sorted((str(k), str(v)) for k, v in items))
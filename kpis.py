@@ -0,0 +1,167 @@
+"""
+Running dashboard KPIs per airline, with day-over-day deltas.
+
+Each feed snapshot is folded into the totals of the day it was fetched:
+gauges (active flights, aircraft in maintenance, safety score) are
+replaced, and per-flight figures (seats sold, revenue, on-time) are kept
+as the latest value per flight plus a running sum, so a snapshot costs
+only its own rows. Reading the KPIs is a handful of lookups, independent
+of fleet size and of how many flights the day has seen.
+
+Only today and yesterday are kept; yesterday's final values are the
+baseline for the deltas.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+ACTIVE_FLIGHTS = 'active_flights'
+ON_TIME = 'on_time_pct'
+LOAD_FACTOR = 'load_factor'
+PASSENGERS = 'passengers'
+REVENUE = 'revenue'
+AIRCRAFT_AVAILABLE = 'aircraft_available'
+SAFETY_SCORE = 'safety_score'
+# Gauge behind AIRCRAFT_AVAILABLE
+IN_MAINTENANCE = 'in_maintenance'
+
+# Flight statuses counted as active
+ACTIVE_STATUSES = ('Boarding', 'Taking Off', 'In Flight', 'Landing')
+ON_TIME_VALUES = ('yes', 'true', 'on time')
+
+@dataclass(frozen=True)
+class Kpi:
+    value: Optional[float]
+    # Yesterday's final value
+    previous: Optional[float] = None
+    
+    @property
+    def delta(self) -> Optional[float]:
+        if self.value is None or self.previous is None:
+            return None
+        return self.value - self.previous
+
+class _KeyedSum:
+    """Sum over the latest value reported for each key"""
+    
+    def __init__(self):
+        self._values: Dict[str, float] = {}
+        self.total = 0.0
+    
+    def __len__(self) -> int:
+        return len(self._values)
+    
+    def update(self, keys: Iterable, values: Iterable[float]):
+        for key, value in zip(keys, values):
+            if key is None or value != value:
+                continue
+            self.total += value - self._values.get(key, 0.0)
+            self._values[key] = value
+
+@dataclass
+class _Day:
+    gauges: Dict[str, float] = field(default_factory=dict)
+    on_time: _KeyedSum = field(default_factory=_KeyedSum)
+    sold: _KeyedSum = field(default_factory=_KeyedSum)
+    seats: _KeyedSum = field(default_factory=_KeyedSum)
+    revenue: _KeyedSum = field(default_factory=_KeyedSum)
+    
+    def values(self, fleet_size: int) -> Dict[str, Optional[float]]:
+        in_maintenance = self.gauges.get(IN_MAINTENANCE)
+        return {
+            ACTIVE_FLIGHTS: self.gauges.get(ACTIVE_FLIGHTS),
+            ON_TIME: self.on_time.total / len(self.on_time) * 100 if len(self.on_time) else None,
+            LOAD_FACTOR: self.sold.total / self.seats.total * 100 if self.seats.total else None,
+            PASSENGERS: self.sold.total if len(self.sold) else None,
+            REVENUE: self.revenue.total if len(self.revenue) else None,
+            AIRCRAFT_AVAILABLE: fleet_size - in_maintenance if in_maintenance is not None else None,
+            SAFETY_SCORE: self.gauges.get(SAFETY_SCORE),
+        }
+
+def _flight_keys(frame: pd.DataFrame) -> np.ndarray:
+    column = 'Flight' if 'Flight' in frame else 'Flight ID'
+    return frame[column].astype(object).to_numpy() if column in frame else np.full(len(frame), None)
+
+def _numbers(frame: pd.DataFrame, column: str) -> np.ndarray:
+    if column not in frame:
+        return np.full(len(frame), np.nan)
+    return pd.to_numeric(frame[column], errors='coerce').to_numpy(dtype=float)
+
+def fold_flights(day: _Day, frame: pd.DataFrame):
+    if 'Status' in frame:
+        day.gauges[ACTIVE_FLIGHTS] = int(frame['Status'].astype(str).isin(ACTIVE_STATUSES).sum())
+    if 'On-Time' in frame:
+        on_time = frame['On-Time'].astype(str).str.lower().isin(ON_TIME_VALUES)
+        day.on_time.update(_flight_keys(frame), np.where(frame['On-Time'].isna(), np.nan, on_time))
+
+def fold_seats(day: _Day, frame: pd.DataFrame):
+    keys = _flight_keys(frame)
+    day.sold.update(keys, _numbers(frame, 'Sold'))
+    day.seats.update(keys, _numbers(frame, 'Total Seats'))
+    day.revenue.update(keys, _numbers(frame, 'Revenue Generated'))
+
+def fold_maintenance(day: _Day, frame: pd.DataFrame):
+    if 'Status' in frame and 'Aircraft' in frame:
+        day.gauges[IN_MAINTENANCE] = frame.loc[frame['Status'].astype(str) == 'In Progress', 'Aircraft'].nunique()
+
+def fold_safety(day: _Day, frame: pd.DataFrame):
+    scores = _numbers(frame, 'Safety Score')
+    if np.isfinite(scores).any():
+        day.gauges[SAFETY_SCORE] = float(np.nanmean(scores))
+
+# Stream -> how its snapshots update a day's totals
+FOLDERS: Dict[str, Callable[[_Day, pd.DataFrame], None]] = {
+    'flights': fold_flights,
+    'seats': fold_seats,
+    'maintenance': fold_maintenance,
+    'safety': fold_safety,
+}
+
+class KpiBoard:
+    """Today's and yesterday's running KPIs per airline"""
+    
+    def __init__(self, fleet_sizes: Dict[str, int]):
+        self.fleet_sizes = dict(fleet_sizes)
+        self._days: Dict[str, Dict[date, _Day]] = {}
+        # (airline, stream) -> last snapshot version folded in
+        self._versions: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+    
+    def apply(self, airline: str, stream: str, frame: pd.DataFrame, when: datetime, version: int = None) -> bool:
+        """Fold one snapshot into the totals of the day it was fetched.
+        
+        Returns False for versions already applied and for days older than yesterday.
+        """
+        if not isinstance(frame, pd.DataFrame):
+            return False
+        day_ = when.date()
+        with self._lock:
+            if version is not None and version <= self._versions.get((airline, stream), 0):
+                return False
+            days = self._days.setdefault(airline, {})
+            if day_ not in days:
+                if len(days) >= 2 and day_ < min(days):
+                    return False
+                days[day_] = _Day()
+                for old in sorted(days)[:-2]:
+                    del days[old]
+            FOLDERS[stream](days[day_], frame)
+            if version is not None:
+                self._versions[(airline, stream)] = version
+        return True
+    
+    def read(self, airline: str, today: date = None) -> Dict[str, Kpi]:
+        """KPI name -> today's value and yesterday's final value"""
+        today = today or date.today()
+        fleet_size = self.fleet_sizes.get(airline, 0)
+        with self._lock:
+            days = self._days.get(airline, {})
+            current = days[today].values(fleet_size) if today in days else _Day().values(fleet_size)
+            yesterday = today - timedelta(days=1)
+            previous = days[yesterday].values(fleet_size) if yesterday in days else {}
+        return {name: Kpi(value, previous.get(name)) for name, value in current.items()}
@@ -0,0 +1,249 @@
+"""
+Background feed polling and the snapshot store pages read from.
+
+One FeedPoller per process polls every registered feed on its own interval
+and publishes the result to a SnapshotStore as an immutable, versioned
+Snapshot. Page rendering only reads the latest snapshot, so UI latency no
+longer depends on upstream API latency.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+@dataclass(frozen=True)
+class Snapshot:
+    provider: str
+    version: int
+    fetched_at: datetime
+    data: Any
+    # True for snapshots loaded from disk at startup, until the first live poll replaces them
+    restored: bool = False
+    
+    @property
+    def age_seconds(self) -> float:
+        return (datetime.now() - self.fetched_at).total_seconds()
+
+class SnapshotStore:
+    """Latest snapshot per provider; published data must be treated as read-only"""
+    
+    def __init__(self):
+        self._latest: Dict[str, Snapshot] = {}
+        # Providers whose latest snapshot was adopted from another process
+        self._adopted: Set[str] = set()
+        self._changed = threading.Condition()
+        self._listeners: List[Callable[[Snapshot], None]] = []
+    
+    def subscribe(self, listener: Callable[[Snapshot], None]):
+        """Call listener(snapshot) after every new version is published"""
+        self._listeners.append(listener)
+    
+    def publish(self, provider: str, data: Any, fetched_at: datetime = None) -> Snapshot:
+        """Publish a new snapshot; the version only moves when the data changed"""
+        with self._changed:
+            previous = self._latest.get(provider)
+            if previous is not None and not previous.restored and _same_data(previous.data, data):
+                return previous
+            
+            snapshot = Snapshot(
+                provider=provider,
+                version=previous.version + 1 if previous else 1,
+                fetched_at=fetched_at or datetime.now(),
+                data=data,
+            )
+            self._latest[provider] = snapshot
+            self._adopted.discard(provider)
+            self._changed.notify_all()
+        
+        self._notify(snapshot)
+        return snapshot
+    
+    def adopt(self, snapshot: Snapshot) -> bool:
+        """Publish a snapshot versioned by another process, keeping its version.
+        
+        It replaces restored and locally published snapshots whatever their version, and
+        is ignored only when an adopted version at least as new is already there.
+        """
+        with self._changed:
+            previous = self._latest.get(snapshot.provider)
+            if previous is not None and snapshot.provider in self._adopted and previous.version >= snapshot.version:
+                return False
+            self._latest[snapshot.provider] = replace(snapshot, restored=False)
+            self._adopted.add(snapshot.provider)
+            self._changed.notify_all()
+        
+        self._notify(snapshot)
+        return True
+    
+    def _notify(self, snapshot: Snapshot):
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception:
+                logger.exception("Snapshot listener failed for %s v%d", snapshot.provider, snapshot.version)
+    
+    def restore(self, snapshot: Snapshot):
+        """Seed the store with a saved snapshot, marked restored; listeners are not called"""
+        with self._changed:
+            if snapshot.provider not in self._latest:
+                self._latest[snapshot.provider] = replace(snapshot, restored=True)
+                self._changed.notify_all()
+    
+    def latest(self, provider: str) -> Optional[Snapshot]:
+        with self._changed:
+            return self._latest.get(provider)
+    
+    def wait_for(self, provider: str, after_version: int = 0, timeout: float = None) -> Optional[Snapshot]:
+        """Block until a snapshot newer than after_version is published, or the timeout passes"""
+        with self._changed:
+            self._changed.wait_for(
+                lambda: provider in self._latest and self._latest[provider].version > after_version,
+                timeout=timeout,
+            )
+            return self._latest.get(provider)
+    
+    def versions(self) -> Dict[str, int]:
+        with self._changed:
+            return {provider: s.version for provider, s in self._latest.items()}
+
+def _same_data(old: Any, new: Any) -> bool:
+    if old is new:
+        return True
+    try:
+        return bool(old.equals(new))
+    except AttributeError:
+        return old == new
+
+@dataclass
+class Feed:
+    name: str
+    fetch: Callable[[], Any]
+    interval: float
+    polls: int = 0
+    failures: int = 0
+    last_polled: Optional[datetime] = None
+    last_error: Optional[str] = None
+    next_due: float = 0.0
+    running: bool = False
+    # requester -> (interval, lease expiry) for sessions asking for faster polling
+    requests: Dict[str, Tuple[float, float]] = field(default_factory=dict)
+
+class FeedPoller:
+    """Polls each feed on its own schedule and publishes snapshots"""
+    
+    def __init__(self, store: SnapshotStore, feeds: List[Feed], max_workers: int = 4):
+        self.store = store
+        self.feeds: Dict[str, Feed] = {feed.name: feed for feed in feeds}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="feed-poll")
+        self._wakeup = threading.Condition()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        """Start the scheduler thread; every feed is polled immediately"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="feed-poller", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stopped.set()
+        with self._wakeup:
+            self._wakeup.notify_all()
+        self._executor.shutdown(wait=False)
+    
+    def poll_now(self, name: str):
+        """Poll a feed on the next scheduler tick"""
+        with self._wakeup:
+            self.feeds[name].next_due = 0.0
+            self._wakeup.notify_all()
+    
+    def request_interval(self, name: str, seconds: float, requester: str, lease: float = 120.0):
+        """Ask for a feed to be polled at least every `seconds` for the next `lease` seconds.
+        
+        The effective interval is the fastest live request, or the feed default.
+        """
+        with self._wakeup:
+            feed = self.feeds[name]
+            now = time.monotonic()
+            previous = self.interval_for(name)
+            feed.requests = {r: req for r, req in feed.requests.items() if req[1] > now}
+            feed.requests[requester] = (seconds, now + lease)
+            if self.interval_for(name) < previous:
+                feed.next_due = min(feed.next_due, now + seconds)
+                self._wakeup.notify_all()
+    
+    def release_interval(self, name: str, requester: str):
+        with self._wakeup:
+            self.feeds[name].requests.pop(requester, None)
+    
+    def interval_for(self, name: str) -> float:
+        feed = self.feeds[name]
+        now = time.monotonic()
+        live = [seconds for seconds, expires in feed.requests.values() if expires > now]
+        return min([feed.interval] + live)
+    
+    def poll_once(self, name: str) -> Optional[Snapshot]:
+        """Poll one feed synchronously and publish the result"""
+        feed = self.feeds[name]
+        try:
+            data = feed.fetch()
+        except Exception as e:
+            feed.failures += 1
+            feed.last_error = str(e)
+            logger.warning("Feed %s poll failed: %s", name, e)
+            return None
+        finally:
+            feed.polls += 1
+            feed.last_polled = datetime.now()
+        
+        feed.last_error = None
+        return self.store.publish(name, data)
+    
+    def status(self) -> Dict[str, Dict]:
+        """Per-feed schedule and health for operators"""
+        versions = self.store.versions()
+        with self._wakeup:
+            return {
+                name: {
+                    'interval': self.interval_for(name),
+                    'polls': feed.polls,
+                    'failures': feed.failures,
+                    'last_polled': feed.last_polled,
+                    'last_error': feed.last_error,
+                    'version': versions.get(name, 0),
+                }
+                for name, feed in self.feeds.items()
+            }
+    
+    def _run(self):
+        while not self._stopped.is_set():
+            with self._wakeup:
+                now = time.monotonic()
+                due = [f for f in self.feeds.values() if not f.running and f.next_due <= now]
+                for feed in due:
+                    feed.running = True
+                    feed.next_due = now + self.interval_for(feed.name)
+                
+                pending = [f.next_due for f in self.feeds.values() if not f.running]
+            
+            for feed in due:
+                self._executor.submit(self._poll_and_release, feed)
+            
+            with self._wakeup:
+                timeout = max(0.0, min(pending) - time.monotonic()) if pending else 1.0
+                self._wakeup.wait(timeout=min(timeout, 1.0))
+    
+    def _poll_and_release(self, feed: Feed):
+        try:
+            self.poll_once(feed.name)
+        finally:
+            with self._wakeup:
+                feed.running = False
+                self._wakeup.notify_all()
@@ -0,0 +1,187 @@
+"""
+Reconciliation of FlightRadar24 and OpenSky snapshots into one flight-state table.
+
+Each feed is first normalized to the same columns and units. Rows are keyed
+by callsign in ICAO form (PK-301 and PIA301 are the same flight); rows
+without a callsign fall back to the key last seen for the same aircraft
+(registration or ICAO24), so both feeds land on one row per flight.
+
+Applying a snapshot only touches the rows it carries: keys are hash-joined
+against the table and, field by field, the newer observation wins while
+the older one fills gaps; only flights new to the table are appended.
+Rows that no feed has updated for a while expire: touched rows are checked
+on every apply, the whole table at most once per sweep interval.
+"""
+
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+STATE_COLUMNS = [
+    'Callsign', 'Flight', 'Registration', 'ICAO24', 'From', 'To', 'Latitude', 'Longitude',
+    'Altitude (ft)', 'Speed (knots)', 'Heading', 'Status', 'Passengers', 'Sources', 'Updated',
+]
+# Fixed column types, so merged rows can be written into the table in place
+STATE_DTYPES = {
+    **{column: object for column in ['Flight', 'Registration', 'ICAO24', 'From', 'To', 'Status', 'Sources']},
+    **{column: float for column in ['Latitude', 'Longitude', 'Altitude (ft)', 'Speed (knots)', 'Heading', 'Passengers']},
+    'Updated': 'datetime64[ns]',
+}
+
+FEET_PER_METRE = 3.28084
+KNOTS_PER_MS = 1.943844
+
+def normalize_callsign(values: pd.Series, iata_to_icao: Dict[str, str]) -> pd.Series:
+    """ICAO-style callsigns without padding or leading zeros: 'PK-001' -> 'PIA1', 'PIA301 ' -> 'PIA301'"""
+    text = values.astype('string').str.upper().str.replace(r'[\s\-]', '', regex=True)
+    parts = text.str.extract(r'^([A-Z]+?)0*(\d+[A-Z]?)$')
+    prefix = parts[0].replace(iata_to_icao)
+    normalized = (prefix + parts[1]).where(parts[1].notna(), text)
+    return normalized.where(normalized != '', pd.NA).astype(object)
+
+def _column(frame: pd.DataFrame, name: str, default=np.nan) -> pd.Series:
+    return frame[name] if name in frame else pd.Series(default, index=frame.index)
+
+def _local_time(values: pd.Series, fetched_at: datetime) -> pd.Series:
+    """Observation times as naive local time, the clock `fetched_at` and expiry use; blanks become fetched_at"""
+    times = pd.to_datetime(values)
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(datetime.now().astimezone().tzinfo).dt.tz_localize(None)
+    return times.fillna(pd.Timestamp(fetched_at))
+
+def normalize_flightradar(frame: pd.DataFrame, fetched_at: datetime, iata_to_icao: Dict[str, str]) -> pd.DataFrame:
+    """FlightRadar24 rows in STATE_COLUMNS form"""
+    flight = _column(frame, 'Flight', None).fillna(_column(frame, 'Flight ID', None))
+    return pd.DataFrame({
+        'Callsign': normalize_callsign(flight, iata_to_icao),
+        'Flight': flight,
+        'Registration': _column(frame, 'Aircraft', None),
+        'ICAO24': None,
+        'From': _column(frame, 'From', None),
+        'To': _column(frame, 'To', None),
+        'Latitude': _column(frame, 'Latitude'),
+        'Longitude': _column(frame, 'Longitude'),
+        'Altitude (ft)': _column(frame, 'Altitude (ft)'),
+        'Speed (knots)': _column(frame, 'Speed (knots)'),
+        'Heading': np.nan,
+        'Status': _column(frame, 'Status', None),
+        'Passengers': _column(frame, 'Passengers'),
+        'Sources': 'flightradar',
+        'Updated': _local_time(_column(frame, 'Last Update', fetched_at), fetched_at),
+    }).astype(STATE_DTYPES)
+
+def normalize_opensky(frame: pd.DataFrame, fetched_at: datetime, iata_to_icao: Dict[str, str]) -> pd.DataFrame:
+    """OpenSky rows in STATE_COLUMNS form; live state vectors are converted from metres and m/s"""
+    live = 'Velocity' in frame
+    altitude = _column(frame, 'Altitude').astype(float)
+    seen = _column(frame, 'Timestamp' if live else 'Last Update', fetched_at)
+    return pd.DataFrame({
+        'Callsign': normalize_callsign(_column(frame, 'Callsign', None), iata_to_icao),
+        'Flight': None,
+        'Registration': _column(frame, 'Aircraft ID', None),
+        'ICAO24': _column(frame, 'ICAO', None),
+        'From': None,
+        'To': None,
+        'Latitude': _column(frame, 'Latitude'),
+        'Longitude': _column(frame, 'Longitude'),
+        'Altitude (ft)': altitude * FEET_PER_METRE if live else altitude,
+        'Speed (knots)': _column(frame, 'Velocity') * KNOTS_PER_MS if live else _column(frame, 'Speed'),
+        'Heading': _column(frame, 'Heading'),
+        # Transponders say nothing about the flight's status beyond being airborne
+        'Status': np.where(altitude > 0, 'In Flight', None),
+        'Passengers': np.nan,
+        'Sources': 'opensky',
+        'Updated': _local_time(seen, fetched_at),
+    }).astype(STATE_DTYPES)
+
+NORMALIZERS: Dict[str, Callable[[pd.DataFrame, datetime, Dict[str, str]], pd.DataFrame]] = {
+    'flightradar': normalize_flightradar,
+    'opensky': normalize_opensky,
+}
+
+class FlightStateTable:
+    """Deduplicated latest state per flight, merged from every position feed"""
+    
+    def __init__(self, iata_to_icao: Dict[str, str], expire_after: timedelta = timedelta(minutes=30),
+                 sweep_every: timedelta = timedelta(minutes=1)):
+        self.iata_to_icao = dict(iata_to_icao)
+        self.expire_after = expire_after
+        self.sweep_every = sweep_every
+        self._swept = datetime.min
+        self._table = pd.DataFrame(columns=STATE_COLUMNS[1:], index=pd.Index([], name='Callsign')).astype(STATE_DTYPES)
+        # Aircraft identity (registration or ICAO24) -> flight key it was last seen under
+        self._aliases: Dict[str, str] = {}
+        # Feed -> last snapshot version applied
+        self.versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self._table)
+    
+    def apply(self, source: str, frame: pd.DataFrame, fetched_at: datetime, version: int = None) -> bool:
+        """Merge one feed snapshot into the table, touching only the flights it contains.
+        
+        Returns False when this version of the feed was already applied.
+        """
+        incoming = NORMALIZERS[source](frame, fetched_at, self.iata_to_icao)
+        
+        with self._lock:
+            if version is not None and version <= self.versions.get(source, 0):
+                return False
+            identity = incoming['Registration'].fillna(incoming['ICAO24']).astype(object)
+            # Looked up per row: mapping with the dict would first turn every alias into a Series
+            aliased = pd.Series([self._aliases.get(i) for i in identity], index=identity.index, dtype=object)
+            keys = incoming['Callsign'].fillna(aliased).fillna(identity)
+            incoming = incoming.drop(columns='Callsign').set_axis(pd.Index(keys, name='Callsign'))
+            incoming = incoming[incoming.index.notna()].sort_values('Updated')
+            incoming = incoming[~incoming.index.duplicated(keep='last')]
+            known = identity.notna() & keys.notna()
+            self._aliases.update(zip(identity[known], keys[known]))
+            
+            table = self._table
+            # Rows first seen without a callsign were keyed by aircraft; move them to the flight key
+            rekeyed = known & (keys != identity) & (table.index.get_indexer(identity) >= 0)
+            if rekeyed.any():
+                moved = table.loc[identity[rekeyed].to_numpy()].set_axis(pd.Index(keys[rekeyed], name='Callsign'))
+                table = table.drop(index=identity[rekeyed].unique())
+                moved = moved[~moved.index.duplicated(keep='last') & ~moved.index.isin(table.index)]
+                table = pd.concat([table, moved])
+            common = incoming.index.intersection(table.index)
+            if len(common):
+                old, new = table.loc[common], incoming.loc[common]
+                # Last writer wins field by field; the older row only fills fields the newer one lacks
+                newer = new['Updated'] >= old['Updated']
+                merged = new.combine_first(old).where(newer, old.combine_first(new), axis=0)
+                seen_before = old['Sources'].str.contains(source, regex=False)
+                merged['Sources'] = old['Sources'].where(seen_before, old['Sources'] + '+' + source)
+                merged['Updated'] = np.maximum(new['Updated'], old['Updated'])
+                # Known flights are updated in place instead of rebuilding the table
+                table.loc[common, table.columns] = merged[table.columns]
+            added = incoming.index.difference(common)
+            if len(added):
+                added = incoming.loc[added, table.columns]
+                table = pd.concat([table, added]) if len(table) else added.copy()
+            
+            now = datetime.now()
+            horizon = pd.Timestamp(now - self.expire_after)
+            if now - self._swept >= self.sweep_every:
+                table = table[table['Updated'] >= horizon]
+                self._swept = now
+            else:
+                touched = table.loc[incoming.index, 'Updated']
+                stale = touched.index[touched < horizon]
+                if len(stale):
+                    table = table.drop(index=stale)
+            self._table = table
+            if version is not None:
+                self.versions[source] = version
+        return True
+    
+    def frame(self) -> pd.DataFrame:
+        """The current table, most recently updated flights first"""
+        with self._lock:
+            # Sorting copies, so callers never see rows apply() updates in place
+            return self._table.sort_values('Updated', ascending=False).reset_index()
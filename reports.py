@@ -0,0 +1,268 @@
+"""
+Background jobs building multi-dataset operations reports.
+
+Reports are built in a separate process pool: the worker reads the period
+straight from the Parquet archive, reduces each dataset to its closing state
+per day (the archive keeps every snapshot), and writes a multi-sheet Excel
+workbook and/or a plain-text PDF. The Streamlit process only submits specs
+and tracks progress, so large fleet-wide reports neither block pages nor
+load their data into the web process.
+
+Identical requests share one job, and finished files are kept on disk
+under the request's key until the retention limit removes them.
+"""
+
+import hashlib
+import io
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from archive import SnapshotArchive
+
+logger = logging.getLogger(__name__)
+
+# Archived dataset -> column identifying one row of its closing state; feeds that are
+# not archived (weather, safety alerts) are passed to the job as current snapshots
+REPORT_DATASETS = {
+    'flights': 'Flight',
+    'seats': 'Flight',
+    'maintenance': 'Aircraft',
+    'flight_safety': 'Aircraft',
+}
+
+REPORT_FORMATS = ('xlsx', 'pdf')
+
+EXCEL_MAX_ROWS = 1_048_575
+
+@dataclass(frozen=True)
+class ReportSpec:
+    airlines: Tuple[str, ...]
+    start: date
+    # Exclusive
+    end: date
+    formats: Tuple[str, ...] = REPORT_FORMATS
+
+@dataclass
+class ReportJob:
+    key: str
+    spec: ReportSpec
+    state: str = 'queued'
+    progress: float = 0.0
+    message: str = "Waiting for a worker"
+    files: Dict[str, str] = field(default_factory=dict)
+    error: Optional[str] = None
+    submitted: datetime = field(default_factory=datetime.now)
+
+# Progress queue of the worker process, set by _init_worker
+_progress = None
+
+def _init_worker(progress):
+    global _progress
+    _progress = progress
+
+def _report_progress(key: str, progress: float, message: str):
+    if _progress is not None:
+        _progress.put((key, progress, message))
+
+def closing_state(frame: pd.DataFrame, key_column: str) -> pd.DataFrame:
+    """Last archived row per airline, day and key: the state each day closed with"""
+    if frame.empty or 'Time' not in frame:
+        return frame
+    day = pd.to_datetime(frame['Time']).dt.normalize()
+    keys = ['airline', 'Day', key_column] if key_column in frame else ['airline', 'Day']
+    frame = frame.assign(Day=day).sort_values('Time', kind='stable')
+    return frame.drop_duplicates(keys, keep='last').drop(columns=['date'], errors='ignore').reset_index(drop=True)
+
+def build_report(key: str, spec: ReportSpec, archive_root: str, output_dir: str,
+                 extras: Dict[str, pd.DataFrame]) -> Dict[str, str]:
+    """Read the period from the archive and write the requested report files; runs in a worker process"""
+    archive = SnapshotArchive(archive_root)
+    start = datetime.combine(spec.start, datetime.min.time())
+    end = datetime.combine(spec.end, datetime.min.time())
+    
+    frames: Dict[str, pd.DataFrame] = {}
+    for i, (dataset, key_column) in enumerate(REPORT_DATASETS.items()):
+        _report_progress(key, 0.6 * i / len(REPORT_DATASETS), f"Reading {dataset}")
+        frames[dataset] = closing_state(archive.query(dataset, start, end, airlines=list(spec.airlines)), key_column)
+    frames.update(extras)
+    summary = pd.DataFrame([
+        {'Dataset': name, 'Rows': len(frame),
+         'Airlines': ', '.join(sorted(map(str, frame['airline'].unique()))) if 'airline' in frame else ', '.join(spec.airlines)}
+        for name, frame in frames.items()
+    ])
+    
+    files = {}
+    output = Path(output_dir)
+    for i, fmt in enumerate(spec.formats):
+        _report_progress(key, 0.6 + 0.4 * i / len(spec.formats), f"Writing {fmt.upper()}")
+        path = output / f"{key}.{fmt}"
+        tmp = output / f".{key}.{fmt}.tmp"
+        tmp.write_bytes(excel_report(summary, frames) if fmt == 'xlsx' else pdf_report(spec, summary, frames))
+        os.replace(tmp, path)
+        files[fmt] = str(path)
+    _report_progress(key, 1.0, "Done")
+    return files
+
+def excel_report(summary: pd.DataFrame, frames: Dict[str, pd.DataFrame]) -> bytes:
+    """Workbook with a summary sheet and one sheet per dataset (split when over Excel's row limit)"""
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        summary.to_excel(writer, sheet_name='Summary', index=False)
+        for name, frame in frames.items():
+            # Excel stores neither timezones nor categories
+            frame = frame.astype({c: str for c in frame.columns if isinstance(frame[c].dtype, pd.CategoricalDtype)})
+            frame = frame.assign(**{c: frame[c].dt.tz_localize(None) for c in frame.columns
+                                    if isinstance(frame[c].dtype, pd.DatetimeTZDtype)})
+            for part, first in enumerate(range(0, max(len(frame), 1), EXCEL_MAX_ROWS)):
+                sheet = name if part == 0 else f"{name} ({part + 1})"
+                frame.iloc[first:first + EXCEL_MAX_ROWS].to_excel(writer, sheet_name=sheet[:31], index=False)
+    return buffer.getvalue()
+
+# Lines and characters that fit a landscape A4 page in 7pt Courier
+PDF_LINES_PER_PAGE = 70
+PDF_LINE_WIDTH = 185
+PDF_ROWS_PER_DATASET = 200
+
+def pdf_report(spec: ReportSpec, summary: pd.DataFrame, frames: Dict[str, pd.DataFrame]) -> bytes:
+    """Plain-text PDF: summary, then the latest closing state of each dataset"""
+    lines = [
+        f"Operations report: {', '.join(spec.airlines)}",
+        f"Period: {spec.start:%Y-%m-%d} to {spec.end - timedelta(days=1):%Y-%m-%d}",
+        f"Generated: {datetime.now():%Y-%m-%d %H:%M}",
+        "",
+        summary.to_string(index=False),
+    ]
+    for name, frame in frames.items():
+        latest = frame[frame['Day'] == frame['Day'].max()] if 'Day' in frame and len(frame) else frame
+        shown = latest.drop(columns=['Day'], errors='ignore').head(PDF_ROWS_PER_DATASET)
+        lines += ["", "", f"{name} - latest day ({len(latest)} rows, first {len(shown)} shown)", ""]
+        lines.append(shown.to_string(index=False, max_colwidth=30) if len(shown) else "No data for this period.")
+    text = [line[:PDF_LINE_WIDTH] for block in lines for line in str(block).splitlines() or [""]]
+    pages = [text[i:i + PDF_LINES_PER_PAGE] for i in range(0, max(len(text), 1), PDF_LINES_PER_PAGE)]
+    return pdf_document(pages)
+
+def pdf_document(pages: List[List[str]], font_size: float = 7.0) -> bytes:
+    """Minimal PDF with one text page per list of lines, in a built-in Courier font"""
+    width, height, margin = 842, 595, 30
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier >>"]
+    kids = []
+    for lines in pages:
+        escaped = [line.encode('latin-1', 'replace').replace(b'\\', b'\\\\').replace(b'(', b'\\(').replace(b')', b'\\)')
+                   for line in lines]
+        stream = (b"BT /F1 %.1f Tf %.1f TL %d %d Td " % (font_size, font_size * 1.15, margin, height - margin)
+                  + b" ".join(b"(" + line + b") Tj T*" for line in escaped) + b" ET")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>"
+                       % (width, height, len(objects)))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+    
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(out.tell())
+        out.write(b"%d 0 obj\n" % number + body + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1))
+    out.write(b"".join(b"%010d 00000 n \n" % offset for offset in offsets))
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref))
+    return out.getvalue()
+
+class ReportQueue:
+    """Process pool building reports, with progress, request deduplication and an on-disk artifact cache"""
+    
+    def __init__(self, archive_root: str, output_dir: str, workers: int = 2,
+                 retention: timedelta = timedelta(days=7), max_files: int = 50):
+        self.archive_root = archive_root
+        self.output_dir = Path(output_dir)
+        self.retention = retention
+        self.max_files = max_files
+        self._jobs: Dict[str, ReportJob] = {}
+        self._lock = threading.Lock()
+        # Spawned workers start clean instead of forking the threads of the web process
+        context = multiprocessing.get_context('spawn')
+        self._progress = context.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                         initializer=_init_worker, initargs=(self._progress,))
+        threading.Thread(target=self._drain_progress, name="report-progress", daemon=True).start()
+    
+    @staticmethod
+    def key(spec: ReportSpec, now: datetime = None) -> str:
+        """Identical requests share a key; periods reaching today also change key every hour as data arrives"""
+        now = now or datetime.now()
+        as_of = f"{now:%Y-%m-%dT%H}" if spec.end > now.date() else ""
+        text = "|".join([",".join(sorted(spec.airlines)), spec.start.isoformat(), spec.end.isoformat(),
+                         ",".join(spec.formats), as_of])
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+    
+    def submit(self, spec: ReportSpec, extras: Dict[str, pd.DataFrame] = None) -> ReportJob:
+        """Queue a report, or return the job (running or finished) of an identical request"""
+        key = self.key(spec)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state in ('queued', 'running'):
+                return job
+            if job is not None and job.state == 'done' and all(Path(p).exists() for p in job.files.values()):
+                return job
+            # Files left by an earlier process are reused as they are
+            cached = {fmt: self.output_dir / f"{key}.{fmt}" for fmt in spec.formats}
+            if all(path.exists() for path in cached.values()):
+                job = ReportJob(key, spec, state='done', progress=1.0, message="Cached",
+                                files={fmt: str(path) for fmt, path in cached.items()})
+                self._jobs[key] = job
+                return job
+            job = self._jobs[key] = ReportJob(key, spec)
+        
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        future = self._pool.submit(build_report, key, spec, self.archive_root, str(self.output_dir), extras or {})
+        future.add_done_callback(lambda f: self._finish(key, f))
+        return job
+    
+    def _finish(self, key: str, future: Future):
+        with self._lock:
+            job = self._jobs[key]
+            try:
+                job.files = future.result()
+                job.state, job.progress, job.message = 'done', 1.0, "Done"
+            except Exception as e:
+                logger.warning("Report %s failed: %s", key, e)
+                job.state, job.error, job.message = 'failed', str(e), "Failed"
+        self.prune()
+    
+    def _drain_progress(self):
+        while True:
+            try:
+                key, progress, message = self._progress.get()
+            except (EOFError, OSError):
+                return
+            with self._lock:
+                job = self._jobs.get(key)
+                if job is not None and job.state in ('queued', 'running'):
+                    job.state, job.progress, job.message = 'running', progress, message
+    
+    def jobs(self) -> List[ReportJob]:
+        """Every job of this process, newest first"""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.submitted, reverse=True)
+    
+    def prune(self):
+        """Delete report files past the retention period, then the oldest beyond max_files"""
+        if not self.output_dir.exists():
+            return
+        files = sorted(self.output_dir.glob("*.*"), key=lambda p: p.stat().st_mtime, reverse=True)
+        horizon = time.time() - self.retention.total_seconds()
+        for i, path in enumerate(files):
+            if path.name.startswith('.') or (i < self.max_files and path.stat().st_mtime >= horizon):
+                continue
+            path.unlink(missing_ok=True)
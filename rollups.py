@@ -0,0 +1,208 @@
+"""
+Materialized hourly and daily rollups of seat sales and flights.
+
+Rollup rows are keyed by (airline, time bucket, route, aircraft) and hold
+summed measures: seats sold, seat capacity, revenue, passengers and flights.
+Each flight contributes its latest observation per bucket, so a snapshot
+repeating the same flight replaces that flight's contribution instead of
+double counting it.
+
+A batch of rows (one live snapshot, or months of archived ones) only
+re-aggregates the buckets it touches: contributions and rollup rows are
+kept per (airline, bucket), so other buckets are not copied. Late rows land
+in their own bucket and win over what is stored only if they are newer.
+Contributions are kept while a bucket can still receive late data, judged
+against the newest row of the same airline at the same level; after that
+its totals are frozen and only the rollup rows remain, up to each level's
+retention.
+"""
+
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Rollup level -> pandas frequency of its time buckets
+LEVELS = {'hour': 'h', 'day': 'D'}
+
+MEASURES = ['Sold', 'Total Seats', 'Revenue', 'Passengers', 'Flights']
+DIMENSIONS = ['Airline', 'Bucket', 'Route', 'Aircraft']
+# One contribution per flight per bucket and source
+CONTRIBUTION_KEY = ['Airline', 'Bucket', 'Source', 'Flight']
+CONTRIBUTION_COLUMNS = CONTRIBUTION_KEY + ['Time', 'Route', 'Aircraft'] + MEASURES
+
+UNKNOWN = 'Unknown'
+
+def _text(frame: pd.DataFrame, column: str) -> pd.Series:
+    values = frame[column] if column in frame else pd.Series(None, index=frame.index, dtype=object)
+    return values.astype(object).where(values.notna(), UNKNOWN)
+
+def _number(frame: pd.DataFrame, column: str) -> pd.Series:
+    if column not in frame:
+        return pd.Series(np.nan, index=frame.index)
+    return pd.to_numeric(frame[column], errors='coerce').astype(float)
+
+def seat_contributions(frame: pd.DataFrame) -> pd.DataFrame:
+    """Seat snapshot rows as Flight, Route and seat measures"""
+    return pd.DataFrame({
+        'Flight': _text(frame, 'Flight'),
+        'Route': _text(frame, 'Route'),
+        'Sold': _number(frame, 'Sold'),
+        'Total Seats': _number(frame, 'Total Seats'),
+        'Revenue': _number(frame, 'Revenue Generated'),
+    })
+
+def flight_contributions(frame: pd.DataFrame) -> pd.DataFrame:
+    """Flight snapshot rows as Flight, Route (From-To), Aircraft and passenger measures"""
+    flight = frame['Flight'] if 'Flight' in frame else _text(frame, 'Flight ID')
+    return pd.DataFrame({
+        'Flight': flight.astype(object),
+        'Route': _text(frame, 'From').astype(str) + '-' + _text(frame, 'To').astype(str),
+        'Aircraft': _text(frame, 'Aircraft'),
+        'Passengers': _number(frame, 'Passengers'),
+        'Flights': 1.0,
+    })
+
+# Source -> how its frames become contributions
+CONTRIBUTORS: Dict[str, Callable[[pd.DataFrame], pd.DataFrame]] = {
+    'seats': seat_contributions,
+    'flights': flight_contributions,
+}
+
+# Open buckets are stored per airline and bucket start
+BucketKey = Tuple[str, pd.Timestamp]
+
+@dataclass
+class _Level:
+    freq: str
+    retention: timedelta
+    # Airline -> newest row time folded into this level
+    latest: Dict[str, pd.Timestamp] = field(default_factory=dict)
+    # Latest observation per flight in buckets that can still receive late data
+    contributions: Dict[BucketKey, pd.DataFrame] = field(default_factory=dict)
+    # Rollup rows of those buckets, and of the buckets that are past the late window
+    open: Dict[BucketKey, pd.DataFrame] = field(default_factory=dict)
+    frozen: pd.DataFrame = field(default_factory=lambda: pd.DataFrame(columns=DIMENSIONS + MEASURES))
+    # All rollup rows, rebuilt on the first query after a merge
+    cached: Optional[pd.DataFrame] = None
+    
+    def rollup(self) -> pd.DataFrame:
+        if self.cached is None:
+            frames = [frame for frame in [self.frozen, *self.open.values()] if len(frame)]
+            self.cached = pd.concat(frames, ignore_index=True) if frames else self.frozen
+        return self.cached
+
+def _totals(contributions: pd.DataFrame) -> pd.DataFrame:
+    return contributions.groupby(DIMENSIONS, observed=True)[MEASURES].sum(min_count=1).reset_index()
+
+class RollupStore:
+    """Hourly and daily rollups per airline, route and aircraft"""
+    
+    def __init__(self, late_window: timedelta = timedelta(hours=48), retention: Dict[str, timedelta] = None):
+        self.late_window = late_window
+        retention = retention or {'hour': timedelta(days=90), 'day': timedelta(days=730)}
+        self._levels = {name: _Level(freq, retention[name]) for name, freq in LEVELS.items()}
+        # Airline -> flight -> aircraft it last flew on, to place seat sales on an aircraft
+        self._aircraft: Dict[str, Dict[str, str]] = {}
+        self.aircraft_types: Dict[str, str] = {}
+        self.version = 0
+        self._lock = threading.Lock()
+    
+    def apply(self, airline: str, source: str, frame: pd.DataFrame, when: datetime = None, backfill: bool = False) -> int:
+        """Fold seat or flight rows into the rollups; returns how many buckets were re-aggregated.
+        
+        Rows are timed by their 'Time' column when present (archived snapshots), otherwise by `when`.
+        A backfill adds rows to buckets past the late window instead of dropping them; each
+        archived row must be backfilled only once.
+        """
+        if not isinstance(frame, pd.DataFrame) or frame.empty:
+            return 0
+        rows = CONTRIBUTORS[source](frame)
+        times = pd.to_datetime(frame['Time']) if 'Time' in frame else pd.Series(pd.Timestamp(when or datetime.now()), index=frame.index)
+        rows = rows.assign(Airline=airline, Source=source, Time=times.astype('datetime64[ns]').to_numpy())
+        rows = rows[rows['Flight'] != UNKNOWN]
+        
+        with self._lock:
+            aircraft = self._aircraft.setdefault(airline, {})
+            if source == 'flights':
+                latest = rows.sort_values('Time').drop_duplicates('Flight', keep='last')
+                aircraft.update(zip(latest['Flight'], latest['Aircraft']))
+            else:
+                rows = rows.assign(Aircraft=rows['Flight'].map(aircraft).fillna(UNKNOWN))
+            
+            touched = sum(self._merge(level, airline, rows, backfill) for level in self._levels.values())
+            if touched:
+                self.version += 1
+        return touched
+    
+    def _merge(self, level: _Level, airline: str, rows: pd.DataFrame, backfill: bool) -> int:
+        """Re-aggregate the buckets of one level that one airline's rows fall in"""
+        # Buckets older than the late window are frozen; data that late is dropped
+        latest = level.latest.get(airline)
+        if latest is not None and not backfill:
+            rows = rows[rows['Time'] >= latest - self.late_window]
+        if rows.empty:
+            return 0
+        latest = level.latest[airline] = max(latest, rows['Time'].max()) if latest is not None else rows['Time'].max()
+        
+        # Only the stored contributions of the buckets the rows fall in are merged
+        rows = rows.assign(Bucket=rows['Time'].dt.floor(level.freq))
+        buckets = [(airline, pd.Timestamp(bucket)) for bucket in rows['Bucket'].unique()]
+        stored = [level.contributions[key] for key in buckets if key in level.contributions]
+        rows = rows.reindex(columns=CONTRIBUTION_COLUMNS)
+        contributions = pd.concat(stored + [rows], ignore_index=True) if stored else rows
+        # Newest observation per flight and bucket wins, whichever order rows arrive in
+        contributions = contributions.sort_values('Time', kind='stable').drop_duplicates(CONTRIBUTION_KEY, keep='last')
+        for bucket, frame in contributions.groupby('Bucket', sort=False):
+            level.contributions[(airline, bucket)] = frame.reset_index(drop=True)
+        for bucket, frame in _totals(contributions).groupby('Bucket', sort=False):
+            level.open[(airline, bucket)] = frame.reset_index(drop=True)
+        
+        # Buckets leaving the late window keep their rollup rows and drop their contributions
+        cutoff = (latest - self.late_window).floor(level.freq)
+        closing = [key for key in level.open if key[0] == airline and key[1] < cutoff]
+        if closing:
+            frozen = [level.open.pop(key) for key in closing]
+            for key in closing:
+                level.contributions.pop(key, None)
+            frozen = pd.concat([level.frozen, *frozen] if len(level.frozen) else frozen, ignore_index=True)
+            expired = (frozen['Airline'] == airline) & (frozen['Bucket'] < latest - level.retention)
+            level.frozen = frozen[~expired.to_numpy()].reset_index(drop=True)
+        level.cached = None
+        return len(buckets)
+    
+    def set_aircraft_types(self, frame: pd.DataFrame):
+        """Remember the type of each registration listed in a maintenance snapshot"""
+        if isinstance(frame, pd.DataFrame) and {'Aircraft', 'Aircraft Type'} <= set(frame.columns):
+            with self._lock:
+                self.aircraft_types.update(zip(frame['Aircraft'].astype(str), frame['Aircraft Type'].astype(str)))
+    
+    def query(self, level: str = 'hour', airline: str = None, start: datetime = None, end: datetime = None,
+              by: Iterable[str] = ('Bucket', 'Route')) -> pd.DataFrame:
+        """Rollup rows of [start, end) summed per `by`, with 'Load Factor %'.
+        
+        `by` may name any of Bucket, Route, Aircraft and Aircraft Type; leaving Bucket
+        out sums over the whole period.
+        """
+        with self._lock:
+            rollup = self._levels[level].rollup()
+            types = dict(self.aircraft_types)
+        mask = np.ones(len(rollup), dtype=bool)
+        if airline is not None:
+            mask &= (rollup['Airline'] == airline).to_numpy()
+        if start is not None:
+            mask &= (rollup['Bucket'] >= pd.Timestamp(start)).to_numpy()
+        if end is not None:
+            mask &= (rollup['Bucket'] < pd.Timestamp(end)).to_numpy()
+        rollup = rollup[mask]
+        
+        by = list(by)
+        if 'Aircraft Type' in by:
+            rollup = rollup.assign(**{'Aircraft Type': rollup['Aircraft'].map(types).fillna(UNKNOWN)})
+        result = rollup.groupby(by, observed=True)[MEASURES].sum(min_count=1).reset_index()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            load_factor = result['Sold'].to_numpy(dtype=float) / result['Total Seats'].to_numpy(dtype=float) * 100
+        return result.assign(**{'Load Factor %': np.where(np.isfinite(load_factor), load_factor, np.nan)})
@@ -0,0 +1,149 @@
+"""
+Per-provider request scheduling: request coalescing and token-bucket budgets.
+
+Identical requests made at the same time share one upstream call
+("singleflight"). Every upstream request, retries included, must take a
+token from its provider's bucket; callers wait up to a short deadline for
+one and are shed with RateLimitedError after that, so callers can serve
+cached data instead. A provider's Retry-After defers its bucket, so no
+caller is admitted before the provider is ready again.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+class CallSkipped(Exception):
+    """An upstream call was skipped without contacting the provider"""
+
+class RateLimitedError(CallSkipped):
+    """Raised when a provider's request budget is exhausted"""
+    
+    def __init__(self, provider: str, retry_in: float = None):
+        message = f"{provider} request budget exhausted"
+        super().__init__(message if retry_in is None else f"{message}, retry in {retry_in:.0f}s")
+        self.provider = provider
+        self.retry_in = retry_in
+
+class TokenBucket:
+    """Refills `rate` tokens per second up to `burst`"""
+    
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    def acquire(self, timeout: float = 0.0) -> bool:
+        """Take one token, waiting up to `timeout` seconds for a refill"""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate if self.rate > 0 else float('inf')
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+    
+    def defer(self, seconds: float):
+        """Grant no token for the next `seconds`"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 1 - seconds * self.rate)
+    
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+class SingleFlight:
+    """Runs one call per key at a time; concurrent callers share its outcome"""
+    
+    def __init__(self):
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+    
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (result, shared); shared is True when another caller did the work"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        
+        if call.error is not None:
+            raise call.error
+        return call.result, not leader
+
+class ProviderScheduler:
+    """Coalesces identical requests and enforces a token budget per provider"""
+    
+    def __init__(self, limits: Dict[str, Tuple[float, int]], max_wait: float = 2.0):
+        # limits: provider -> (requests per minute, burst)
+        self.buckets = {provider: TokenBucket(per_minute / 60.0, burst) for provider, (per_minute, burst) in limits.items()}
+        self.max_wait = max_wait
+        self._flight = SingleFlight()
+        self._counters: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+    
+    def run(self, provider: str, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn for (provider, key), sharing an in-flight call; fn spends a token per request with admit()"""
+        result, shared = self._flight.do((provider, key), fn)
+        if shared:
+            self._count(provider, 'coalesced')
+        return result
+    
+    def admit(self, provider: str):
+        """Take one token of the provider's budget, or raise RateLimitedError after max_wait"""
+        bucket = self.buckets.get(provider)
+        if bucket is not None and not bucket.acquire(timeout=self.max_wait):
+            self._count(provider, 'shed')
+            raise RateLimitedError(provider)
+        self._count(provider, 'admitted')
+    
+    def defer(self, provider: str, seconds: float):
+        """Admit no request to the provider for `seconds`, e.g. after a 429 with Retry-After"""
+        bucket = self.buckets.get(provider)
+        if bucket is not None:
+            bucket.defer(seconds)
+    
+    def _count(self, provider: str, name: str):
+        with self._lock:
+            counters = self._counters.setdefault(provider, {'admitted': 0, 'coalesced': 0, 'shed': 0})
+            counters[name] += 1
+    
+    def status(self) -> Dict[str, Dict]:
+        """Admitted/coalesced/shed counts and remaining tokens per provider"""
+        with self._lock:
+            counters = {provider: dict(c) for provider, c in self._counters.items()}
+        for provider, bucket in self.buckets.items():
+            counters.setdefault(provider, {'admitted': 0, 'coalesced': 0, 'shed': 0})['tokens'] = round(bucket.tokens, 2)
+        return counters
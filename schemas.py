@@ -0,0 +1,78 @@
+"""
+Typed column schemas for provider frames.
+
+Every feed frame is coerced once at ingest: money and percentage columns
+become numbers (strings like '$35,760' or '✅ 99%' are parsed here),
+low-cardinality text becomes categorical, and date columns become
+datetimes. Pages format values only at display time.
+"""
+
+from typing import Dict
+
+import pandas as pd
+
+# Numeric columns whose source values may carry currency or percent decoration
+MONEY = 'money'
+PERCENT = 'percent'
+
+FEED_SCHEMAS: Dict[str, Dict[str, str]] = {
+    'flightradar': {
+        'From': 'category', 'To': 'category', 'Status': 'category', 'On-Time': 'category',
+        'Altitude (ft)': 'int64', 'Speed (knots)': 'int64', 'Passengers': 'int64',
+        'Last Update': 'datetime64[ns]',
+    },
+    'opensky': {
+        'Type': 'category', 'Status': 'category', 'Location': 'category', 'Country': 'category', 'Airline': 'category',
+        'Last Update': 'datetime64[ns]',
+    },
+    'weather': {
+        'City': 'category', 'Conditions': 'category',
+        'Temperature (°C)': 'float64', 'Humidity (%)': 'float64', 'Wind Speed (km/h)': 'float64',
+        'Last Update': 'datetime64[ns]',
+    },
+    'seats': {
+        'Route': 'category', 'Status': 'category',
+        'Total Seats': 'int64', 'Sold': 'int64', 'Available': 'int64', 'Economy Sold': 'int64', 'Business Sold': 'int64',
+        'Load Factor %': 'float64', 'Revenue Generated': MONEY,
+    },
+    'maintenance': {
+        'Aircraft Type': 'category', 'Maintenance Type': 'category', 'Status': 'category',
+        'Scheduled Date': 'datetime64[ns]', 'Last Completed': 'datetime64[ns]',
+        'Estimated Duration (hrs)': 'int64', 'Critical Issues': 'int64', 'Cost ($)': MONEY,
+    },
+    'safety_alerts': {
+        'Severity': 'category', 'Action Required': 'category', 'Status': 'category',
+        'Reported': 'datetime64[ns]',
+    },
+    'flight_safety': {
+        'Route': 'category', 'Incidents': 'category', 'Maintenance Issues': 'category',
+        'On-Time Performance': 'category', 'Flight Hours': 'float64', 'Safety Score': PERCENT,
+        'Passenger Complaints': 'int64',
+    },
+}
+
+def apply_schema(frame: pd.DataFrame, feed: str) -> pd.DataFrame:
+    """Return the frame with its feed's column types applied; unknown columns are left alone"""
+    schema = FEED_SCHEMAS.get(feed)
+    if schema is None or not isinstance(frame, pd.DataFrame):
+        return frame
+    
+    typed = {}
+    for column, dtype in schema.items():
+        if column not in frame:
+            continue
+        values = frame[column]
+        if dtype in (MONEY, PERCENT):
+            if not pd.api.types.is_numeric_dtype(values):
+                values = pd.to_numeric(values.astype(str).str.replace(r'[^0-9.\-]', '', regex=True), errors='coerce')
+            typed[column] = values.astype('float64')
+        elif dtype == 'category':
+            typed[column] = values.astype('category')
+        elif dtype.startswith('datetime64'):
+            typed[column] = pd.to_datetime(values, errors='coerce').astype(dtype)
+        elif str(values.dtype) != dtype:
+            numeric = pd.to_numeric(values, errors='coerce')
+            # Missing values cannot live in a plain int column
+            typed[column] = numeric.astype(dtype) if not numeric.isna().any() else numeric.astype('float64')
+    
+    return frame.assign(**typed) if typed else frame
@@ -0,0 +1,238 @@
+"""
+Cross-process snapshot store for several app workers on one machine.
+
+One worker, the leader (whoever holds an exclusive lock on the directory),
+polls the upstream feeds. Every snapshot it publishes is written as an
+uncompressed Arrow IPC file, <dir>/<feed key>.arrow, with the provider,
+version and fetch time in the schema metadata. The file is written beside
+the old one and swapped in with a rename, so readers see either the
+previous version or the new one, never a partial file.
+
+The other workers follow: they map changed files and adopt the snapshots
+into their own SnapshotStore under the leader's version numbers, so every
+worker serves the same version and makes no upstream calls. When the
+leader exits, its lock is released and the next follower to acquire it
+takes over polling.
+
+Mapped frames are views of the page cache, which all workers share. That
+holds for float, integer and timestamp columns without nulls and for
+string columns, which stay Arrow-backed (pandas' pyarrow `str` dtype)
+instead of becoming Python objects. Floats are written with NaN rather
+than nulls so they map too. Integer or timestamp columns with nulls,
+booleans and categorical codes are still copied into each worker when
+converted. They are small next to the string columns of the feeds.
+
+Followers cannot poll, so faster-poll leases and forced polls their users
+ask for are written as small request files under <dir>/requests, which
+the leader applies to its own poller.
+
+Use a directory on tmpfs (e.g. /dev/shm/airops) to keep the files in RAM.
+pyarrow is optional, and leadership needs fcntl; without either, every
+worker polls on its own as before.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from poller import Snapshot
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc as ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pa = pc = ipc = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+def _arrow_strings(arrow_type):
+    """Arrow-backed pandas strings, whatever pandas' default string inference"""
+    if pa.types.is_string(arrow_type) or pa.types.is_large_string(arrow_type):
+        return pd.StringDtype('pyarrow', na_value=np.nan)
+    return None
+
+class SharedSnapshots:
+    """Latest snapshot per feed key as memory-mapped Arrow files, written by one leader process"""
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+        self.leading = False
+        self._lock_file = None
+        # Feed key -> (file identity, snapshot mapped from it)
+        self._mapped: Dict[str, Tuple[Tuple[int, int], Snapshot]] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def available(self) -> bool:
+        return pa is not None and fcntl is not None
+    
+    def try_lead(self) -> bool:
+        """Become the leader if no other process is; kept until this process exits"""
+        if self.leading:
+            return True
+        self.directory.mkdir(parents=True, exist_ok=True)
+        lock_file = open(self.directory / ".leader.lock", 'a+')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        self.leading = True
+        logger.info("Leading shared snapshots in %s (pid %d)", self.directory, os.getpid())
+        return True
+    
+    def publish(self, snapshot: Snapshot):
+        """SnapshotStore listener: write a DataFrame snapshot and swap it in; only the leader writes"""
+        if not self.leading or not isinstance(snapshot.data, pd.DataFrame):
+            return
+        try:
+            table = pa.Table.from_pandas(snapshot.data, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            logger.warning("Snapshot %s v%d not shared: %s", snapshot.provider, snapshot.version, e)
+            return
+        # NaN as a value rather than a null, so readers map float columns instead of filling a copy
+        for i, column in enumerate(table.schema):
+            if pa.types.is_floating(column.type) and table.column(i).null_count:
+                table = table.set_column(i, column, pc.fill_null(table.column(i), float('nan')))
+        table = table.replace_schema_metadata({
+            **(table.schema.metadata or {}),
+            b'provider': snapshot.provider.encode(),
+            b'version': str(snapshot.version).encode(),
+            b'fetched_at': snapshot.fetched_at.isoformat().encode(),
+        })
+        path = self.directory / f"{snapshot.provider}.arrow"
+        tmp = self.directory / f".{snapshot.provider}.{uuid.uuid4().hex}.tmp"
+        with ipc.new_file(str(tmp), table.schema) as writer:
+            writer.write_table(table)
+        # Readers that mapped the previous file keep it until they move on
+        os.replace(tmp, path)
+    
+    def read(self, key: str) -> Optional[Snapshot]:
+        """The current snapshot of a feed key, mapped again only when its file was swapped"""
+        path = self.directory / f"{key}.arrow"
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+        identity = (stat.st_ino, stat.st_mtime_ns)
+        with self._lock:
+            mapped = self._mapped.get(key)
+            if mapped is not None and mapped[0] == identity:
+                return mapped[1]
+        try:
+            table = ipc.open_file(pa.memory_map(str(path))).read_all()
+        except (OSError, pa.ArrowException) as e:
+            logger.warning("Unreadable shared snapshot %s: %s", path, e)
+            return None
+        metadata = table.schema.metadata
+        snapshot = Snapshot(
+            provider=metadata[b'provider'].decode(),
+            version=int(metadata[b'version']),
+            fetched_at=datetime.fromisoformat(metadata[b'fetched_at'].decode()),
+            # split_blocks keeps each column a view of the mapped file instead of consolidating copies
+            data=table.to_pandas(split_blocks=True, types_mapper=_arrow_strings),
+        )
+        with self._lock:
+            self._mapped[key] = (identity, snapshot)
+        return snapshot
+    
+    def keys(self):
+        return sorted(path.stem for path in self.directory.glob("*.arrow"))
+    
+    def follow(self, adopt: Callable[[Snapshot], None], on_lead: Callable[[], None], interval: float = 0.5):
+        """Adopt every new version the leader writes; take over leadership when it is released"""
+        def run():
+            seen: Dict[str, int] = {}
+            while True:
+                if self.try_lead():
+                    on_lead()
+                    return
+                for key in self.keys():
+                    snapshot = self.read(key)
+                    if snapshot is not None and snapshot.version != seen.get(key):
+                        seen[key] = snapshot.version
+                        try:
+                            adopt(snapshot)
+                        except Exception:
+                            logger.exception("Adopting shared snapshot %s failed", key)
+                time.sleep(interval)
+        threading.Thread(target=run, name="shared-snapshots", daemon=True).start()
+    
+    def _request_path(self, feed: str, requester: str) -> Path:
+        return self.directory / "requests" / f"{feed}~{requester}.json"
+    
+    def request_poll(self, feed: str, requester: str, interval: float = None, lease: float = 120.0, now: bool = False):
+        """Ask the leader to poll a feed at least every `interval` seconds for `lease` seconds, and/or right away"""
+        path = self._request_path(feed, requester)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+        tmp.write_text(json.dumps({'interval': interval, 'expires': time.time() + lease, 'now': now}))
+        os.replace(tmp, path)
+    
+    def release_poll(self, feed: str, requester: str):
+        self._request_path(feed, requester).unlink(missing_ok=True)
+    
+    def serve_requests(self, poller: Any, interval: float = 0.5):
+        """Leader side: apply the followers' poll requests to `poller` (a FeedPoller)"""
+        def run():
+            # (feed, requester) -> (interval, expiry) last handed to the poller
+            applied: Dict[Tuple[str, str], Tuple[float, float]] = {}
+            while True:
+                current = {}
+                for path in (self.directory / "requests").glob("*.json"):
+                    feed, _, requester = path.stem.partition('~')
+                    try:
+                        request = json.loads(path.read_text())
+                    except (OSError, ValueError):
+                        continue
+                    if feed not in poller.feeds:
+                        path.unlink(missing_ok=True)
+                        continue
+                    remaining = request['expires'] - time.time()
+                    if remaining <= 0:
+                        path.unlink(missing_ok=True)
+                        continue
+                    if request.get('now'):
+                        poller.poll_now(feed)
+                        # Consume the forced poll, keeping any lease
+                        if request['interval']:
+                            self.request_poll(feed, requester, request['interval'], remaining)
+                        else:
+                            path.unlink(missing_ok=True)
+                    if request['interval']:
+                        lease = (request['interval'], request['expires'])
+                        current[(feed, requester)] = lease
+                        # Followers renew their lease on every rerun
+                        if applied.get((feed, requester)) != lease:
+                            poller.request_interval(feed, request['interval'], requester=requester, lease=remaining)
+                for feed, requester in set(applied) - set(current):
+                    poller.release_interval(feed, requester)
+                applied = current
+                time.sleep(interval)
+        threading.Thread(target=run, name="shared-poll-requests", daemon=True).start()
+    
+    def stats(self) -> Dict[str, float]:
+        """Role, mapped feed count and bytes of the shared files"""
+        sizes = []
+        for path in self.directory.glob("*.arrow"):
+            try:
+                sizes.append(path.stat().st_size)
+            except FileNotFoundError:
+                continue
+        return {'role': 'leader' if self.leading else 'follower', 'feeds': len(sizes), 'bytes': sum(sizes)}
@@ -0,0 +1,220 @@
+"""
+Spatial index over aircraft positions.
+
+Positions are bucketed into a uniform latitude/longitude grid and kept
+sorted by cell, so a radius query only measures the aircraft in the few
+cells the circle touches. Distances use vectorized haversine math; nearest
+airport and inbound ETA are computed for all aircraft at once with NumPy
+broadcasting rather than per-aircraft loops.
+
+Map views use the same grid: only aircraft in the visible box are read,
+and when too many are visible they are binned into coarser cells, so a
+view never returns more than a fixed number of markers.
+"""
+
+import math
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+EARTH_RADIUS_NM = 3440.065
+
+def haversine_nm(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in nautical miles; arguments broadcast like NumPy arrays"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_NM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+def initial_bearing(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Initial course in degrees (0-360) from the first point to the second"""
+    lat1, lon1, lat2, lon2 = (np.radians(np.asarray(v, dtype=float)) for v in (lat1, lon1, lat2, lon2))
+    dlon = lon2 - lon1
+    x = np.sin(dlon) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - np.sin(lat1) * np.cos(lat2) * np.cos(dlon)
+    return np.degrees(np.arctan2(x, y)) % 360
+
+def inbound_eta_minutes(distance_nm, bearing_to_target, heading, speed_knots, max_off_track: float = 30.0) -> np.ndarray:
+    """Minutes to reach a target for aircraft heading towards it; NaN for the rest"""
+    off_track = np.abs((np.asarray(heading, dtype=float) - bearing_to_target + 180) % 360 - 180)
+    speed = np.asarray(speed_knots, dtype=float)
+    inbound = (off_track <= max_off_track) & (speed > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(inbound, np.asarray(distance_nm, dtype=float) / speed * 60, np.nan)
+
+def viewport_bounds(lat: float, lon: float, zoom: float, width_px: int = 1000, height_px: int = 600) -> Tuple[float, float, float, float]:
+    """(lat_lo, lat_hi, lon_lo, lon_hi) visible on a web-mercator map of this size.
+    
+    lon_lo > lon_hi when the view crosses the antimeridian.
+    """
+    lon_span = min(360.0, 360.0 * width_px / 256 / 2 ** zoom)
+    # Near the centre, a mercator pixel covers cos(lat) times as many degrees of latitude as of longitude
+    lat_span = min(180.0, lon_span * height_px / width_px * math.cos(math.radians(lat)))
+    lat_lo, lat_hi = max(-90.0, lat - lat_span / 2), min(90.0, lat + lat_span / 2)
+    if lon_span >= 360:
+        return lat_lo, lat_hi, -180.0, 180.0
+    return lat_lo, lat_hi, (lon - lon_span / 2 + 180) % 360 - 180, (lon + lon_span / 2 + 180) % 360 - 180
+
+class PositionIndex:
+    """Grid index over the aircraft of the latest snapshot.
+    
+    The indexed frame needs 'Latitude' and 'Longitude' columns; query results are
+    rows of that frame, read under the same lock as the index, so they always
+    match the snapshot the index was built from.
+    """
+    
+    def __init__(self, cell_degrees: float = 1.0):
+        self.cell_degrees = cell_degrees
+        self._cols = int(math.ceil(360 / cell_degrees))
+        self.frame = pd.DataFrame(columns=['Latitude', 'Longitude'])
+        self._ids = pd.Index([])
+        self._lat = np.empty(0)
+        self._lon = np.empty(0)
+        self._cells = np.empty(0, dtype=np.int64)
+        self._order = np.empty(0, dtype=np.int64)
+        self._sorted_cells = np.empty(0, dtype=np.int64)
+        self.version: Optional[int] = None
+        self.reused = 0
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        return len(self.frame)
+    
+    def _cell_of(self, lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+        """Grid cell code per position; positions without coordinates get -1"""
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        rows = np.floor((np.clip(np.where(valid, lat, 0), -90, 89.999999) + 90) / self.cell_degrees)
+        cols = np.floor((np.where(valid, lon, 0) + 180) % 360 / self.cell_degrees)
+        return np.where(valid, rows * self._cols + cols, -1).astype(np.int64)
+    
+    def update(self, frame: pd.DataFrame, id_column: str, version: int = None):
+        """Index a new snapshot; cells of aircraft that have not moved since the last one are reused"""
+        ids = pd.Index(frame[id_column])
+        lat = pd.to_numeric(frame['Latitude'], errors='coerce').to_numpy(dtype=float)
+        lon = pd.to_numeric(frame['Longitude'], errors='coerce').to_numpy(dtype=float)
+        
+        with self._lock:
+            cells = np.full(len(ids), -1, dtype=np.int64)
+            unmoved = np.zeros(len(ids), dtype=bool)
+            if len(self._ids) and self._ids.is_unique:
+                prev = self._ids.get_indexer(ids)
+                known = prev >= 0
+                unmoved[known] = (self._lat[prev[known]] == lat[known]) & (self._lon[prev[known]] == lon[known])
+                cells[unmoved] = self._cells[prev[unmoved]]
+            cells[~unmoved] = self._cell_of(lat[~unmoved], lon[~unmoved])
+            
+            # Same cells in the same row order: the sorted layout is still valid
+            if not np.array_equal(cells, self._cells):
+                self._order = np.argsort(cells, kind='stable')
+                self._sorted_cells = cells[self._order]
+            self.frame = frame.reset_index(drop=True)
+            self._ids, self._lat, self._lon, self._cells = ids, lat, lon, cells
+            self.version = version
+            self.reused = int(unmoved.sum())
+    
+    def within(self, lat: float, lon: float, radius_nm: float) -> pd.DataFrame:
+        """Aircraft within radius_nm of a point, nearest first, with a 'Distance (nm)' column"""
+        with self._lock:
+            candidates = self._candidates(lat, lon, radius_nm)
+            distances = haversine_nm(self._lat[candidates], self._lon[candidates], lat, lon)
+            keep = distances <= radius_nm
+            rows, distances = candidates[keep], distances[keep]
+            order = np.argsort(distances, kind='stable')
+            return self.frame.iloc[rows[order]].assign(**{'Distance (nm)': distances[order]}).reset_index(drop=True)
+    
+    def inbound(self, lat: float, lon: float, radius_nm: float, speed_column: str,
+                heading_column: str = 'Heading', max_off_track: float = 30.0) -> pd.DataFrame:
+        """Aircraft within radius_nm flying towards a point, soonest first, with an 'ETA (min)' column"""
+        nearby = self.within(lat, lon, radius_nm)
+        bearing = initial_bearing(nearby['Latitude'], nearby['Longitude'], lat, lon)
+        eta = inbound_eta_minutes(nearby['Distance (nm)'], bearing, nearby[heading_column], nearby[speed_column], max_off_track)
+        return nearby.assign(**{'ETA (min)': eta}).dropna(subset=['ETA (min)']).sort_values('ETA (min)', ignore_index=True)
+    
+    def nearest(self, codes: List[str], lats, lons) -> pd.DataFrame:
+        """Every aircraft with its nearest reference point ('Nearest Hub') and distance to it ('Hub Distance (nm)').
+        
+        Reference points are few (airports), so one broadcast aircraft x airports
+        distance matrix is cheaper than a tree.
+        """
+        lats, lons = np.asarray(lats, dtype=float), np.asarray(lons, dtype=float)
+        with self._lock:
+            frame, lat, lon = self.frame, self._lat, self._lon
+        if not len(codes) or not len(frame):
+            return frame.assign(**{'Nearest Hub': None, 'Hub Distance (nm)': np.nan})
+        
+        distances = haversine_nm(lat[:, None], lon[:, None], lats[None, :], lons[None, :])
+        valid = np.isfinite(lat) & np.isfinite(lon)
+        closest = np.argmin(np.where(valid[:, None], distances, 0), axis=1)
+        return frame.assign(**{
+            'Nearest Hub': np.where(valid, np.asarray(codes, dtype=object)[closest], None),
+            'Hub Distance (nm)': np.where(valid, distances[np.arange(len(lat)), closest], np.nan),
+        })
+    
+    def viewport(self, lat_lo: float, lat_hi: float, lon_lo: float, lon_hi: float,
+                 max_points: int = 2000) -> Tuple[pd.DataFrame, bool]:
+        """Aircraft inside a box, and whether they were binned.
+        
+        When at most max_points aircraft are inside, their rows are returned. Otherwise they
+        are grouped into grid bins (mean 'Latitude' and 'Longitude', 'Count'), with cells
+        coarse enough that at most max_points bins come back.
+        """
+        with self._lock:
+            full = lon_lo <= -180 and lon_hi >= 180
+            rows = self._cell_rows(lat_lo, lat_hi, None if full else self._col_ranges(lon_lo, lon_hi))
+            lat, lon = self._lat[rows], self._lon[rows]
+            inside = (lat >= lat_lo) & (lat <= lat_hi)
+            if not full:
+                inside &= (lon >= lon_lo) & (lon <= lon_hi) if lon_lo <= lon_hi else (lon >= lon_lo) | (lon <= lon_hi)
+            rows, lat, lon = rows[inside], lat[inside], lon[inside]
+            if len(rows) <= max_points:
+                return self.frame.iloc[np.sort(rows)].reset_index(drop=True), False
+        
+        # Longitude measured eastwards from the box edge, so bins never straddle the antimeridian
+        east = (lon - lon_lo) % 360
+        lon_span = 360.0 if full else (lon_hi - lon_lo) % 360 or 360.0
+        cell = math.sqrt(max(lat_hi - lat_lo, 1e-6) * lon_span / max_points)
+        while True:
+            keys = np.floor((lat - lat_lo) / cell).astype(np.int64) * (int(360 / cell) + 2) + np.floor(east / cell).astype(np.int64)
+            bins, inverse = np.unique(keys, return_inverse=True)
+            if len(bins) <= max_points:
+                break
+            cell *= 1.5
+        count = np.bincount(inverse)
+        return pd.DataFrame({
+            'Latitude': np.bincount(inverse, weights=lat) / count,
+            'Longitude': (lon_lo + np.bincount(inverse, weights=east) / count + 180) % 360 - 180,
+            'Count': count,
+        }), True
+    
+    def _col_ranges(self, lon_lo: float, lon_hi: float) -> List[Tuple[int, int]]:
+        """Grid column ranges covering [lon_lo, lon_hi]; a range crossing the antimeridian wraps"""
+        lo = int(((lon_lo + 180) % 360) // self.cell_degrees)
+        hi = int(((lon_hi + 180) % 360) // self.cell_degrees)
+        return [(lo, hi)] if lo <= hi else [(lo, self._cols - 1), (0, hi)]
+    
+    def _candidates(self, lat: float, lon: float, radius_nm: float) -> np.ndarray:
+        """Rows in the grid cells overlapping the circle's bounding box"""
+        dlat = radius_nm / 60.0
+        lat_lo, lat_hi = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+        # Degrees of longitude shrink towards the poles; size the box for the widest latitude in it
+        widest = max(abs(lat_lo), abs(lat_hi))
+        dlon = dlat / max(math.cos(math.radians(widest)), 1e-6)
+        
+        if widest >= 89.9 or dlon >= 180:
+            return self._cell_rows(lat_lo, lat_hi, None)
+        return self._cell_rows(lat_lo, lat_hi, self._col_ranges(lon - dlon, lon + dlon))
+    
+    def _cell_rows(self, lat_lo: float, lat_hi: float, col_ranges: Optional[List[Tuple[int, int]]]) -> np.ndarray:
+        """Rows in the grid cells of a latitude band, within the given column ranges (all columns if None)"""
+        cell = self.cell_degrees
+        col_ranges = col_ranges or [(0, self._cols - 1)]
+        row_lo = int((min(lat_lo, 89.999999) + 90) // cell)
+        row_hi = int((min(lat_hi, 89.999999) + 90) // cell)
+        slices: List[np.ndarray] = []
+        for row in range(row_lo, row_hi + 1):
+            for col_lo, col_hi in col_ranges:
+                start = np.searchsorted(self._sorted_cells, row * self._cols + col_lo, side='left')
+                end = np.searchsorted(self._sorted_cells, row * self._cols + col_hi, side='right')
+                slices.append(self._order[start:end])
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
@@ -0,0 +1,245 @@
+"""
+Server-sent-events push stream of change events.
+
+Wallboards subscribe once with GET /v1/events and receive flight state
+changes, safety alerts, maintenance and seat inventory changes as the
+EventLog records them, instead of rerunning whole pages to poll.
+
+    GET /v1/events?airline=PIA&stream=flights,safety_alerts&route=KHI-ISB&severity=critical
+
+Filters take comma-separated values: airline, stream, event, route and
+severity. Route and severity only narrow events that carry them (seat and
+flight events have a route, safety alerts a severity); severity matches
+case-insensitively inside the label, so "critical" matches "🔴 CRITICAL".
+Reconnecting clients send Last-Event-ID (or `since`) and get the events
+they missed that are still in the log.
+
+Each event is serialized once however many clients receive it. A client
+has a bounded queue: when it falls behind, its oldest events are dropped
+and it is sent a `dropped` event with the count, so it can reload the full
+state from the JSON API. Publishing never waits on a client, and a client
+whose socket stops accepting data is disconnected by the write timeout.
+"""
+
+import json
+import logging
+import threading
+from collections import deque
+from dataclasses import dataclass
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from events import EventLog
+
+logger = logging.getLogger(__name__)
+
+def _values(params: Dict[str, str], name: str) -> Optional[FrozenSet[str]]:
+    values = frozenset(v.strip() for v in params.get(name, '').split(',') if v.strip())
+    return values or None
+
+@dataclass(frozen=True)
+class EventFilter:
+    airlines: Optional[FrozenSet[str]] = None
+    streams: Optional[FrozenSet[str]] = None
+    events: Optional[FrozenSet[str]] = None
+    routes: Optional[FrozenSet[str]] = None
+    severities: Optional[FrozenSet[str]] = None
+    
+    @classmethod
+    def from_query(cls, params: Dict[str, str]) -> 'EventFilter':
+        severities = _values(params, 'severity')
+        return cls(
+            airlines=_values(params, 'airline'), streams=_values(params, 'stream'), events=_values(params, 'event'),
+            routes=_values(params, 'route'), severities=frozenset(s.upper() for s in severities) if severities else None,
+        )
+    
+    def mask(self, events: pd.DataFrame) -> np.ndarray:
+        """Which events pass the filter"""
+        mask = np.ones(len(events), dtype=bool)
+        for values, column in ((self.airlines, 'Airline'), (self.streams, 'Stream'), (self.events, 'Event')):
+            if values is not None:
+                mask &= events[column].isin(list(values)).to_numpy()
+        if self.routes is not None:
+            route = events['Route']
+            mask &= (route.isna() | route.isin(list(self.routes))).to_numpy()
+        if self.severities is not None:
+            severity = events['Severity'].astype(object)
+            labels = severity.fillna('').astype(str).str.upper()
+            matches = np.zeros(len(events), dtype=bool)
+            for value in self.severities:
+                matches |= labels.str.contains(value, regex=False).to_numpy()
+            mask &= severity.isna().to_numpy() | matches
+        return mask
+
+def encode_events(events: pd.DataFrame) -> List[bytes]:
+    """One SSE message per event row, named after the event and carrying its sequence number"""
+    records = json.loads(events.to_json(orient='records', date_format='iso'))
+    return [
+        f"id: {record['Seq']}\nevent: {record['Event']}\ndata: {json.dumps(record, separators=(',', ':'))}\n\n".encode()
+        for record in records
+    ]
+
+class Subscription:
+    """One client's filter and bounded queue of encoded messages"""
+    
+    def __init__(self, filter_: EventFilter, max_pending: int, after: int = 0):
+        self.filter = filter_
+        # Events up to this sequence number were replayed at subscription, not published to it
+        self.after = after
+        self._pending: Deque[bytes] = deque(maxlen=max_pending)
+        self._changed = threading.Condition()
+        # Dropped since the client was last told, and in total
+        self._unreported = 0
+        self.dropped = 0
+        self.sent = 0
+        self.closed = False
+    
+    def offer(self, messages: List[bytes]):
+        """Queue messages without blocking; the oldest are dropped when the client is behind"""
+        with self._changed:
+            overflow = len(self._pending) + len(messages) - self._pending.maxlen
+            if overflow > 0:
+                self._unreported += overflow
+                self.dropped += overflow
+            self._pending.extend(messages)
+            self._changed.notify()
+    
+    def take(self, timeout: float) -> Tuple[List[bytes], int]:
+        """Queued messages and the count dropped since the last take, waiting up to timeout for any"""
+        with self._changed:
+            self._changed.wait_for(lambda: self._pending or self._unreported or self.closed, timeout=timeout)
+            messages, dropped = list(self._pending), self._unreported
+            self._pending.clear()
+            self._unreported = 0
+        return messages, dropped
+    
+    def close(self):
+        with self._changed:
+            self.closed = True
+            self._changed.notify()
+
+class EventBroadcaster:
+    """Fans EventLog batches out to SSE subscribers"""
+    
+    def __init__(self, log: EventLog, max_pending: int = 1000, max_clients: int = 500):
+        self.log = log
+        self.max_pending = max_pending
+        self.max_clients = max_clients
+        self._subscriptions: List[Subscription] = []
+        self.published = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        log.subscribe(self.publish)
+    
+    def publish(self, events: pd.DataFrame):
+        """EventLog listener: encode the batch once and queue each client's share"""
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        if not subscriptions or events.empty:
+            return
+        messages = encode_events(events)
+        self.published += len(messages)
+        seqs = events['Seq'].to_numpy()
+        for subscription in subscriptions:
+            picked = np.flatnonzero(subscription.filter.mask(events) & (seqs > subscription.after))
+            if len(picked):
+                subscription.offer([messages[i] for i in picked])
+    
+    def subscribe(self, filter_: EventFilter, since: int = None) -> Optional[Subscription]:
+        """New subscription, first queued with the logged events after `since`; None when full"""
+        # Registering, taking the replay cursor and queuing the replay under one lock means every
+        # event is either replayed (Seq <= cursor) or published later, once and in order
+        with self._lock:
+            if len(self._subscriptions) >= self.max_clients:
+                return None
+            subscription = Subscription(filter_, self.max_pending, after=self.log.last_seq)
+            self._subscriptions.append(subscription)
+            if since is not None:
+                missed = self.log.since(since)
+                missed = missed[filter_.mask(missed) & (missed['Seq'] <= subscription.after).to_numpy()]
+                if len(missed):
+                    subscription.offer(encode_events(missed))
+        return subscription
+    
+    def unsubscribe(self, subscription: Subscription):
+        subscription.close()
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+            self.dropped += subscription.dropped
+    
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'clients': len(self._subscriptions),
+                'published': self.published,
+                'dropped': self.dropped + sum(s.dropped for s in self._subscriptions),
+            }
+
+class EventStreamHandler(BaseHTTPRequestHandler):
+    """Serves /v1/events; set `broadcaster` and `heartbeat` on a subclass"""
+    
+    broadcaster: EventBroadcaster = None
+    heartbeat: float = 15.0
+    # Seconds a write may block before a stalled client is dropped
+    timeout = 30
+    
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path.rstrip('/') != '/v1/events':
+            return self._error(HTTPStatus.NOT_FOUND, f"No route for {url.path}")
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        since = self.headers.get('Last-Event-ID') or params.get('since')
+        try:
+            since = int(since) if since else None
+        except ValueError:
+            return self._error(HTTPStatus.BAD_REQUEST, "Last-Event-ID must be an integer")
+        
+        subscription = self.broadcaster.subscribe(EventFilter.from_query(params), since)
+        if subscription is None:
+            return self._error(HTTPStatus.SERVICE_UNAVAILABLE, "Too many subscribers")
+        try:
+            self.send_response(HTTPStatus.OK)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Cache-Control', 'no-cache')
+            self.send_header('X-Accel-Buffering', 'no')
+            self.end_headers()
+            self.wfile.write(f"retry: 5000\n: last-seq {self.broadcaster.log.last_seq}\n\n".encode())
+            self.wfile.flush()
+            while True:
+                messages, dropped = subscription.take(self.heartbeat)
+                if dropped:
+                    messages.insert(0, f"event: dropped\ndata: {json.dumps({'dropped': dropped})}\n\n".encode())
+                # Comment lines keep proxies from closing an idle stream
+                self.wfile.write(b"".join(messages) if messages else b": keep-alive\n\n")
+                self.wfile.flush()
+                subscription.sent += len(messages)
+        except (OSError, ValueError):
+            # Client went away or stopped reading
+            pass
+        finally:
+            self.broadcaster.unsubscribe(subscription)
+    
+    def _error(self, status: HTTPStatus, message: str):
+        body = json.dumps({'error': message}).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        logger.debug("%s %s", self.address_string(), format % args)
+
+def serve_events(broadcaster: EventBroadcaster, host: str, port: int, heartbeat: float = 15.0) -> ThreadingHTTPServer:
+    """Start the SSE server on a daemon thread"""
+    handler = type('EventStream', (EventStreamHandler,), {'broadcaster': broadcaster, 'heartbeat': heartbeat})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="event-stream", daemon=True).start()
+    return server
@@ -0,0 +1,29 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# The app's modules live at the repository root
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+class FakeClock:
+    """Stands in for the `time` module of the code under test; sleeping advances the clock"""
+    
+    def __init__(self, start: float = 1000.0):
+        self.now = start
+    
+    def monotonic(self) -> float:
+        return self.now
+    
+    def time(self) -> float:
+        return self.now
+    
+    def sleep(self, seconds: float):
+        self.now += seconds
+    
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def clock():
+    return FakeClock()
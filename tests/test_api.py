@@ -0,0 +1,112 @@
+import gzip
+import json
+import pickle
+import threading
+import urllib.error
+import urllib.request
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from api import accepted_codings, cached_tags, make_server
+from config import API_PAGE_SIZE
+from poller import Snapshot
+
+def save(directory, version: int, rows: int = 500):
+    data = pd.DataFrame({'Flight': [f'PK-{i}' for i in range(rows)], 'Sold': range(rows)})
+    with open(directory / 'PIA.seats.pkl', 'wb') as f:
+        pickle.dump(Snapshot('PIA.seats', version, datetime(2026, 3, 1, 12, version), data), f)
+
+@pytest.fixture
+def get(tmp_path):
+    save(tmp_path, 1)
+    server = make_server('127.0.0.1', 0, str(tmp_path))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    def get(path: str, **headers):
+        request = urllib.request.Request(f'http://127.0.0.1:{server.server_address[1]}{path}', headers=headers)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, response.headers, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers, e.read()
+    yield get
+    server.shutdown()
+    server.server_close()
+
+def test_feeds_list_versions_and_rows(get):
+    status, _, body = get('/v1/feeds')
+    
+    assert status == 200
+    assert json.loads(body)['feeds'] == [{
+        'airline': 'PIA', 'feed': 'seats', 'version': 1, 'fetched_at': '2026-03-01T12:01:00', 'rows': 500,
+        'url': '/v1/feeds/PIA/seats',
+    }]
+
+def test_rows_are_projected_and_paged(get):
+    status, _, body = get('/v1/feeds/PIA/seats?fields=Sold&limit=2&offset=498')
+    page = json.loads(body)
+    
+    assert status == 200
+    assert page['rows'] == [{'Sold': 498}, {'Sold': 499}]
+    assert (page['total'], page['next_offset'], page['fields']) == (500, None, ['Sold'])
+    assert json.loads(get('/v1/feeds/PIA/seats?limit=2')[2])['next_offset'] == 2
+
+@pytest.mark.parametrize('path, status', [
+    ('/v1/feeds/PIA/nope', 404), ('/v1/other', 404), ('/v1/feeds/PIA/seats?fields=Nope', 400),
+    ('/v1/feeds/PIA/seats?limit=many', 400), ('/v1/feeds/PIA/seats?offset=-1', 400),
+])
+def test_bad_requests_get_json_errors(get, path, status):
+    code, _, body = get(path)
+    assert code == status
+    assert 'error' in json.loads(body)
+
+def test_repeat_request_is_not_modified_until_the_snapshot_changes(get, tmp_path):
+    _, headers, _ = get('/v1/feeds/PIA/seats?limit=10')
+    tag = headers['ETag']
+    
+    status, headers, body = get('/v1/feeds/PIA/seats?limit=10', **{'If-None-Match': tag})
+    assert (status, headers['ETag'], body) == (304, tag, b'')
+    # Weak tags in a list compare weakly
+    assert get('/v1/feeds/PIA/seats?limit=10', **{'If-None-Match': f'"other", W/{tag}'})[0] == 304
+    assert get('/v1/feeds/PIA/seats?limit=10', **{'If-None-Match': '*'})[0] == 304
+    # Another query is another representation
+    assert get('/v1/feeds/PIA/seats?limit=11', **{'If-None-Match': tag})[0] == 200
+    
+    save(tmp_path, 2)
+    status, headers, _ = get('/v1/feeds/PIA/seats?limit=10', **{'If-None-Match': tag})
+    assert status == 200 and headers['ETag'] != tag
+
+def test_bodies_are_gzipped_only_when_gzip_is_accepted(get):
+    status, headers, body = get('/v1/feeds/PIA/seats', **{'Accept-Encoding': 'gzip, deflate'})
+    assert (status, headers['Content-Encoding']) == (200, 'gzip')
+    assert headers['ETag'].endswith('-gz"')
+    assert len(json.loads(gzip.decompress(body))['rows']) == min(500, API_PAGE_SIZE)
+    assert get('/v1/feeds/PIA/seats', **{'If-None-Match': headers['ETag'], 'Accept-Encoding': 'gzip'})[0] == 304
+    
+    for refused in ('gzip;q=0', 'identity', 'br, *;q=0.0'):
+        _, headers, body = get('/v1/feeds/PIA/seats', **{'Accept-Encoding': refused})
+        assert headers['Content-Encoding'] is None
+        assert len(json.loads(body)['rows']) == min(500, API_PAGE_SIZE)
+
+def test_small_bodies_are_gzipped_when_identity_is_refused(get):
+    _, headers, _ = get('/v1/feeds/PIA/seats?limit=1', **{'Accept-Encoding': 'gzip'})
+    assert headers['Content-Encoding'] is None
+    
+    _, headers, body = get('/v1/feeds/PIA/seats?limit=1', **{'Accept-Encoding': 'gzip, identity;q=0'})
+    assert headers['Content-Encoding'] == 'gzip'
+    assert json.loads(gzip.decompress(body))['rows'] == [{'Flight': 'PK-0', 'Sold': 0}]
+
+@pytest.mark.parametrize('header, accepted', [
+    ('', (False, True)), ('gzip', (True, True)), ('GZIP;Q=0.5', (True, True)), ('gzip;q=0', (False, True)),
+    ('*', (True, True)), ('*;q=0, identity', (False, True)), ('gzip, *;q=0', (True, False)),
+    ('gzip;q=0, identity;q=0', (False, False)), ('gzip;q=bad', (False, True)),
+])
+def test_accept_encoding_q_values(header, accepted):
+    assert accepted_codings(header) == accepted
+
+def test_if_none_match_lists():
+    assert cached_tags('*') == (True, set())
+    assert cached_tags('"a", W/"b",W/"c,d"') == (False, {'"a"', '"b"', '"c,d"'})
+    assert cached_tags('') == (False, set())
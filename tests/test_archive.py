@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from archive import SnapshotArchive
+
+DAY = datetime(2026, 3, 1)
+
+def flights(flight: str = 'PK-301', altitude: float = 35000.0) -> pd.DataFrame:
+    return pd.DataFrame({'Flight': [flight], 'Status': pd.Categorical(['In Flight']), 'Altitude (ft)': [altitude]})
+
+def files(archive: SnapshotArchive, dataset: str = 'flights') -> list:
+    return sorted(p.relative_to(archive.root / dataset).as_posix() for p in (archive.root / dataset).rglob('*.parquet'))
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), compact_after=50)
+    for day in range(3):
+        for airline, flight in (('PIA', 'PK-301'), ('SV', 'SV-700')):
+            for hour in (6, 18):
+                archive.write('flights', airline, DAY + timedelta(days=day, hours=hour), flights(flight, 1000.0 * hour))
+    return archive
+
+def test_query_returns_only_rows_in_range_airlines_and_columns(archive):
+    rows = archive.query('flights', DAY.replace(hour=12), DAY + timedelta(days=1, hours=12), ['PIA'], ['Flight', 'Time', 'Nope'])
+    
+    assert list(rows.columns) == ['Flight', 'Time']
+    assert rows['Flight'].tolist() == ['PK-301', 'PK-301']
+    assert sorted(rows['Time']) == [pd.Timestamp(DAY.replace(hour=18)), pd.Timestamp(DAY + timedelta(days=1, hours=6))]
+    # Categorical columns are stored as their values
+    assert archive.query('flights', airlines=['SV'])['Status'].unique().tolist() == ['In Flight']
+
+def test_query_prunes_partitions_outside_the_range(archive):
+    dataset, options = archive._scan('flights', DAY + timedelta(days=1), DAY + timedelta(days=1, hours=12), ['SV'], None)
+    fragments = [f.path for f in dataset.get_fragments(filter=options['filter'])]
+    
+    assert len(fragments) == 1
+    assert 'date=2026-03-02/airline=SV' in fragments[0]
+
+def test_iter_batches_yields_bounded_frames_covering_the_query(archive):
+    batches = list(archive.iter_batches('flights', airlines=['PIA'], columns=['Flight', 'Altitude (ft)'], batch_rows=1))
+    
+    assert all(len(batch) == 1 for batch in batches)
+    assert pd.concat(batches)['Altitude (ft)'].sort_values().tolist() == [6000.0] * 3 + [18000.0] * 3
+
+def test_missing_dataset_reads_as_empty(archive):
+    assert archive.query('seats', columns=['Flight']).columns.tolist() == ['Flight']
+    assert list(archive.iter_batches('seats')) == []
+
+def test_first_write_of_a_day_compacts_the_closed_days(archive):
+    # Each write of a new day folded the previous days' partitions into one file each
+    closed = [f for f in files(archive) if f.startswith('date=2026-03-01')]
+    assert [f.split('/')[1] for f in closed] == ['airline=PIA', 'airline=SV']
+    assert all('/compacted-' in f for f in closed)
+    assert len([f for f in files(archive) if f.startswith('date=2026-03-03')]) == 4
+    assert len(archive.query('flights')) == 12
+
+def test_partitions_compact_after_enough_small_files(tmp_path):
+    archive = SnapshotArchive(str(tmp_path), compact_after=3)
+    for minute in range(3):
+        archive.write('flights', 'PIA', DAY.replace(minute=minute), flights(altitude=float(minute)))
+    
+    assert len(files(archive)) == 1
+    compacted = archive.query('flights')
+    assert compacted['Altitude (ft)'].tolist() == [0.0, 1.0, 2.0]
+    assert archive.stats()['flights']['files'] == 1
@@ -0,0 +1,161 @@
+import threading
+import time
+
+import cache
+from cache import ProviderCache
+
+def test_fresh_entry_is_served_without_fetching(clock, monkeypatch):
+    monkeypatch.setattr(cache, 'time', clock)
+    store = ProviderCache({'flights': 30})
+    calls = []
+    fetch = lambda: calls.append(1) or len(calls)
+    
+    assert store.get('flights', fetch) == 1
+    clock.advance(29)
+    assert store.get('flights', fetch) == 1
+    assert calls == [1]
+    assert store.stats()['hits'] == 1
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock, monkeypatch):
+    monkeypatch.setattr(cache, 'time', clock)
+    store = ProviderCache({'flights': 30})
+    release = threading.Event()
+    values = iter(['old', 'new'])
+    
+    def fetch():
+        value = next(values)
+        if value == 'new':
+            release.wait(5)
+        return value
+    
+    assert store.get('flights', fetch) == 'old'
+    clock.advance(31)
+    # Both readers get the stale value at once; only the first starts a refresh
+    assert store.get('flights', fetch) == 'old'
+    assert store.get('flights', fetch) == 'old'
+    assert store.peek('flights').refreshing
+    
+    release.set()
+    for _ in range(100):
+        if store.peek('flights').value == 'new':
+            break
+        time.sleep(0.01)
+    assert store.get('flights', fetch) == 'new'
+    assert store.stats()['stale_hits'] == 2
+
+def test_failed_refresh_keeps_the_last_good_value(clock, monkeypatch):
+    monkeypatch.setattr(cache, 'time', clock)
+    store = ProviderCache({'flights': 30})
+    store.get('flights', lambda: 'good')
+    clock.advance(31)
+    
+    def fail():
+        raise ConnectionError("down")
+    
+    assert store.get('flights', fail) == 'good'
+    for _ in range(100):
+        if not store.peek('flights').refreshing:
+            break
+        time.sleep(0.01)
+    entry = store.peek('flights')
+    assert entry.value == 'good'
+    assert entry.last_error == "down"
+
+def test_concurrent_misses_share_one_fetch():
+    store = ProviderCache({'flights': 30})
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'rows'
+    
+    results = []
+    readers = [threading.Thread(target=lambda: results.append(store.get('flights', fetch))) for _ in range(8)]
+    readers[0].start()
+    started.wait(5)
+    for reader in readers[1:]:
+        reader.start()
+    time.sleep(0.05)
+    release.set()
+    for reader in readers:
+        reader.join(5)
+    
+    assert calls == [1]
+    assert results == ['rows'] * 8
+
+def test_least_recently_used_entries_are_evicted():
+    store = ProviderCache({}, max_entries=2)
+    store.get('a', lambda: 1)
+    store.get('b', lambda: 2)
+    store.get('a', lambda: 1)
+    store.get('c', lambda: 3)
+    
+    assert store.peek('a') is not None
+    assert store.peek('b') is None
+
+def test_callers_of_a_failed_fetch_share_one_retry():
+    store = ProviderCache({'flights': 30})
+    started, release = threading.Event(), threading.Event()
+    calls = []
+    
+    def fetch():
+        calls.append(1)
+        if len(calls) == 1:
+            started.set()
+            release.wait(5)
+            raise ConnectionError("down")
+        time.sleep(0.05)
+        return 'rows'
+    
+    results = []
+    
+    def read():
+        try:
+            results.append(store.get('flights', fetch))
+        except ConnectionError as e:
+            results.append(str(e))
+    readers = [threading.Thread(target=read) for _ in range(8)]
+    readers[0].start()
+    started.wait(5)
+    for reader in readers[1:]:
+        reader.start()
+    time.sleep(0.05)
+    release.set()
+    for reader in readers:
+        reader.join(5)
+    
+    assert len(calls) == 2
+    assert sorted(results) == ['down'] + ['rows'] * 7
+
+def test_refresh_raises_when_the_joined_fetch_fails():
+    store = ProviderCache({'flights': 30})
+    store.get('flights', lambda: 'old')
+    started, release = threading.Event(), threading.Event()
+    
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ConnectionError("down")
+    
+    errors = []
+    
+    def refresh():
+        try:
+            store.refresh('flights', fail)
+        except ConnectionError as e:
+            errors.append(str(e))
+    first = threading.Thread(target=refresh)
+    first.start()
+    started.wait(5)
+    second = threading.Thread(target=refresh)
+    second.start()
+    time.sleep(0.05)
+    release.set()
+    first.join(5)
+    second.join(5)
+    
+    assert errors == ['down', 'down']
+    assert store.peek('flights').value == 'old'
@@ -0,0 +1,50 @@
+import pandas as pd
+
+from events import CHANGE_COLUMNS, DiffRule, EventLog, diff_frames
+
+SEATS = DiffRule(key='Flight', fields={'Sold': 'seat_delta', 'Status': 'status_change'}, added='new_flight')
+
+def seats(**columns) -> pd.DataFrame:
+    base = {'Flight': ['PK1', 'PK2'], 'Route': ['KHI-ISB', 'LHE-KHI'], 'Sold': [100, 50], 'Status': ['Open', 'Open']}
+    return pd.DataFrame({**base, **columns})
+
+def test_unchanged_frames_produce_no_events():
+    changes = diff_frames(seats(), seats(), SEATS)
+    
+    assert changes.empty
+    assert list(changes.columns) == CHANGE_COLUMNS
+
+def test_changed_fields_carry_old_new_and_numeric_delta():
+    changes = diff_frames(seats(), seats(Sold=[104, 50], Status=['Open', 'Closed']), SEATS)
+    
+    sold = changes[changes['Event'] == 'seat_delta'].iloc[0]
+    assert (sold['Key'], sold['Old'], sold['New'], sold['Delta']) == ('PK1', 100, 104, 4.0)
+    status = changes[changes['Event'] == 'status_change'].iloc[0]
+    assert (status['Key'], status['Old'], status['New']) == ('PK2', 'Open', 'Closed')
+    assert pd.isna(status['Delta'])
+
+def test_new_keys_are_reported_once_with_the_new_frames_context():
+    new = pd.concat([seats(), pd.DataFrame({'Flight': ['PK3'], 'Route': ['ISB-DXB'], 'Sold': [10], 'Status': ['Open']})])
+    changes = diff_frames(seats(), new, SEATS)
+    
+    assert changes[['Key', 'Event', 'Route']].values.tolist() == [['PK3', 'new_flight', 'ISB-DXB']]
+
+def test_blank_to_blank_is_not_a_change():
+    old = seats(Status=[None, 'Open'])
+    
+    assert diff_frames(old, seats(Status=[float('nan'), 'Open']), SEATS).empty
+
+def test_duplicate_keys_keep_the_last_row():
+    new = pd.concat([seats(), seats(Sold=[120, 50])], ignore_index=True)
+    changes = diff_frames(seats(), new, SEATS)
+    
+    assert changes[['Key', 'New']].values.tolist() == [['PK1', 120]]
+
+def test_log_numbers_events_and_skips_old_versions():
+    log = EventLog({'seats': SEATS})
+    assert log.observe('PIA', 'seats', seats(), version=1).empty
+    log.observe('PIA', 'seats', seats(Sold=[101, 51]), version=2)
+    log.observe('PIA', 'seats', seats(Sold=[999, 999]), version=2)
+    
+    assert log.since(0)['Seq'].tolist() == [1, 2]
+    assert log.since(1)['New'].tolist() == [51]
@@ -0,0 +1,48 @@
+import pandas as pd
+import pytest
+
+from exports import ExportCache, stream_export
+
+def batches(count: int = 3, rows: int = 4):
+    for i in range(count):
+        yield pd.DataFrame({'Flight': [f'PK-{i}{j}' for j in range(rows)], 'Altitude (ft)': [float(j) for j in range(rows)]})
+
+def test_payloads_are_built_once_and_evicted_by_size():
+    cache = ExportCache(max_entries=10, max_bytes=10)
+    built = []
+    
+    def build(text):
+        built.append(text)
+        return text
+    
+    assert cache.get(('PIA', 'seats', 1, 'csv'), lambda: build('abcd')) == b'abcd'
+    assert cache.get(('PIA', 'seats', 1, 'csv'), lambda: build('abcd')) == b'abcd'
+    cache.get(('PIA', 'seats', 2, 'csv'), lambda: build('efgh'))
+    cache.get(('PIA', 'seats', 3, 'csv'), lambda: build('ijkl'))
+    
+    assert built == ['abcd', 'efgh', 'ijkl']
+    assert cache.stats() == {'entries': 2, 'bytes': 8, 'hits': 1, 'misses': 3, 'evictions': 1}
+
+@pytest.mark.parametrize('fmt, read', [
+    ('csv', pd.read_csv),
+    ('parquet', pd.read_parquet),
+    ('arrow', lambda path: pd.read_feather(path)),
+])
+def test_streamed_exports_hold_every_batch(tmp_path, fmt, read):
+    pytest.importorskip('pyarrow')
+    stats = stream_export(batches(), tmp_path / f'flights.{fmt}', fmt)
+    
+    assert stats.rows == 12
+    assert stats.bytes == (tmp_path / f'flights.{fmt}').stat().st_size
+    exported = read(tmp_path / f'flights.{fmt}')
+    assert exported['Flight'].tolist()[::4] == ['PK-00', 'PK-10', 'PK-20']
+    assert exported['Altitude (ft)'].sum() == 18.0
+
+def test_failed_export_leaves_no_file(tmp_path):
+    def failing():
+        yield from batches(1)
+        raise RuntimeError("history went away")
+    
+    with pytest.raises(RuntimeError):
+        stream_export(failing(), tmp_path / 'flights.csv', 'csv')
+    assert list(tmp_path.iterdir()) == []
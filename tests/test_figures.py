@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from figures import FigureCache, figure_bytes
+
+def line(points: int) -> go.Figure:
+    return px.line(pd.DataFrame({'x': np.arange(points, dtype=float), 'y': np.ones(points)}), x='x', y='y')
+
+def test_figure_size_is_the_bytes_of_its_data_arrays():
+    assert figure_bytes(line(1000)) == 2 * 1000 * 8
+    assert figure_bytes(go.Figure(go.Scattermap(lat=[24.9, 33.6], lon=[67.2, 73.1]))) == 2 * 2 * 8
+
+def test_cached_figures_are_reused_until_evicted():
+    cache = FigureCache(max_entries=2)
+    built = []
+    
+    def build(points):
+        built.append(points)
+        return line(points)
+    
+    first = cache.get(cache.key('analytics', 'trend', 1, {'window': ['a', 'b']}), lambda: build(10))
+    assert cache.get(cache.key('analytics', 'trend', 1, {'window': ['a', 'b']}), lambda: build(10)) is first
+    cache.get(cache.key('analytics', 'trend', 1, {'window': ['a', 'c']}), lambda: build(11))
+    cache.get(cache.key('analytics', 'trend', 2, {'window': ['a', 'b']}), lambda: build(12))
+    
+    assert built == [10, 11, 12]
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['hits'] == 1
+
+def test_entries_are_evicted_to_stay_under_the_memory_cap():
+    cache = FigureCache(max_entries=10, max_bytes=40_000)
+    for version in range(3):
+        cache.get(cache.key('analytics', 'trend', version), lambda: line(1000))
+    
+    assert cache.stats()['entries'] == 2
+    assert cache.stats()['bytes'] == 32_000
+    # A figure larger than the whole cap is returned but not kept
+    assert figure_bytes(cache.get(cache.key('analytics', 'big', 0), lambda: line(5000))) == 80_000
+    assert cache.stats()['entries'] == 2
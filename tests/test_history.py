@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from history import RingBuffer
+
+SCHEMA = {'Flight': 'U8', 'Altitude (ft)': 'f8'}
+START = datetime(2026, 3, 1, 12)
+
+def snapshot(*altitudes) -> pd.DataFrame:
+    return pd.DataFrame({'Flight': [f'PK-{int(a)}' for a in altitudes], 'Altitude (ft)': list(altitudes)})
+
+def test_oldest_rows_are_overwritten_once_full():
+    buffer = RingBuffer(SCHEMA, capacity=4)
+    for minute in range(3):
+        buffer.append(START + timedelta(minutes=minute), snapshot(minute * 10, minute * 10 + 1))
+    
+    rows = buffer.query()
+    assert len(buffer) == 4
+    assert rows['Altitude (ft)'].tolist() == [10, 11, 20, 21]
+    assert buffer.oldest == START + timedelta(minutes=1)
+    assert buffer.nbytes == 4 * (8 + 8 + 4 * 8)
+
+def test_query_filters_by_time_and_projects_columns():
+    buffer = RingBuffer(SCHEMA, capacity=10)
+    for minute in range(4):
+        buffer.append(START + timedelta(minutes=minute), snapshot(minute))
+    
+    rows = buffer.query(START + timedelta(minutes=1), START + timedelta(minutes=3), columns=['Flight'])
+    assert list(rows.columns) == ['Time', 'Flight']
+    assert rows['Flight'].tolist() == ['PK-1', 'PK-2']
+
+def test_missing_columns_and_values_are_left_blank():
+    buffer = RingBuffer(SCHEMA, capacity=4)
+    buffer.append(START, pd.DataFrame({'Flight': [None, 'PK-2']}))
+    
+    rows = buffer.query()
+    assert rows['Flight'].tolist() == ['', 'PK-2']
+    assert np.isnan(rows['Altitude (ft)']).all()
+
+def test_iter_batches_covers_the_retained_rows_in_order():
+    buffer = RingBuffer(SCHEMA, capacity=5)
+    for minute in range(7):
+        buffer.append(START + timedelta(minutes=minute), snapshot(minute))
+    
+    batches = list(buffer.iter_batches(START + timedelta(minutes=3), batch_rows=2))
+    assert all(len(batch) <= 2 for batch in batches)
+    assert pd.concat(batches)['Altitude (ft)'].tolist() == [3, 4, 5, 6]
+    # Nothing in range still yields one empty frame with every column
+    empty = list(buffer.iter_batches(START + timedelta(days=1)))
+    assert len(empty) == 1 and list(empty[0].columns) == ['Time', 'Flight', 'Altitude (ft)']
@@ -0,0 +1,110 @@
+import pytest
+import requests
+
+import http_client
+from http_client import CircuitBreaker, CircuitOpenError, HttpClient, ProviderRateLimitedError
+from scheduler import CallSkipped
+
+@pytest.fixture(autouse=True)
+def fake_time(clock, monkeypatch):
+    monkeypatch.setattr(http_client, 'time', clock)
+
+def fail(breaker: CircuitBreaker, times: int = 1):
+    for _ in range(times):
+        breaker.before_call()
+        breaker.record_failure("HTTP 503")
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker('opensky', failure_threshold=3, reset_timeout=60)
+    fail(breaker, 2)
+    assert breaker.state == CircuitBreaker.CLOSED
+    
+    fail(breaker)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    assert breaker.status()['short_circuited'] == 1
+
+def test_success_resets_the_failure_count():
+    breaker = CircuitBreaker('opensky', failure_threshold=3)
+    fail(breaker, 2)
+    breaker.before_call()
+    breaker.record_success()
+    fail(breaker, 2)
+    
+    assert breaker.state == CircuitBreaker.CLOSED
+
+def test_one_half_open_probe_after_the_cool_down(clock):
+    breaker = CircuitBreaker('opensky', failure_threshold=1, reset_timeout=60)
+    fail(breaker)
+    assert breaker.is_open()
+    
+    clock.advance(60)
+    assert not breaker.is_open()
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+def test_failed_probe_opens_the_breaker_again(clock):
+    breaker = CircuitBreaker('opensky', failure_threshold=3, reset_timeout=60)
+    fail(breaker, 3)
+    clock.advance(61)
+    fail(breaker)
+    
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.is_open()
+
+def test_abandoned_probe_lets_the_next_caller_probe(clock):
+    breaker = CircuitBreaker('opensky', failure_threshold=1, reset_timeout=60)
+    fail(breaker)
+    clock.advance(60)
+    breaker.before_call()
+    breaker.abandon_call()
+    
+    breaker.before_call()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+class Responses:
+    """Stands in for a provider's requests.Session, answering with canned responses"""
+    
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+    
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+def response(status: int, retry_after: str = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    if retry_after is not None:
+        response.headers['Retry-After'] = retry_after
+    return response
+
+def client_with(session: Responses) -> HttpClient:
+    client = HttpClient(retries=2, backoff_cap=4.0)
+    client._sessions['opensky'] = session
+    return client
+
+def test_long_retry_after_fails_as_a_provider_error_not_a_skipped_call():
+    session = Responses(response(429, '600'))
+    client = client_with(session)
+    
+    with pytest.raises(ProviderRateLimitedError) as raised:
+        client.get('opensky', 'https://example.test')
+    assert not isinstance(raised.value, CallSkipped)
+    assert raised.value.retry_after == 600
+    assert session.calls == 1
+    assert client.breaker('opensky').status()['last_error'] == "HTTP 429"
+
+def test_short_retry_after_is_waited_out(clock):
+    session = Responses(response(429, '2'), response(200))
+    
+    assert client_with(session).get('opensky', 'https://example.test').status_code == 200
+    assert clock.now == 1002.0
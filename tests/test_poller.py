@@ -0,0 +1,108 @@
+import threading
+from datetime import datetime
+
+import pandas as pd
+
+from poller import Feed, FeedPoller, Snapshot, SnapshotStore
+
+def frame(value: int) -> pd.DataFrame:
+    return pd.DataFrame({'Flight': ['PK1'], 'Sold': [value]})
+
+def test_version_moves_only_when_the_data_changes():
+    store = SnapshotStore()
+    first = store.publish('PIA.seats', frame(1))
+    
+    assert store.publish('PIA.seats', frame(1)) is first
+    assert store.publish('PIA.seats', frame(2)).version == 2
+    assert store.versions() == {'PIA.seats': 2}
+
+def test_listeners_see_every_new_version_and_failures_are_contained():
+    store = SnapshotStore()
+    seen = []
+    store.subscribe(lambda snapshot: 1 / 0)
+    store.subscribe(lambda snapshot: seen.append(snapshot.version))
+    store.publish('PIA.seats', frame(1))
+    store.publish('PIA.seats', frame(1))
+    store.publish('PIA.seats', frame(2))
+    
+    assert seen == [1, 2]
+
+def test_restored_snapshot_is_served_until_the_first_poll_replaces_it():
+    store = SnapshotStore()
+    seen = []
+    store.subscribe(seen.append)
+    store.restore(Snapshot('PIA.seats', 7, datetime(2026, 1, 1), frame(1)))
+    assert store.latest('PIA.seats').restored
+    assert seen == []
+    
+    # Even unchanged data counts as a new version once it is live
+    live = store.publish('PIA.seats', frame(1))
+    assert (live.version, live.restored) == (8, False)
+    # Restoring again never overwrites what is already there
+    store.restore(Snapshot('PIA.seats', 1, datetime(2026, 1, 1), frame(5)))
+    assert store.latest('PIA.seats') is live
+
+def test_wait_for_blocks_until_a_newer_version():
+    store = SnapshotStore()
+    store.publish('PIA.seats', frame(1))
+    threading.Timer(0.05, store.publish, args=('PIA.seats', frame(2))).start()
+    
+    assert store.wait_for('PIA.seats', after_version=1, timeout=5).version == 2
+    assert store.wait_for('PIA.seats', after_version=2, timeout=0.01).version == 2
+
+def test_poll_once_publishes_and_records_failures():
+    store = SnapshotStore()
+    values = iter([frame(1), RuntimeError("timeout")])
+    
+    def fetch():
+        value = next(values)
+        if isinstance(value, Exception):
+            raise value
+        return value
+    
+    poller = FeedPoller(store, [Feed('PIA.seats', fetch, interval=60)])
+    assert poller.poll_once('PIA.seats').version == 1
+    assert poller.poll_once('PIA.seats') is None
+    
+    status = poller.status()['PIA.seats']
+    assert (status['polls'], status['failures'], status['last_error'], status['version']) == (2, 1, "timeout", 1)
+
+def test_leases_speed_up_polling_until_released():
+    poller = FeedPoller(SnapshotStore(), [Feed('PIA.flightradar', lambda: frame(1), interval=60)])
+    poller.request_interval('PIA.flightradar', 10, requester='a')
+    poller.request_interval('PIA.flightradar', 5, requester='b')
+    assert poller.interval_for('PIA.flightradar') == 5
+    
+    poller.release_interval('PIA.flightradar', requester='b')
+    assert poller.interval_for('PIA.flightradar') == 10
+    poller.request_interval('PIA.flightradar', 1, requester='c', lease=-1)
+    assert poller.interval_for('PIA.flightradar') == 10
+
+def test_started_poller_polls_every_feed_right_away():
+    store = SnapshotStore()
+    poller = FeedPoller(store, [Feed('PIA.seats', lambda: frame(1), 60), Feed('PIA.maintenance', lambda: frame(2), 60)])
+    poller.start()
+    try:
+        assert store.wait_for('PIA.seats', timeout=5) is not None
+        assert store.wait_for('PIA.maintenance', timeout=5) is not None
+    finally:
+        poller.stop()
+
+def test_adopt_keeps_the_leaders_version_and_ignores_older_ones():
+    store = SnapshotStore()
+    assert store.adopt(Snapshot('PIA.seats', 5, datetime(2026, 1, 1), frame(5)))
+    
+    assert not store.adopt(Snapshot('PIA.seats', 4, datetime(2026, 1, 1), frame(4)))
+    assert not store.adopt(Snapshot('PIA.seats', 5, datetime(2026, 1, 1), frame(5)))
+    assert store.latest('PIA.seats').version == 5
+
+def test_adopt_replaces_restored_and_locally_published_snapshots():
+    store = SnapshotStore()
+    store.restore(Snapshot('PIA.seats', 9, datetime(2026, 1, 1), frame(9)))
+    assert store.adopt(Snapshot('PIA.seats', 1, datetime(2026, 1, 1), frame(1)))
+    
+    # A follower that published before the leader's first snapshot arrived still takes the leader's
+    store.publish('PIA.maintenance', frame(3))
+    store.publish('PIA.maintenance', frame(4))
+    assert store.adopt(Snapshot('PIA.maintenance', 1, datetime(2026, 1, 1), frame(1)))
+    assert store.latest('PIA.maintenance').data.equals(frame(1))
@@ -0,0 +1,92 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from reconcile import FlightStateTable, normalize_callsign
+
+IATA_TO_ICAO = {'PK': 'PIA'}
+
+def flightradar(updated: datetime, **fields) -> pd.DataFrame:
+    row = {'Flight': 'PK-301', 'Aircraft': 'AP-BMH', 'From': 'KHI', 'To': 'ISB', 'Latitude': 25.0,
+           'Longitude': 67.0, 'Altitude (ft)': 30000, 'Speed (knots)': 450, 'Status': 'In Flight',
+           'Passengers': 150, 'Last Update': updated}
+    return pd.DataFrame([{**row, **fields}])
+
+def opensky(seen: datetime, **fields) -> pd.DataFrame:
+    row = {'Callsign': 'PIA301 ', 'ICAO': '760abc', 'Latitude': 30.0, 'Longitude': 70.0, 'Altitude': 10000.0,
+           'Velocity': 230.0, 'Heading': 45.0, 'Timestamp': seen}
+    return pd.DataFrame([{**row, **fields}])
+
+@pytest.fixture
+def now():
+    return datetime.now()
+
+def test_callsigns_are_normalized_to_icao_form():
+    values = pd.Series(['PK-001', 'PIA301 ', 'pk 370', '', None])
+    
+    assert normalize_callsign(values, IATA_TO_ICAO).tolist()[:3] == ['PIA1', 'PIA301', 'PIA370']
+    assert normalize_callsign(values, IATA_TO_ICAO).isna().tolist()[3:] == [True, True]
+
+def test_both_feeds_land_on_one_row_and_the_newer_one_wins(now):
+    table = FlightStateTable(IATA_TO_ICAO)
+    table.apply('flightradar', flightradar(now - timedelta(seconds=60)), now)
+    table.apply('opensky', opensky(now - timedelta(seconds=5)), now)
+    
+    row = table.frame().set_index('Callsign').loc['PIA301']
+    assert len(table) == 1
+    assert (row['Latitude'], row['Longitude'], row['Heading']) == (30.0, 70.0, 45.0)
+    # Fields the newer feed lacks are kept from the older one
+    assert (row['From'], row['To'], row['Passengers']) == ('KHI', 'ISB', 150)
+    assert row['Sources'] == 'flightradar+opensky'
+    assert row['Updated'] == pd.Timestamp(now - timedelta(seconds=5))
+
+def test_an_older_observation_only_fills_gaps(now):
+    table = FlightStateTable(IATA_TO_ICAO)
+    table.apply('flightradar', flightradar(now - timedelta(seconds=5)), now)
+    table.apply('opensky', opensky(now - timedelta(seconds=60)), now)
+    
+    row = table.frame().set_index('Callsign').loc['PIA301']
+    assert (row['Latitude'], row['Longitude']) == (25.0, 67.0)
+    assert row['Heading'] == 45.0
+    assert row['Updated'] == pd.Timestamp(now - timedelta(seconds=5))
+
+def test_rows_without_callsign_follow_their_aircraft(now):
+    table = FlightStateTable(IATA_TO_ICAO)
+    table.apply('opensky', opensky(now - timedelta(seconds=30), Callsign=None), now)
+    assert table.frame()['Callsign'].tolist() == ['760abc']
+    
+    table.apply('opensky', opensky(now - timedelta(seconds=10)), now)
+    assert table.frame()['Callsign'].tolist() == ['PIA301']
+
+def test_versions_already_applied_are_skipped(now):
+    table = FlightStateTable(IATA_TO_ICAO)
+    
+    assert table.apply('flightradar', flightradar(now), now, version=2)
+    assert not table.apply('flightradar', flightradar(now, Latitude=1.0), now, version=2)
+    assert table.frame()['Latitude'].tolist() == [25.0]
+
+def test_flights_expire_when_no_feed_updates_them(now):
+    table = FlightStateTable(IATA_TO_ICAO, expire_after=timedelta(minutes=30))
+    table.apply('flightradar', flightradar(now - timedelta(minutes=20)), now)
+    table.apply('flightradar', flightradar(now - timedelta(minutes=40), Flight='PK-302', Aircraft='AP-BMI'), now)
+    # A row that was already too old when it arrived never enters the table
+    assert table.frame()['Callsign'].tolist() == ['PIA301']
+    
+    table.expire_after = timedelta(minutes=10)
+    table.apply('opensky', opensky(now, Callsign='PIA999', ICAO='760def'), now)
+    assert 'PIA301' in table.frame()['Callsign'].tolist()
+    # The whole table is swept once per sweep interval
+    table.sweep_every = timedelta(0)
+    table.apply('opensky', opensky(now, Callsign='PIA999', ICAO='760def'), now)
+    assert table.frame()['Callsign'].tolist() == ['PIA999']
+
+def test_opensky_epochs_are_compared_on_the_local_clock(now):
+    table = FlightStateTable(IATA_TO_ICAO)
+    seen = pd.Timestamp(now - timedelta(seconds=5)).tz_localize(now.astimezone().tzinfo).tz_convert('UTC')
+    table.apply('flightradar', flightradar(now - timedelta(seconds=60)), now)
+    table.apply('opensky', opensky(seen), now)
+    
+    row = table.frame().set_index('Callsign').loc['PIA301']
+    assert row['Updated'] == pd.Timestamp(now - timedelta(seconds=5))
+    assert row['Latitude'] == 30.0
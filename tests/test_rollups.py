@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+from rollups import RollupStore
+
+DAY = datetime(2026, 3, 1)
+
+def seats(sold: int, flight: str = 'PK-301', route: str = 'KHI-ISB') -> pd.DataFrame:
+    return pd.DataFrame({'Flight': [flight], 'Route': [route], 'Sold': [sold], 'Total Seats': [200],
+                         'Revenue Generated': [sold * 100.0]})
+
+def sold_per_hour(store: RollupStore) -> dict:
+    hourly = store.query('hour', 'PIA', by=['Bucket'])
+    return dict(zip(hourly['Bucket'].dt.hour, hourly['Sold']))
+
+@pytest.fixture
+def store():
+    return RollupStore(late_window=timedelta(hours=6))
+
+def test_repeated_snapshots_replace_a_flights_contribution(store):
+    store.apply('PIA', 'seats', seats(100), DAY.replace(hour=10, minute=5))
+    store.apply('PIA', 'seats', seats(120), DAY.replace(hour=10, minute=35))
+    
+    assert sold_per_hour(store) == {10: 120}
+    assert store.query('day', 'PIA', by=['Route'])['Load Factor %'].tolist() == [60.0]
+
+def test_late_rows_re_aggregate_only_their_bucket(store):
+    store.apply('PIA', 'seats', seats(100), DAY.replace(hour=10, minute=5))
+    store.apply('PIA', 'seats', seats(150), DAY.replace(hour=12, minute=5))
+    
+    # A newer observation of hour 10 arrives after hour 12 was stored
+    touched = store.apply('PIA', 'seats', seats(110), DAY.replace(hour=10, minute=50))
+    assert touched == 2  # the hour and its day
+    assert sold_per_hour(store) == {10: 110, 12: 150}
+
+def test_late_rows_older_than_the_stored_observation_lose(store):
+    store.apply('PIA', 'seats', seats(110), DAY.replace(hour=10, minute=50))
+    store.apply('PIA', 'seats', seats(100), DAY.replace(hour=10, minute=5))
+    
+    assert sold_per_hour(store) == {10: 110}
+
+def test_rows_past_the_late_window_are_dropped_unless_backfilled(store):
+    store.apply('PIA', 'seats', seats(100), DAY.replace(hour=20))
+    late = seats(50, flight='PK-303').assign(Time=DAY.replace(hour=8))
+    
+    assert store.apply('PIA', 'seats', late) == 0
+    assert sold_per_hour(store) == {20: 100}
+    store.apply('PIA', 'seats', late, backfill=True)
+    assert sold_per_hour(store) == {8: 50, 20: 100}
+
+def test_closed_buckets_keep_their_totals(store):
+    store.apply('PIA', 'seats', seats(100), DAY.replace(hour=1))
+    store.apply('PIA', 'seats', seats(80, flight='PK-305'), DAY.replace(hour=23))
+    
+    assert sold_per_hour(store) == {1: 100, 23: 80}
+    assert store.query('day', 'PIA', by=['Route'])['Sold'].tolist() == [180]
+
+def test_late_window_is_tracked_per_airline(store):
+    store.apply('SV', 'seats', seats(90, flight='SV-700', route='JED-RUH'), DAY.replace(hour=23))
+    # PIA's first rows are far behind SV's newest, but only PIA's own rows set its window
+    store.apply('PIA', 'seats', seats(100), DAY.replace(hour=8))
+    store.apply('PIA', 'seats', seats(50, flight='PK-303'), DAY.replace(hour=7))
+    
+    assert sold_per_hour(store) == {7: 50, 8: 100}
+    assert store.query('hour', 'SV', by=['Route'])['Sold'].tolist() == [90]
+
+def test_merging_leaves_other_buckets_untouched(store):
+    store.apply('PIA', 'seats', seats(100), DAY.replace(hour=10))
+    hour = store._levels['hour']
+    stored = hour.contributions[('PIA', pd.Timestamp(DAY.replace(hour=10)))]
+    
+    assert store.apply('PIA', 'seats', seats(120), DAY.replace(hour=11)) == 2  # a new hour in the same day
+    assert hour.contributions[('PIA', pd.Timestamp(DAY.replace(hour=10)))] is stored
+    assert sold_per_hour(store) == {10: 100, 11: 120}
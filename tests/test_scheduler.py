@@ -0,0 +1,81 @@
+import threading
+import time
+
+import pytest
+
+import scheduler
+from scheduler import ProviderScheduler, RateLimitedError, TokenBucket
+
+_real_sleep = time.sleep
+
+@pytest.fixture(autouse=True)
+def fake_time(clock, monkeypatch):
+    monkeypatch.setattr(scheduler, 'time', clock)
+
+def test_bucket_allows_a_burst_then_refills_at_its_rate(clock):
+    bucket = TokenBucket(rate=2.0, burst=3)
+    
+    assert [bucket.acquire() for _ in range(4)] == [True, True, True, False]
+    clock.advance(0.5)
+    assert bucket.acquire()
+    assert not bucket.acquire()
+
+def test_bucket_never_holds_more_than_its_burst(clock):
+    bucket = TokenBucket(rate=1.0, burst=2)
+    clock.advance(3600)
+    
+    assert bucket.tokens == 2
+
+def test_acquire_waits_for_a_refill_within_the_timeout(clock):
+    bucket = TokenBucket(rate=1.0, burst=1)
+    bucket.acquire()
+    
+    assert not bucket.acquire(timeout=0.5)
+    assert bucket.acquire(timeout=2.0)
+    assert clock.now == pytest.approx(1001.0)
+
+def test_deferred_bucket_grants_nothing_until_the_delay_passes(clock):
+    bucket = TokenBucket(rate=1.0, burst=5)
+    bucket.defer(10)
+    
+    clock.advance(9.9)
+    assert not bucket.acquire()
+    clock.advance(0.1)
+    assert bucket.acquire()
+
+def test_admit_sheds_callers_once_the_budget_is_spent():
+    limits = ProviderScheduler({'opensky': (60, 2)}, max_wait=0.5)
+    limits.admit('opensky')
+    limits.admit('opensky')
+    
+    with pytest.raises(RateLimitedError):
+        limits.admit('opensky')
+    # Providers without a budget are never shed
+    limits.admit('weather')
+    status = limits.status()['opensky']
+    assert (status['admitted'], status['shed']) == (2, 1)
+
+def test_identical_calls_in_flight_are_coalesced():
+    limits = ProviderScheduler({})
+    started, release = threading.Event(), threading.Event()
+    calls, results = [], []
+    
+    def fetch():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'payload'
+    
+    callers = [threading.Thread(target=lambda: results.append(limits.run('fr24', 'flights', fetch))) for _ in range(5)]
+    callers[0].start()
+    started.wait(5)
+    for caller in callers[1:]:
+        caller.start()
+    _real_sleep(0.05)
+    release.set()
+    for caller in callers:
+        caller.join(5)
+    
+    assert calls == [1]
+    assert results == ['payload'] * 5
+    assert limits.status()['fr24']['coalesced'] == 4
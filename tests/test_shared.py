@@ -0,0 +1,152 @@
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('pyarrow')
+pytest.importorskip('fcntl')
+
+from poller import Snapshot, SnapshotStore
+from shared import SharedSnapshots
+
+def flights(rows: int = 1000) -> pd.DataFrame:
+    return pd.DataFrame({
+        'Flight': [f'PK-{i}' for i in range(rows)],
+        'Status': np.where(np.arange(rows) % 2, 'In Flight', None),
+        'Latitude': np.where(np.arange(rows) % 5, 24.9, np.nan),
+        'Altitude (ft)': np.arange(rows, dtype=float),
+    })
+
+def snapshot(version: int, data: pd.DataFrame = None) -> Snapshot:
+    return Snapshot('PIA.flightradar', version, datetime(2026, 3, 1, 12), flights() if data is None else data)
+
+def mapped_ranges(path: Path):
+    """Address ranges of this process's mappings of a file"""
+    ranges = []
+    for line in Path('/proc/self/maps').read_text().splitlines():
+        if line.endswith(str(path)):
+            start, end = (int(address, 16) for address in line.split()[0].split('-'))
+            ranges.append((start, end))
+    return ranges
+
+def column_addresses(frame: pd.DataFrame):
+    """Data buffer address of every column of a frame"""
+    addresses = {}
+    for name in frame.columns:
+        values = frame[name].array
+        if hasattr(values, '_pa_array'):
+            addresses[name] = values._pa_array.chunk(0).buffers()[-1].address
+        else:
+            addresses[name] = values.to_numpy().__array_interface__['data'][0]
+    return addresses
+
+@pytest.fixture
+def leader(tmp_path):
+    shared = SharedSnapshots(str(tmp_path))
+    assert shared.try_lead()
+    yield shared
+    shared._lock_file.close()
+
+def test_one_leader_per_directory_until_it_exits(leader, tmp_path):
+    follower = SharedSnapshots(str(tmp_path))
+    assert not follower.try_lead()
+    
+    # Exiting closes the lock file, which releases the lock
+    leader._lock_file.close()
+    assert follower.try_lead()
+    assert follower.stats()['role'] == 'leader'
+    leader._lock_file = follower._lock_file
+
+def test_only_the_leader_publishes(leader, tmp_path):
+    follower = SharedSnapshots(str(tmp_path))
+    follower.try_lead()
+    follower.publish(snapshot(1))
+    assert follower.keys() == []
+    
+    leader.publish(snapshot(1))
+    assert follower.keys() == ['PIA.flightradar']
+
+def test_two_readers_map_one_snapshot_without_copying_columns(leader, tmp_path):
+    data = flights(20_000)
+    leader.publish(snapshot(3, data))
+    first, second = SharedSnapshots(str(tmp_path)), SharedSnapshots(str(tmp_path))
+    
+    a, b = first.read('PIA.flightradar'), second.read('PIA.flightradar')
+    assert (a.version, b.version, a.fetched_at) == (3, 3, datetime(2026, 3, 1, 12))
+    pd.testing.assert_frame_equal(a.data, b.data)
+    pd.testing.assert_frame_equal(a.data.astype(object), data.astype(object).fillna(np.nan), check_dtype=False)
+    assert a.data['Flight'].dtype == pd.StringDtype('pyarrow', na_value=np.nan)
+    
+    ranges = mapped_ranges(tmp_path / 'PIA.flightradar.arrow')
+    if not ranges:
+        pytest.skip("no /proc/self/maps")
+    for frame in (a.data, b.data):
+        for name, address in column_addresses(frame).items():
+            assert any(start <= address < end for start, end in ranges), f"{name} was copied"
+
+def test_unchanged_file_is_not_mapped_again(leader, tmp_path):
+    leader.publish(snapshot(1))
+    reader = SharedSnapshots(str(tmp_path))
+    first = reader.read('PIA.flightradar')
+    
+    assert reader.read('PIA.flightradar') is first
+    leader.publish(snapshot(2, flights(10)))
+    assert reader.read('PIA.flightradar').version == 2
+    assert reader.read('PIA.nothing') is None
+
+def wait_until(condition, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return False
+
+def test_follower_adopts_new_versions_and_takes_over(leader, tmp_path):
+    store = SnapshotStore()
+    follower = SharedSnapshots(str(tmp_path))
+    took_over = []
+    follower.follow(store.adopt, on_lead=lambda: took_over.append(True), interval=0.02)
+    
+    leader.publish(snapshot(4))
+    assert wait_until(lambda: store.versions().get('PIA.flightradar') == 4)
+    leader.publish(snapshot(5, flights(3)))
+    assert wait_until(lambda: store.versions().get('PIA.flightradar') == 5)
+    
+    leader._lock_file.close()
+    assert wait_until(lambda: took_over == [True])
+    assert follower.leading
+    leader._lock_file = follower._lock_file
+
+class FakePoller:
+    def __init__(self):
+        self.feeds = {'PIA.flightradar': None}
+        self.leases, self.polled = {}, []
+    
+    def request_interval(self, feed, seconds, requester, lease):
+        self.leases[(feed, requester)] = seconds
+    
+    def release_interval(self, feed, requester):
+        self.leases.pop((feed, requester), None)
+    
+    def poll_now(self, feed):
+        self.polled.append(feed)
+
+def test_leader_applies_and_releases_follower_poll_requests(leader, tmp_path):
+    poller = FakePoller()
+    leader.serve_requests(poller, interval=0.02)
+    follower = SharedSnapshots(str(tmp_path))
+    
+    follower.request_poll('PIA.flightradar', 'session-1', interval=5, now=True)
+    assert wait_until(lambda: poller.leases == {('PIA.flightradar', 'session-1'): 5} and poller.polled)
+    # The forced poll is consumed once; the lease stays
+    time.sleep(0.1)
+    assert poller.polled == ['PIA.flightradar']
+    
+    follower.release_poll('PIA.flightradar', 'session-1')
+    assert wait_until(lambda: poller.leases == {})
+    follower.request_poll('PIA.unknown', 'session-1', interval=5)
+    assert wait_until(lambda: not list((tmp_path / 'requests').glob('*.json')))
@@ -0,0 +1,86 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from spatial import PositionIndex, haversine_nm, initial_bearing, viewport_bounds
+
+KHI = (24.9065, 67.1608)
+
+@pytest.fixture
+def aircraft():
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        'Flight': [f'PK-{i}' for i in range(2000)],
+        'Latitude': rng.uniform(10, 45, 2000),
+        'Longitude': rng.uniform(40, 90, 2000),
+        'Heading': rng.uniform(0, 360, 2000),
+        'Speed (knots)': rng.uniform(0, 500, 2000),
+    })
+
+def test_distance_and_bearing():
+    # Karachi to Islamabad is about 610 nm, roughly north-north-east
+    assert haversine_nm(*KHI, 33.6164, 73.1286) == pytest.approx(610, abs=10)
+    assert initial_bearing(*KHI, 33.6164, 73.1286) == pytest.approx(30, abs=5)
+
+def test_radius_query_matches_a_full_scan(aircraft):
+    index = PositionIndex(cell_degrees=1.0)
+    index.update(aircraft, 'Flight')
+    
+    nearby = index.within(*KHI, 300)
+    distances = haversine_nm(aircraft['Latitude'], aircraft['Longitude'], *KHI)
+    assert sorted(nearby['Flight']) == sorted(aircraft['Flight'][distances <= 300])
+    assert nearby['Distance (nm)'].is_monotonic_increasing
+
+def test_inbound_aircraft_have_an_eta():
+    index = PositionIndex()
+    index.update(pd.DataFrame({
+        'Flight': ['towards', 'away', 'parked'],
+        'Latitude': [24.0, 24.0, 24.9],
+        'Longitude': [67.16, 67.16, 67.16],
+        'Heading': [0.0, 180.0, 0.0],
+        'Speed (knots)': [300.0, 300.0, 0.0],
+    }), 'Flight')
+    
+    inbound = index.inbound(*KHI, 100, 'Speed (knots)')
+    assert inbound['Flight'].tolist() == ['towards']
+    assert inbound['ETA (min)'].iloc[0] == pytest.approx(54 / 300 * 60, rel=0.05)
+
+def test_nearest_hub_per_aircraft():
+    index = PositionIndex()
+    index.update(pd.DataFrame({'Flight': ['a', 'b', 'c'], 'Latitude': [25.0, 33.5, np.nan], 'Longitude': [67.0, 73.0, np.nan]}), 'Flight')
+    
+    nearest = index.nearest(['KHI', 'ISB'], [24.9065, 33.6164], [67.1608, 73.1286])
+    assert nearest['Nearest Hub'].tolist()[:2] == ['KHI', 'ISB']
+    assert nearest.iloc[2][['Nearest Hub', 'Hub Distance (nm)']].isna().all()
+
+def test_unmoved_aircraft_reuse_their_cells(aircraft):
+    index = PositionIndex()
+    index.update(aircraft, 'Flight', version=1)
+    moved = aircraft.assign(Latitude=aircraft['Latitude'].where(aircraft.index >= 10, 44.0))
+    index.update(moved, 'Flight', version=2)
+    
+    assert (index.version, index.reused) == (2, 1990)
+    assert set(index.within(44.0, 65.0, 2000)['Flight']) >= {f'PK-{i}' for i in range(10)}
+
+def test_viewport_returns_rows_or_at_most_max_points_bins(aircraft):
+    index = PositionIndex()
+    index.update(aircraft, 'Flight')
+    
+    rows, binned = index.viewport(20, 30, 60, 70, max_points=5000)
+    inside = aircraft['Latitude'].between(20, 30) & aircraft['Longitude'].between(60, 70)
+    assert not binned
+    assert sorted(rows['Flight']) == sorted(aircraft['Flight'][inside])
+    
+    bins, binned = index.viewport(-90, 90, -180, 180, max_points=50)
+    assert binned and len(bins) <= 50
+    assert bins['Count'].sum() == len(aircraft)
+
+def test_viewport_across_the_antimeridian():
+    index = PositionIndex()
+    index.update(pd.DataFrame({'Flight': ['east', 'west', 'far'], 'Latitude': [0.0, 0.0, 0.0],
+                               'Longitude': [179.5, -179.5, 0.0]}), 'Flight')
+    
+    lat_lo, lat_hi, lon_lo, lon_hi = viewport_bounds(0.0, 180.0, zoom=6)
+    assert lon_lo > lon_hi
+    rows, _ = index.viewport(lat_lo, lat_hi, lon_lo, lon_hi)
+    assert sorted(rows['Flight']) == ['east', 'west']
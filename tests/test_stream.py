@@ -0,0 +1,91 @@
+import re
+import threading
+
+import pandas as pd
+import pytest
+
+from events import DiffRule, EventLog
+from stream import EventBroadcaster, EventFilter
+
+RULES = {
+    'seats': DiffRule(key='Flight', fields={'Sold': 'seat_delta'}),
+    'safety_alerts': DiffRule(key='Issue', fields={'Status': 'status_change'}, added='new_alert'),
+}
+
+def seats(sold: int) -> pd.DataFrame:
+    return pd.DataFrame({'Flight': ['PK1', 'PK2'], 'Route': ['KHI-ISB', 'LHE-KHI'], 'Sold': [sold, sold]})
+
+def seqs(subscription) -> list:
+    messages, _ = subscription.take(0)
+    return [int(re.match(rb'id: (\d+)', message).group(1)) for message in messages]
+
+@pytest.fixture
+def log():
+    log = EventLog(RULES)
+    log.observe('PIA', 'seats', seats(0))
+    return log
+
+def test_reconnecting_client_gets_missed_events_then_live_ones(log):
+    broadcaster = EventBroadcaster(log)
+    log.observe('PIA', 'seats', seats(1))
+    log.observe('PIA', 'seats', seats(2))
+    
+    subscription = broadcaster.subscribe(EventFilter(), since=1)
+    log.observe('PIA', 'seats', seats(3))
+    
+    assert seqs(subscription) == [2, 3, 4, 5, 6]
+
+def test_new_client_without_cursor_gets_only_new_events(log):
+    broadcaster = EventBroadcaster(log)
+    log.observe('PIA', 'seats', seats(1))
+    subscription = broadcaster.subscribe(EventFilter())
+    log.observe('PIA', 'seats', seats(2))
+    
+    assert seqs(subscription) == [3, 4]
+
+def test_replay_honors_the_filter(log):
+    broadcaster = EventBroadcaster(log)
+    log.observe('PIA', 'seats', seats(1))
+    
+    subscription = broadcaster.subscribe(EventFilter.from_query({'route': 'LHE-KHI'}), since=0)
+    assert seqs(subscription) == [2]
+
+def test_replay_racing_publishes_is_complete_ordered_and_unique(log):
+    broadcaster = EventBroadcaster(log, max_pending=100_000)
+    stop = threading.Event()
+    
+    def publish():
+        sold = 0
+        while not stop.is_set():
+            sold += 1
+            log.observe('PIA', 'seats', seats(sold))
+    
+    publisher = threading.Thread(target=publish)
+    publisher.start()
+    try:
+        subscriptions = [broadcaster.subscribe(EventFilter(), since=0) for _ in range(20)]
+    finally:
+        stop.set()
+        publisher.join(5)
+    
+    for subscription in subscriptions:
+        assert seqs(subscription) == list(range(1, log.last_seq + 1))
+
+def test_slow_client_drops_its_oldest_events(log):
+    broadcaster = EventBroadcaster(log, max_pending=3)
+    subscription = broadcaster.subscribe(EventFilter())
+    for sold in range(1, 4):
+        log.observe('PIA', 'seats', seats(sold))
+    
+    messages, dropped = subscription.take(0)
+    assert dropped == 3
+    assert len(messages) == 3
+    assert broadcaster.stats()['dropped'] == 3
+
+def test_subscribers_beyond_the_limit_are_refused(log):
+    broadcaster = EventBroadcaster(log, max_clients=1)
+    first = broadcaster.subscribe(EventFilter())
+    
+    assert broadcaster.subscribe(EventFilter()) is None
+    broadcaster.unsubscribe(first)
+    assert broadcaster.subscribe(EventFilter()) is not None
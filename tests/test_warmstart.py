@@ -0,0 +1,39 @@
+from datetime import datetime
+
+import pandas as pd
+
+from poller import Snapshot, SnapshotStore
+from warmstart import WarmStartStore
+
+def test_saved_snapshots_load_back_by_feed(tmp_path):
+    warm = WarmStartStore(str(tmp_path / 'warm'))
+    warm.save(Snapshot('PIA.seats', 1, datetime(2026, 3, 1), pd.DataFrame({'Sold': [100]})))
+    warm.save(Snapshot('PIA.seats', 2, datetime(2026, 3, 2), pd.DataFrame({'Sold': [120]})))
+    warm.save(Snapshot('SV.weather', 5, datetime(2026, 3, 2), pd.DataFrame({'Airport': ['JED']})))
+    
+    loaded = warm.load()
+    assert sorted(loaded) == ['PIA.seats', 'SV.weather']
+    assert loaded['PIA.seats'].version == 2
+    assert loaded['PIA.seats'].data['Sold'].tolist() == [120]
+    assert not list((tmp_path / 'warm').glob('*.tmp'))
+
+def test_unreadable_files_are_skipped(tmp_path):
+    warm = WarmStartStore(str(tmp_path))
+    warm.save(Snapshot('PIA.seats', 1, datetime(2026, 3, 1), pd.DataFrame({'Sold': [100]})))
+    (tmp_path / 'PIA.maintenance.pkl').write_bytes(b'not a pickle')
+    
+    assert list(warm.load()) == ['PIA.seats']
+    assert WarmStartStore(str(tmp_path / 'missing')).load() == {}
+
+def test_restored_snapshots_give_way_to_the_first_live_poll(tmp_path):
+    warm = WarmStartStore(str(tmp_path))
+    data = pd.DataFrame({'Sold': [100]})
+    warm.save(Snapshot('PIA.seats', 3, datetime(2026, 3, 1), data))
+    store = SnapshotStore()
+    for snapshot in warm.load().values():
+        store.restore(snapshot)
+    assert store.latest('PIA.seats').restored
+    
+    # Even unchanged data replaces the restored snapshot, as a new version
+    live = store.publish('PIA.seats', data.copy())
+    assert (live.version, live.restored) == (4, False)
@@ -0,0 +1,48 @@
+"""
+Warm-start persistence of the latest snapshot per feed.
+
+Every published snapshot is pickled to <dir>/<feed>.pkl (written to a temp
+file and swapped in atomically). At startup the files are loaded back into
+the SnapshotStore flagged as restored, so the first render never waits on
+upstream APIs; the flag clears when the first live poll publishes.
+"""
+
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Dict
+
+from poller import Snapshot
+
+logger = logging.getLogger(__name__)
+
+class WarmStartStore:
+    """One pickle file per feed holding its last good snapshot"""
+    
+    def __init__(self, directory: str):
+        self.directory = Path(directory)
+    
+    def save(self, snapshot: Snapshot):
+        """Persist a snapshot, replacing the previous file for that feed"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{snapshot.provider}.pkl"
+        tmp = path.with_suffix('.tmp')
+        with open(tmp, 'wb') as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    
+    def load(self) -> Dict[str, Snapshot]:
+        """All saved snapshots by feed; unreadable files are skipped"""
+        snapshots = {}
+        if not self.directory.exists():
+            return snapshots
+        for path in self.directory.glob("*.pkl"):
+            try:
+                with open(path, 'rb') as f:
+                    snapshot = pickle.load(f)
+            except Exception as e:
+                logger.warning("Ignoring unreadable warm-start file %s: %s", path, e)
+                continue
+            snapshots[snapshot.provider] = snapshot
+        return snapshots